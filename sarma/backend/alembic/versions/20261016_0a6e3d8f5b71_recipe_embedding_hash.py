@@ -0,0 +1,23 @@
+"""recipe_embedding_hash
+
+Revision ID: 0a6e3d8f5b71
+Revises: f2b7c93e0a14
+Create Date: 2026-10-16 16:24:50.182736
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a6e3d8f5b71'
+down_revision = 'f2b7c93e0a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('recipes', sa.Column('embedding_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('recipes', 'embedding_hash')
@@ -0,0 +1,48 @@
+"""rag_query_cache
+
+Revision ID: 3e8c1a7f94b2
+Revises: 0a6e3d8f5b71
+Create Date: 2026-10-16 16:41:07.529318
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import HALFVEC
+
+
+# revision identifiers, used by Alembic.
+revision = '3e8c1a7f94b2'
+down_revision = '0a6e3d8f5b71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rag_query_cache',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('embedding', HALFVEC(1536), nullable=False),
+        sa.Column('user_context_hash', sa.String(length=64), nullable=False),
+        sa.Column('response', postgresql.JSONB(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True)
+    )
+    op.create_index(
+        'idx_rag_cache_context',
+        'rag_query_cache',
+        ['user_context_hash'],
+        if_not_exists=True
+    )
+    op.create_index(
+        'idx_rag_cache_embedding_hnsw',
+        'rag_query_cache',
+        ['embedding'],
+        postgresql_using='hnsw',
+        postgresql_ops={'embedding': 'halfvec_cosine_ops'},
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_rag_cache_embedding_hnsw', table_name='rag_query_cache', if_exists=True)
+    op.drop_index('idx_rag_cache_context', table_name='rag_query_cache', if_exists=True)
+    op.drop_table('rag_query_cache')
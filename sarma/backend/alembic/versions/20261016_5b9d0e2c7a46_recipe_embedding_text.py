@@ -0,0 +1,24 @@
+"""recipe_embedding_text
+
+Revision ID: 5b9d0e2c7a46
+Revises: 3e8c1a7f94b2
+Create Date: 2026-10-16 17:02:38.914205
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9d0e2c7a46'
+down_revision = '3e8c1a7f94b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filled in by the application the first time each recipe is embedded or edited
+    op.add_column('recipes', sa.Column('embedding_text', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('recipes', 'embedding_text')
@@ -0,0 +1,57 @@
+"""user_timeline_indexes
+
+Revision ID: 7c2e9b41d5a3
+Revises: 4046772f3295
+Create Date: 2026-10-16 09:12:40.318204
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9b41d5a3'
+down_revision = '4046772f3295'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Newest-first composites so "latest for user" is a single index probe
+    op.drop_index('idx_meal_photo_user_date', table_name='meal_photos', if_exists=True)
+    op.create_index(
+        'idx_meal_photo_user_date',
+        'meal_photos',
+        ['user_id', sa.text('eaten_at DESC')],
+        if_not_exists=True
+    )
+
+    op.drop_index('idx_assessment_user_date', table_name='health_assessments', if_exists=True)
+    op.create_index(
+        'idx_assessment_user_date',
+        'health_assessments',
+        ['user_id', sa.text('assessment_date DESC')],
+        if_not_exists=True
+    )
+
+    op.create_index(
+        'idx_meal_log_user_date',
+        'meal_logs',
+        ['user_id', 'log_date'],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_assessment_user_date', table_name='health_assessments', if_exists=True)
+    op.create_index(
+        'idx_assessment_user_date',
+        'health_assessments',
+        ['user_id', 'assessment_date']
+    )
+
+    op.drop_index('idx_meal_photo_user_date', table_name='meal_photos', if_exists=True)
+    op.create_index(
+        'idx_meal_photo_user_date',
+        'meal_photos',
+        ['user_id', 'eaten_at']
+    )
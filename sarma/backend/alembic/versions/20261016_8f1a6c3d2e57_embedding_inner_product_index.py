@@ -0,0 +1,50 @@
+"""embedding_inner_product_index
+
+Revision ID: 8f1a6c3d2e57
+Revises: 5b9d0e2c7a46
+Create Date: 2026-10-16 17:31:52.604817
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f1a6c3d2e57'
+down_revision = '5b9d0e2c7a46'
+branch_labels = None
+depends_on = None
+
+
+# (table, index) pairs whose HNSW index moves between cosine and inner product
+HNSW_INDEXES = (
+    ('recipes', 'idx_recipe_embedding_hnsw'),
+    ('rag_query_cache', 'idx_rag_cache_embedding_hnsw'),
+)
+
+
+def _rebuild_indexes(opclass: str) -> None:
+    for table, index in HNSW_INDEXES:
+        op.drop_index(index, table_name=table, if_exists=True)
+        op.create_index(
+            index,
+            table,
+            ['embedding'],
+            postgresql_using='hnsw',
+            postgresql_ops={'embedding': opclass},
+            if_not_exists=True
+        )
+
+
+def upgrade() -> None:
+    # Unit-length vectors make inner product equal cosine similarity
+    for table, _ in HNSW_INDEXES:
+        op.execute(
+            f"UPDATE {table} SET embedding = l2_normalize(embedding) "
+            "WHERE embedding IS NOT NULL"
+        )
+    _rebuild_indexes('halfvec_ip_ops')
+
+
+def downgrade() -> None:
+    # Normalized vectors stay valid for cosine distance
+    _rebuild_indexes('halfvec_cosine_ops')
@@ -0,0 +1,38 @@
+"""recipe_active_partial_indexes
+
+Revision ID: 91f6a2b8c4d0
+Revises: e5a4c7d29b18
+Create Date: 2026-10-16 11:17:52.064391
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '91f6a2b8c4d0'
+down_revision = 'e5a4c7d29b18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nearly every recipe query gates on is_active, so index only active rows
+    op.create_index(
+        'idx_recipe_active_rating',
+        'recipes',
+        [sa.text('rating_avg DESC')],
+        postgresql_where=sa.text('is_active = true'),
+        if_not_exists=True
+    )
+    op.create_index(
+        'idx_recipe_active_health',
+        'recipes',
+        [sa.text('health_score DESC')],
+        postgresql_where=sa.text('is_active = true'),
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_recipe_active_health', table_name='recipes', if_exists=True)
+    op.drop_index('idx_recipe_active_rating', table_name='recipes', if_exists=True)
@@ -0,0 +1,43 @@
+"""rag_cache_query_upsert
+
+Revision ID: a7d3e1c9f062
+Revises: 8f1a6c3d2e57
+Create Date: 2026-10-16 19:12:44.318205
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e1c9f062'
+down_revision = '8f1a6c3d2e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing entries have no query hash; the cache simply refills
+    op.execute("DELETE FROM rag_query_cache")
+    op.add_column(
+        'rag_query_cache',
+        sa.Column('query_hash', sa.String(length=64), nullable=False)
+    )
+    op.create_index(
+        'idx_rag_cache_context_query',
+        'rag_query_cache',
+        ['user_context_hash', 'query_hash'],
+        unique=True,
+        if_not_exists=True
+    )
+    op.create_index(
+        'idx_rag_cache_created',
+        'rag_query_cache',
+        ['created_at'],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_rag_cache_created', table_name='rag_query_cache', if_exists=True)
+    op.drop_index('idx_rag_cache_context_query', table_name='rag_query_cache', if_exists=True)
+    op.drop_column('rag_query_cache', 'query_hash')
@@ -0,0 +1,40 @@
+"""recipe_full_text_search
+
+Revision ID: b3d81f0c6e27
+Revises: 7c2e9b41d5a3
+Create Date: 2026-10-16 10:03:27.551930
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d81f0c6e27'
+down_revision = '7c2e9b41d5a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        ALTER TABLE recipes
+        ADD COLUMN IF NOT EXISTS search_tsv tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+        """
+    )
+    op.create_index(
+        'idx_recipe_search_tsv',
+        'recipes',
+        ['search_tsv'],
+        postgresql_using='gin',
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_recipe_search_tsv', table_name='recipes', if_exists=True)
+    op.drop_column('recipes', 'search_tsv')
@@ -0,0 +1,32 @@
+"""store_product_name_trigram_index
+
+Revision ID: c8d1e4f7a203
+Revises: 91f6a2b8c4d0
+Create Date: 2026-10-16 15:02:41.318207
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8d1e4f7a203'
+down_revision = '91f6a2b8c4d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Trigram GIN index lets ILIKE '%name%' product matching use an index scan
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'idx_product_name_trgm',
+        'store_products',
+        ['product_name'],
+        postgresql_using='gin',
+        postgresql_ops={'product_name': 'gin_trgm_ops'},
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_product_name_trgm', table_name='store_products', if_exists=True)
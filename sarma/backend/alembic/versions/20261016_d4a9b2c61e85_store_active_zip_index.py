@@ -0,0 +1,30 @@
+"""store_active_zip_index
+
+Revision ID: d4a9b2c61e85
+Revises: c8d1e4f7a203
+Create Date: 2026-10-16 15:31:08.904512
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a9b2c61e85'
+down_revision = 'c8d1e4f7a203'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Store lookups always filter on is_active, so index zip codes of active stores only
+    op.create_index(
+        'idx_store_active_zip',
+        'stores',
+        ['zip_code'],
+        postgresql_where=sa.text('is_active = true'),
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_store_active_zip', table_name='stores', if_exists=True)
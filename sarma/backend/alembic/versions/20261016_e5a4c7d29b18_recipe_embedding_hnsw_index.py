@@ -0,0 +1,32 @@
+"""recipe_embedding_hnsw_index
+
+Revision ID: e5a4c7d29b18
+Revises: b3d81f0c6e27
+Create Date: 2026-10-16 10:41:08.902615
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a4c7d29b18'
+down_revision = 'b3d81f0c6e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # HNSW requires pgvector >= 0.5.0
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.create_index(
+        'idx_recipe_embedding_hnsw',
+        'recipes',
+        ['embedding'],
+        postgresql_using='hnsw',
+        postgresql_ops={'embedding': 'vector_cosine_ops'},
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_recipe_embedding_hnsw', table_name='recipes', if_exists=True)
@@ -0,0 +1,48 @@
+"""recipe_embedding_halfvec
+
+Revision ID: f2b7c93e0a14
+Revises: d4a9b2c61e85
+Create Date: 2026-10-16 15:58:23.470119
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b7c93e0a14'
+down_revision = 'd4a9b2c61e85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # halfvec requires pgvector >= 0.7.0; FP16 halves the bytes HNSW reads per hop
+    op.drop_index('idx_recipe_embedding_hnsw', table_name='recipes', if_exists=True)
+    op.execute(
+        "ALTER TABLE recipes "
+        "ALTER COLUMN embedding TYPE halfvec(1536) USING embedding::halfvec(1536)"
+    )
+    op.create_index(
+        'idx_recipe_embedding_hnsw',
+        'recipes',
+        ['embedding'],
+        postgresql_using='hnsw',
+        postgresql_ops={'embedding': 'halfvec_cosine_ops'},
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_recipe_embedding_hnsw', table_name='recipes', if_exists=True)
+    op.execute(
+        "ALTER TABLE recipes "
+        "ALTER COLUMN embedding TYPE vector(1536) USING embedding::vector(1536)"
+    )
+    op.create_index(
+        'idx_recipe_embedding_hnsw',
+        'recipes',
+        ['embedding'],
+        postgresql_using='hnsw',
+        postgresql_ops={'embedding': 'vector_cosine_ops'},
+        if_not_exists=True
+    )
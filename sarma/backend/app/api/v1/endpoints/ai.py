@@ -3,9 +3,10 @@ AI Endpoints
 Meal analysis, recipe generation, and chat assistant
 """
 
-from typing import Optional, List
+import asyncio
+from typing import Annotated, Literal, Optional, List, Union
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ....core.database import get_db
@@ -73,6 +74,39 @@ class MealSuggestionRequest(BaseModel):
     use_gpt4: bool = False
 
 
+class AnalyzeMealOperation(AnalyzeMealRequest):
+    op: Literal["analyze_meal"]
+
+
+class GenerateRecipeOperation(GenerateRecipeRequest):
+    op: Literal["generate_recipe"]
+
+
+class ChatOperation(ChatRequest):
+    op: Literal["chat"]
+
+
+BatchOperation = Annotated[
+    Union[AnalyzeMealOperation, GenerateRecipeOperation, ChatOperation],
+    Field(discriminator="op")
+]
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=10)
+
+
+class BatchResult(BaseModel):
+    op: str
+    status_code: int
+    result: Optional[dict] = None
+    detail: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]
+
+
 # =====================
 # Meal Analysis Endpoints
 # =====================
@@ -409,6 +443,53 @@ async def analyze_diet(
         )
 
 
+# =====================
+# Batch Endpoint
+# =====================
+
+@router.post("/batch", response_model=BatchResponse)
+async def batch(
+    request: BatchRequest,
+    current_user: User = Depends(get_current_user),
+    meal_analyzer: MealAnalyzer = Depends(get_meal_analyzer),
+    recipe_generator: RecipeGenerator = Depends(get_recipe_generator),
+    chat_assistant: ChatAssistant = Depends(get_chat_assistant),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Run several AI operations in one request
+    
+    - **operations**: Up to 10 of `{"op": "analyze_meal" | "generate_recipe" | "chat", ...}`,
+      each carrying the same fields as the single-operation endpoint
+    
+    Operations run concurrently and authenticate once. Results come back in
+    request order; a failed operation reports its status code and detail
+    without failing the others.
+    """
+    async def run(operation) -> BatchResult:
+        params = operation.model_dump(exclude={"op"})
+        try:
+            if operation.op == "analyze_meal":
+                response = await analyze_meal(
+                    AnalyzeMealRequest(**params), current_user, meal_analyzer, db
+                )
+            elif operation.op == "generate_recipe":
+                response = await generate_recipe(
+                    GenerateRecipeRequest(**params), current_user, recipe_generator
+                )
+            else:
+                response = await chat(
+                    ChatRequest(**params), current_user, chat_assistant, db
+                )
+        except HTTPException as e:
+            return BatchResult(op=operation.op, status_code=e.status_code, detail=e.detail)
+        
+        return BatchResult(op=operation.op, status_code=200, result=response.model_dump())
+    
+    results = await asyncio.gather(*(run(operation) for operation in request.operations))
+    return BatchResponse(results=results)
+
+
 # =====================
 # Health Check
 # =====================
@@ -205,7 +205,8 @@ async def get_daily_nutrition(
     summary = await MealAnalysisService.get_daily_nutrition_summary(
         db,
         current_user.id,
-        target_date
+        target_date,
+        include_rows=True
     )
     return summary
 
@@ -227,6 +228,7 @@ async def get_nutrition_trends(
     trends = await MealAnalysisService.get_nutrition_trends(
         db,
         current_user.id,
-        days
+        days,
+        include_rows=True
     )
     return trends
@@ -36,6 +36,9 @@ async def search_recipes(
     - Nutritional constraints (calories, prep time)
     - Health condition filtering
     - Allergen exclusion
+    
+    Without a text query, pass the last result's rating_avg and id as
+    after_rating / after_id to fetch the next page.
     """
     recipes = await RecipeService.search_recipes(
         db,
@@ -6,7 +6,7 @@ from typing import List, Optional
 
 from app.core.security import get_current_user
 from app.models.user import User
-from app.services.recipe_api_service import RecipeAPIService, EdamamRecipeService
+from app.services.recipe_api_service import recipe_api_service
 
 router = APIRouter()
 
@@ -29,9 +29,7 @@ async def search_external_recipes(
     - **intolerances**: Food intolerances (gluten, dairy, egg, etc.)
     - **max_results**: Number of results to return
     """
-    recipe_service = RecipeAPIService()
-    
-    recipes = await recipe_service.search_recipes(
+    recipes = await recipe_api_service.search_recipes(
         query=query,
         cuisine=cuisine,
         diet=diet,
@@ -56,8 +54,7 @@ async def get_recipe_details(
     
     - **recipe_id**: Spoonacular recipe ID
     """
-    recipe_service = RecipeAPIService()
-    recipe = await recipe_service.get_recipe_details(recipe_id)
+    recipe = await recipe_api_service.get_recipe_details(recipe_id)
     
     if not recipe:
         return {"error": "Recipe not found"}
@@ -77,9 +74,7 @@ async def find_recipes_by_ingredients(
     - **ingredients**: List of ingredient names
     - **max_results**: Number of results to return
     """
-    recipe_service = RecipeAPIService()
-    
-    recipes = await recipe_service.get_recipes_by_ingredients(
+    recipes = await recipe_api_service.get_recipes_by_ingredients(
         ingredients=ingredients,
         max_results=max_results,
     )
@@ -103,9 +98,7 @@ async def get_similar_recipes(
     - **recipe_id**: Spoonacular recipe ID
     - **max_results**: Number of similar recipes to return
     """
-    recipe_service = RecipeAPIService()
-    
-    similar = await recipe_service.get_similar_recipes(
+    similar = await recipe_api_service.get_similar_recipes(
         recipe_id=recipe_id,
         max_results=max_results,
     )
@@ -18,6 +18,7 @@ router = APIRouter()
 async def generate_shopping_list(
     recipe_ids: List[UUID],
     servings_multiplier: dict = None,
+    store_ids: Optional[List[UUID]] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -28,14 +29,15 @@ async def generate_shopping_list(
     - Consolidates ingredients
     - Adjusts quantities for servings
     - Categorizes items
-    - Matches to store products
+    - Matches to store products (only store_ids when given)
     - Estimates costs
     """
     shopping_list = await ShoppingService.generate_shopping_list_from_recipes(
         db,
         current_user.id,
         recipe_ids,
-        servings_multiplier
+        servings_multiplier,
+        store_ids
     )
     
     if not shopping_list:
@@ -3,6 +3,8 @@ Subscription & Payment Endpoints
 Stripe integration for premium features
 """
 
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, Request, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -22,6 +24,8 @@ from ....schemas.subscription import (
 )
 from ....services.stripe_service import StripeService
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -241,7 +245,7 @@ async def stripe_webhook(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"Webhook error: {str(e)}")
+        logger.error(f"Webhook error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Webhook processing failed")
 
 
@@ -0,0 +1,224 @@
+"""
+Redis Cache
+Shared async Redis client and response caching helpers
+"""
+import hashlib
+import inspect
+import logging
+from contextlib import asynccontextmanager
+from functools import wraps
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from uuid import uuid4
+
+import orjson
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Process-wide client; redis-py pools connections internally
+redis_client = redis.from_url(settings.REDIS_URL)
+
+
+def make_cache_key(namespace: str, params: Dict[str, Any]) -> str:
+    """Build a stable key from a namespace and JSON-serializable params"""
+    digest = hashlib.blake2b(
+        orjson.dumps(params, default=str, option=orjson.OPT_SORT_KEYS),
+        digest_size=16
+    ).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+async def cache_get(key: str) -> Optional[Any]:
+    """Return the cached value for key, or None on miss or Redis error"""
+    try:
+        raw = await redis_client.get(key)
+    except redis.RedisError as e:
+        logger.warning(f"Cache read failed for {key}: {e}")
+        return None
+    
+    if raw is None:
+        return None
+    return orjson.loads(raw)
+
+
+async def cache_set(key: str, value: Any, ttl: int) -> None:
+    """Store value under key for ttl seconds; Redis errors are logged and ignored"""
+    try:
+        await redis_client.setex(key, ttl, orjson.dumps(value))
+    except redis.RedisError as e:
+        logger.warning(f"Cache write failed for {key}: {e}")
+
+
+async def cache_get_many(keys: List[str]) -> List[Optional[Any]]:
+    """Return cached values for keys in order (None per miss); Redis errors read as misses"""
+    if not keys:
+        return []
+    try:
+        raws = await redis_client.mget(keys)
+    except redis.RedisError as e:
+        logger.warning(f"Cache read failed for {len(keys)} keys: {e}")
+        return [None] * len(keys)
+    
+    return [orjson.loads(raw) if raw is not None else None for raw in raws]
+
+
+async def cache_set_many(values: Dict[str, Any], ttl: int) -> None:
+    """Store several keys for ttl seconds in one round trip; Redis errors are ignored"""
+    if not values:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.setex(key, ttl, orjson.dumps(value))
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Cache write failed for {len(values)} keys: {e}")
+
+
+async def cache_hget(key: str, field: str) -> Optional[Any]:
+    """Return a cached hash field, or None on miss or Redis error"""
+    try:
+        raw = await redis_client.hget(key, field)
+    except redis.RedisError as e:
+        logger.warning(f"Cache read failed for {key}: {e}")
+        return None
+    
+    if raw is None:
+        return None
+    return orjson.loads(raw)
+
+
+async def cache_hset(key: str, field: str, value: Any, ttl: int) -> None:
+    """Store a hash field and (re)arm the hash TTL; Redis errors are ignored"""
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, field, orjson.dumps(value))
+            pipe.expire(key, ttl)
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Cache write failed for {key}: {e}")
+
+
+async def cache_delete(*keys: str) -> None:
+    """Invalidate keys; Redis errors are logged and ignored"""
+    try:
+        await redis_client.delete(*keys)
+    except redis.RedisError as e:
+        logger.warning(f"Cache invalidation failed for {keys}: {e}")
+
+
+def cached(namespace: str, ttl: int) -> Callable:
+    """
+    Cache an async method's result in Redis
+    
+    The key is derived from the call arguments (excluding self), with
+    defaults applied so positional and keyword calls share entries.
+    Empty results are not cached, so transient upstream failures that
+    return [] or None are retried on the next call.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            params.pop("self", None)
+            
+            key = make_cache_key(namespace, params)
+            hit = await cache_get(key)
+            if hit is not None:
+                return hit
+            
+            result = await func(*args, **kwargs)
+            if result:
+                await cache_set(key, result, ttl)
+            return result
+        
+        return wrapper
+    
+    return decorator
+
+
+async def incr_counter(key: str, field: str, amount: int = 1) -> bool:
+    """Add amount to a hash counter field; returns False if Redis is unavailable"""
+    try:
+        await redis_client.hincrby(key, field, amount)
+    except redis.RedisError as e:
+        logger.warning(f"Counter increment failed for {key}: {e}")
+        return False
+    return True
+
+
+@asynccontextmanager
+async def drain_counters(key: str) -> AsyncIterator[Dict[str, int]]:
+    """
+    Take all fields of a hash counter for the duration of the block
+    
+    The hash is renamed to a key unique to this drain before reading, so
+    increments that arrive meanwhile land in a fresh hash, and concurrent
+    drains from other workers can't overwrite each other. The taken hash
+    is deleted only when the block exits cleanly; if it raises, the deltas
+    are added back onto the live hash for the next drain.
+    
+    Usage:
+        async with drain_counters(key) as deltas:
+            ...apply deltas...
+            await db.commit()
+    """
+    draining_key = f"{key}:draining:{uuid4().hex}"
+    try:
+        await redis_client.rename(key, draining_key)
+    except redis.ResponseError:
+        # Nothing counted since the last drain
+        yield {}
+        return
+    except redis.RedisError as e:
+        logger.warning(f"Counter drain failed for {key}: {e}")
+        yield {}
+        return
+    
+    try:
+        raw = await redis_client.hgetall(draining_key)
+    except redis.RedisError as e:
+        # The taken hash is left in place rather than risk losing it
+        logger.warning(f"Counter drain failed for {key}, deltas kept in {draining_key}: {e}")
+        yield {}
+        return
+    
+    counters = {}
+    for field, value in raw.items():
+        amount = int(value)
+        if amount:
+            counters[field.decode()] = amount
+    
+    try:
+        yield counters
+    except BaseException:
+        await _restore_counters(key, draining_key, counters)
+        raise
+    
+    try:
+        await redis_client.delete(draining_key)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to delete drained counters {draining_key}: {e}")
+
+
+async def _restore_counters(key: str, draining_key: str, counters: Dict[str, int]) -> None:
+    """Add drained deltas back onto the live hash and drop the taken one, atomically"""
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            for field, amount in counters.items():
+                pipe.hincrby(key, field, amount)
+            pipe.delete(draining_key)
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.error(f"Counter restore failed for {key}, deltas kept in {draining_key}: {e}")
+
+
+async def close_cache():
+    """Close Redis connections"""
+    await redis_client.aclose()
@@ -4,10 +4,23 @@ AsyncPG + SQLAlchemy 2.0 + pgvector
 """
 
 from typing import AsyncGenerator
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
 
+# Postgres session settings applied to every pooled connection
+_server_settings = {}
+_execution_options = {}
+if settings.DATABASE_SCHEMA:
+    # Raw SQL resolves in DATABASE_SCHEMA first; extension types stay in public
+    _server_settings["search_path"] = f"{settings.DATABASE_SCHEMA},public"
+    # ORM tables and create_all are qualified with the schema explicitly, since
+    # search_path visibility would let same-named tables in public stand in
+    _execution_options["schema_translate_map"] = {None: settings.DATABASE_SCHEMA}
+if settings.DATABASE_SYNCHRONOUS_COMMIT:
+    _server_settings["synchronous_commit"] = settings.DATABASE_SYNCHRONOUS_COMMIT
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
@@ -15,6 +28,8 @@ engine = create_async_engine(
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
     pool_pre_ping=True,  # Verify connections before using
+    connect_args={"server_settings": _server_settings} if _server_settings else {},
+    execution_options=_execution_options,
 )
 
 # Create session factory
@@ -57,6 +72,15 @@ async def init_db():
         # NOTE: keep this as a single import to ensure every model package is loaded
         from app import models  # noqa: F401
 
+        # Models use halfvec columns and gin_trgm_ops indexes; migrations create these
+        # extensions, but create_all on a fresh database or worker schema needs them too.
+        # Pinned to public so a per-worker search_path doesn't capture them.
+        for extension in ("vector", "pg_trgm"):
+            await conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension} WITH SCHEMA public"))
+
+        if settings.DATABASE_SCHEMA:
+            await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{settings.DATABASE_SCHEMA}"'))
+
         # Create all tables (consider moving to Alembic for production migrations)
         await conn.run_sync(Base.metadata.create_all)
 
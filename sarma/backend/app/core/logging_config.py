@@ -0,0 +1,33 @@
+"""
+Logging Configuration
+Routes log records through a queue so handler I/O runs off the event loop
+"""
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def setup_logging(level: str) -> QueueListener:
+    """
+    Install a QueueHandler on the root logger and start its listener
+    
+    Loggers only enqueue records; the listener thread formats them and
+    writes to stderr, so a slow log sink never blocks a request. The
+    caller stops the returned listener on shutdown to flush the queue.
+    """
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -2,12 +2,24 @@
 OpenAI API Integration
 """
 import os
+import io
+import asyncio
+import logging
 from typing import List, Dict, Optional
+import orjson
 import openai
 from openai import AsyncOpenAI
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Bulk embedding runs as concurrent requests of this many inputs (the API
+# accepts up to 2048), at most EMBEDDING_MAX_CONCURRENCY in flight over the
+# shared client's connection pool
+EMBEDDING_REQUEST_CHUNK = 256
+EMBEDDING_MAX_CONCURRENCY = 8
+
 
 class OpenAIClient:
     """Wrapper for OpenAI API calls"""
@@ -38,10 +50,107 @@ class OpenAIClient:
             return response.data[0].embedding
         
         except Exception as e:
-            print(f"Error generating embedding: {e}")
+            logger.warning(f"Error generating embedding: {e}")
             # Return zero vector as fallback
             return [0.0] * dimensions
     
+    async def generate_embeddings(
+        self,
+        texts: List[str],
+        dimensions: int = 1536
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for many texts in concurrent chunked requests
+        
+        Texts are sent EMBEDDING_REQUEST_CHUNK per request with up to
+        EMBEDDING_MAX_CONCURRENCY requests in flight. Results are in input
+        order; a failed request yields zero vectors for its inputs,
+        matching generate_embedding.
+        """
+        semaphore = asyncio.Semaphore(EMBEDDING_MAX_CONCURRENCY)
+        
+        async def embed_chunk(chunk: List[str]) -> List[List[float]]:
+            async with semaphore:
+                try:
+                    response = await self.client.embeddings.create(
+                        model=self.embedding_model,
+                        input=chunk,
+                        dimensions=dimensions
+                    )
+                except Exception as e:
+                    logger.warning(f"Error generating embeddings: {e}")
+                    return [[0.0] * dimensions for _ in chunk]
+            
+            ordered = sorted(response.data, key=lambda item: item.index)
+            return [item.embedding for item in ordered]
+        
+        results = await asyncio.gather(*(
+            embed_chunk(texts[start:start + EMBEDDING_REQUEST_CHUNK])
+            for start in range(0, len(texts), EMBEDDING_REQUEST_CHUNK)
+        ))
+        return [embedding for chunk in results for embedding in chunk]
+    
+    async def submit_embedding_batch(
+        self,
+        texts: Dict[str, str],
+        dimensions: int = 1536
+    ) -> str:
+        """
+        Submit embeddings through the Batch API (half price, 24h window)
+        
+        texts maps a caller-chosen custom_id to the text to embed.
+        Returns the batch id to poll with get_embedding_batch.
+        """
+        lines = io.BytesIO()
+        for custom_id, text in texts.items():
+            lines.write(orjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/embeddings",
+                "body": {
+                    "model": self.embedding_model,
+                    "input": text,
+                    "dimensions": dimensions
+                }
+            }))
+            lines.write(b"\n")
+        
+        input_file = await self.client.files.create(
+            file=("embeddings.jsonl", lines.getvalue()),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/embeddings",
+            completion_window="24h"
+        )
+        return batch.id
+    
+    async def get_embedding_batch(self, batch_id: str) -> Dict:
+        """
+        Status of an embedding batch, with results once it has completed
+        
+        Returns {"status": ..., "embeddings": {custom_id: vector}}; embeddings
+        is empty until the status is "completed". Failed lines are skipped.
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status != "completed" or not batch.output_file_id:
+            return {"status": batch.status, "embeddings": {}}
+        
+        content = await self.client.files.content(batch.output_file_id)
+        embeddings = {}
+        for line in content.content.splitlines():
+            if not line:
+                continue
+            result = orjson.loads(line)
+            response = result.get("response") or {}
+            if response.get("status_code") != 200:
+                logger.warning(f"Embedding batch line {result.get('custom_id')} failed: {result.get('error')}")
+                continue
+            embeddings[result["custom_id"]] = response["body"]["data"][0]["embedding"]
+        
+        return {"status": batch.status, "embeddings": embeddings}
+    
     async def chat_completion(
         self,
         messages: List[Dict],
@@ -77,7 +186,7 @@ class OpenAIClient:
             }
         
         except Exception as e:
-            print(f"Error in chat completion: {e}")
+            logger.warning(f"Error in chat completion: {e}")
             return {
                 "content": "I apologize, but I'm having trouble processing your request right now. Please try again.",
                 "tokens_used": 0,
@@ -154,7 +263,7 @@ Format your response as JSON with these keys:
             return result
         
         except Exception as e:
-            print(f"Error analyzing meal image: {e}")
+            logger.warning(f"Error analyzing meal image: {e}")
             return {
                 "description": "Error analyzing image",
                 "confidence": 0.0,
@@ -220,7 +329,7 @@ Format as JSON array of objects with: category, priority, title, description, ac
             return recommendations
         
         except Exception as e:
-            print(f"Error generating recommendations: {e}")
+            logger.warning(f"Error generating recommendations: {e}")
             return []
 
 
@@ -16,7 +16,7 @@ from app.core.database import get_db
 from app.models.user import User
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 # JWT Bearer token scheme
 security = HTTPBearer()
@@ -7,20 +7,46 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import time
 import logging
 
 from app.core.config import settings
-from app.core.database import init_db, close_db
+from app.core.database import init_db, close_db, AsyncSessionLocal
+from app.core.cache import close_cache
+from app.core.logging_config import setup_logging
 from app.api.v1.api import api_router
-
-# Configure logging
-logging.basicConfig(
-    level=settings.LOG_LEVEL,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from app.services.recipe_api_service import (
+    recipe_api_service,
+    edamam_recipe_service,
+    RecipeAPIError
 )
+from app.services.recipe_service import RecipeService
+from app.services.vector_service import VectorSearchService
+
+# Configure logging; records are written by a background listener thread
+log_listener = setup_logging(settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+# Seconds between flushes of Redis engagement counters to Postgres
+COUNTER_FLUSH_INTERVAL = 60
+
+
+async def flush_counters_periodically():
+    """Background loop applying Redis view/favorite counters and pruning the RAG cache"""
+    while True:
+        await asyncio.sleep(COUNTER_FLUSH_INTERVAL)
+        try:
+            async with AsyncSessionLocal() as session:
+                await RecipeService.flush_engagement_counters(session)
+        except Exception as e:
+            logger.error(f"Counter flush failed: {e}", exc_info=True)
+        try:
+            async with AsyncSessionLocal() as session:
+                await VectorSearchService.prune_rag_cache(session)
+        except Exception as e:
+            logger.error(f"RAG cache prune failed: {e}", exc_info=True)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -36,12 +62,31 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("✅ Database initialized")
     
+    counter_flush_task = asyncio.create_task(flush_counters_periodically())
+    
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down Forecast Health API...")
+    counter_flush_task.cancel()
+    try:
+        async with AsyncSessionLocal() as session:
+            await RecipeService.flush_engagement_counters(session)
+    except Exception as e:
+        logger.error(f"Final counter flush failed: {e}", exc_info=True)
+    
     await close_db()
     logger.info("✅ Database connections closed")
+    
+    await recipe_api_service.aclose()
+    await edamam_recipe_service.aclose()
+    logger.info("✅ Recipe API connections closed")
+    
+    await close_cache()
+    logger.info("✅ Redis connections closed")
+    
+    # Drain queued log records before the process exits
+    log_listener.stop()
 
 
 # Create FastAPI app
@@ -89,6 +134,21 @@ async def log_requests(request: Request, call_next):
     return response
 
 
+# Upstream recipe API rejected the request (bad key, quota, invalid params)
+@app.exception_handler(RecipeAPIError)
+async def recipe_api_exception_handler(request: Request, exc: RecipeAPIError):
+    """Report non-retryable recipe provider errors as a bad gateway"""
+    logger.warning(f"Recipe API error: {exc} (upstream status {exc.status_code})")
+    
+    return JSONResponse(
+        status_code=502,
+        content={
+            "error": "recipe_provider_error",
+            "message": str(exc)
+        }
+    )
+
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
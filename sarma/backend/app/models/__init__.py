@@ -18,7 +18,8 @@ from app.models.recipe import (
     RecipeTag,
     RecipeRating,
     RecipeFavorite,
-    RecipeCollection
+    RecipeCollection,
+    RagQueryCache
 )
 from app.models.meal import (
     MealPhoto,
@@ -84,6 +85,7 @@ __all__ = [
     "RecipeRating",
     "RecipeFavorite",
     "RecipeCollection",
+    "RagQueryCache",
     
     # Meal models
     "MealPhoto",
@@ -6,7 +6,7 @@ from typing import Optional, List, Dict
 from uuid import UUID, uuid4
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime, Date,
-    ForeignKey, Text, JSON, Index, CheckConstraint, Enum as SQLEnum
+    ForeignKey, Text, JSON, Index, CheckConstraint, Enum as SQLEnum, text
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
@@ -95,7 +95,7 @@ class HealthAssessment(Base):
     user = relationship("User", back_populates="health_assessments")
     
     __table_args__ = (
-        Index('idx_assessment_user_date', 'user_id', 'assessment_date'),
+        Index('idx_assessment_user_date', 'user_id', text('assessment_date DESC')),
         Index('idx_assessment_status', 'status'),
         CheckConstraint('weight_lbs > 0', name='check_weight'),
         CheckConstraint('height_inches > 0', name='check_height'),
@@ -6,7 +6,7 @@ from typing import Optional, List, Dict
 from uuid import UUID, uuid4
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime,
-    ForeignKey, Text, JSON, Index, CheckConstraint, Enum as SQLEnum
+    ForeignKey, Text, JSON, Index, CheckConstraint, Enum as SQLEnum, text
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
@@ -94,7 +94,7 @@ class MealPhoto(Base):
     nutrition = relationship("MealPhotoNutrition", back_populates="meal_photo", uselist=False, cascade="all, delete-orphan")
     
     __table_args__ = (
-        Index('idx_meal_photo_user_date', 'user_id', 'eaten_at'),
+        Index('idx_meal_photo_user_date', 'user_id', text('eaten_at DESC')),
         Index('idx_meal_photo_status', 'processing_status'),
         CheckConstraint('ai_confidence >= 0 AND ai_confidence <= 1', name='check_confidence'),
     )
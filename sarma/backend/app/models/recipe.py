@@ -6,11 +6,11 @@ from typing import Optional, List
 from uuid import UUID, uuid4
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime,
-    ForeignKey, Text, JSON, Index, CheckConstraint, Enum as SQLEnum
+    ForeignKey, Text, JSON, Index, CheckConstraint, Computed, Enum as SQLEnum, text
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID, ARRAY, JSONB
-from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, ARRAY, JSONB, TSVECTOR
+from pgvector.sqlalchemy import HALFVEC
 import enum
 
 from app.core.database import Base
@@ -73,8 +73,24 @@ class Recipe(Base):
     glycemic_load: Mapped[Optional[float]] = mapped_column(Float)
     inflammation_score: Mapped[Optional[float]] = mapped_column(Float)  # lower is better
     
-    # Vector embedding for semantic search
-    embedding: Mapped[Optional[List[float]]] = mapped_column(Vector(1536))
+    # Vector embedding for semantic search, stored half precision (FP16)
+    # L2-normalized at write time so <#> (inner product) ranks by cosine
+    embedding: Mapped[Optional[List[float]]] = mapped_column(HALFVEC(1536))
+    # SHA-256 of the text the embedding was generated from
+    embedding_hash: Mapped[Optional[str]] = mapped_column(String(64))
+    # Denormalized text the embedding is generated from; kept current by the
+    # session listener in app.services.vector_service
+    embedding_text: Mapped[Optional[str]] = mapped_column(Text)
+    
+    # Weighted full-text document (title > description), maintained by Postgres
+    search_tsv: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True
+        )
+    )
     
     # Creator and source
     created_by_user_id: Mapped[Optional[UUID]] = mapped_column(
@@ -118,6 +134,23 @@ class Recipe(Base):
         Index('idx_recipe_health_score', 'health_score'),
         Index('idx_recipe_calories', 'calories'),
         Index('idx_recipe_created_at', 'created_at'),
+        Index('idx_recipe_search_tsv', 'search_tsv', postgresql_using='gin'),
+        Index(
+            'idx_recipe_active_rating',
+            text('rating_avg DESC'),
+            postgresql_where=text('is_active = true')
+        ),
+        Index(
+            'idx_recipe_active_health',
+            text('health_score DESC'),
+            postgresql_where=text('is_active = true')
+        ),
+        Index(
+            'idx_recipe_embedding_hnsw',
+            'embedding',
+            postgresql_using='hnsw',
+            postgresql_ops={'embedding': 'halfvec_ip_ops'}
+        ),
         CheckConstraint('servings > 0', name='check_recipe_servings'),
         CheckConstraint('calories >= 0', name='check_recipe_calories'),
         CheckConstraint('health_score >= 0 AND health_score <= 100', name='check_health_score'),
@@ -377,3 +410,35 @@ class RecipeCollection(Base):
     __table_args__ = (
         Index('idx_collection_user', 'user_id'),
     )
+
+
+class RagQueryCache(Base):
+    """Semantic cache of RAG search results, looked up by query embedding similarity"""
+    __tablename__ = "rag_query_cache"
+
+    id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4)
+    embedding: Mapped[List[float]] = mapped_column(HALFVEC(1536), nullable=False)
+    
+    # Hash of the user context (filters) the result was computed for
+    user_context_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    
+    # sha256 of the query text; a repeated query refreshes its row instead of adding one
+    query_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    
+    # {"recipe_ids": [...], "total_found": n, "filters_applied": {...}}
+    response: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_rag_cache_context', 'user_context_hash'),
+        Index('idx_rag_cache_context_query', 'user_context_hash', 'query_hash', unique=True),
+        # Expired rows are pruned by age
+        Index('idx_rag_cache_created', 'created_at'),
+        Index(
+            'idx_rag_cache_embedding_hnsw',
+            'embedding',
+            postgresql_using='hnsw',
+            postgresql_ops={'embedding': 'halfvec_ip_ops'}
+        ),
+    )
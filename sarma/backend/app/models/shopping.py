@@ -7,7 +7,7 @@ from uuid import UUID, uuid4
 from decimal import Decimal
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime, Numeric,
-    ForeignKey, Text, JSON, Index, CheckConstraint, Enum as SQLEnum
+    ForeignKey, Text, JSON, Index, CheckConstraint, Enum as SQLEnum, text
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
@@ -288,6 +288,11 @@ class Store(Base):
     __table_args__ = (
         Index('idx_store_type', 'store_type'),
         Index('idx_store_location', 'zip_code'),
+        Index(
+            'idx_store_active_zip',
+            'zip_code',
+            postgresql_where=text('is_active = true')
+        ),
     )
 
 
@@ -344,6 +349,12 @@ class StoreProduct(Base):
     
     __table_args__ = (
         Index('idx_product_store_name', 'store_id', 'product_name'),
+        Index(
+            'idx_product_name_trgm',
+            'product_name',
+            postgresql_using='gin',
+            postgresql_ops={'product_name': 'gin_trgm_ops'}
+        ),
         Index('idx_product_category', 'category'),
         Index('idx_product_upc', 'upc'),
         CheckConstraint('price >= 0', name='check_product_price'),
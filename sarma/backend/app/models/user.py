@@ -127,7 +127,7 @@ class UserHealthProfile(Base):
     def bmi(self):
         if self.height_cm and self.weight_kg:
             height_m = self.height_cm / 100
-            return round(self.weight_kg / (height_m ** 2), 1)
+            return round(self.weight_kg / (height_m * height_m), 1)
         return None
     
     def __repr__(self):
@@ -104,6 +104,9 @@ class RecipeSearchRequest(BaseModel):
     min_health_score: Optional[float] = Field(None, ge=0, le=100)
     page: int = Field(1, ge=1)
     page_size: int = Field(20, ge=1, le=100)
+    # Keyset cursor: rating_avg and id of the last recipe on the previous page
+    after_rating: Optional[float] = None
+    after_id: Optional[UUID] = None
     
     class Config:
         json_schema_extra = {
@@ -20,7 +20,7 @@ class GeminiService(BaseAIService):
     OUTPUT_COST_PER_1M = 0.30  # $0.30 per 1M output tokens
     IMAGE_COST_PER_1K = 0.0025  # $0.0025 per 1K images
     
-    def __init__(self, api_key: str, model: str = "gemini-2.0-flash-exp"):
+    def __init__(self, api_key: str, model: str = "gemini-2.0-flash-exp", transport: Optional[str] = None):
         config = AIConfig(
             provider=AIProvider.GEMINI_FLASH,
             model=model,
@@ -30,8 +30,8 @@ class GeminiService(BaseAIService):
         )
         super().__init__(config)
         
-        # Configure Gemini
-        genai.configure(api_key=api_key)
+        # Configure Gemini (transport None keeps the SDK default, gRPC)
+        genai.configure(api_key=api_key, transport=transport)
         self.model = genai.GenerativeModel(model)
         
     async def analyze_image(
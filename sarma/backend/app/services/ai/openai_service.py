@@ -5,6 +5,7 @@ High-quality vision and text generation
 
 import time
 from typing import List, Dict, Optional
+import httpx
 from openai import AsyncOpenAI
 
 from .base import BaseAIService, AIProvider, AIConfig, AIResponse
@@ -18,7 +19,7 @@ class OpenAIVisionService(BaseAIService):
     OUTPUT_COST_PER_1M = 15.00  # $15.00 per 1M output tokens
     IMAGE_COST_BASE = 0.01275  # $0.01275 per image (1024x1024)
     
-    def __init__(self, api_key: str, model: str = "gpt-4o"):
+    def __init__(self, api_key: str, model: str = "gpt-4o", http_client: Optional[httpx.AsyncClient] = None):
         config = AIConfig(
             provider=AIProvider.GPT4_VISION,
             model=model,
@@ -28,8 +29,8 @@ class OpenAIVisionService(BaseAIService):
         )
         super().__init__(config)
         
-        # Initialize OpenAI client
-        self.client = AsyncOpenAI(api_key=api_key)
+        # Initialize OpenAI client (http_client lets callers share a connection pool)
+        self.client = AsyncOpenAI(api_key=api_key, http_client=http_client)
         
     async def analyze_image(
         self, 
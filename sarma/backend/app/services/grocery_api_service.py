@@ -2,10 +2,13 @@
 Australian Grocery Store API Integration
 Integrates with Woolworths and Coles APIs for product search and pricing
 """
+import logging
 import httpx
 from typing import List, Dict, Optional
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 class WoolworthsAPIService:
     """Service for interacting with Woolworths API"""
@@ -64,7 +67,7 @@ class WoolworthsAPIService:
                 return self._get_mock_woolworths_products(query, max_results)
                 
             except httpx.HTTPError as e:
-                print(f"Error fetching Woolworths products: {e}")
+                logger.warning(f"Error fetching Woolworths products: {e}")
                 return self._get_mock_woolworths_products(query, max_results)
     
     async def get_product_details(self, product_id: str) -> Optional[Dict]:
@@ -177,7 +180,7 @@ class ColesAPIService:
                 return self._get_mock_coles_products(query, max_results)
                 
             except httpx.HTTPError as e:
-                print(f"Error fetching Coles products: {e}")
+                logger.warning(f"Error fetching Coles products: {e}")
                 return self._get_mock_coles_products(query, max_results)
     
     async def get_product_details(self, product_id: str) -> Optional[Dict]:
@@ -1,7 +1,10 @@
 """
 Health Assessment Business Logic Service
 """
-from typing import List, Dict, Optional
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Dict, Optional, Tuple, Set, FrozenSet, NamedTuple
 from uuid import UUID
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -21,6 +24,42 @@ from app.schemas.health import (
 )
 
 
+# Condition keywords grouped by category; one case-insensitive pass per condition
+CONDITION_RE = re.compile(
+    r"(?P<diabetes>diabetes)"
+    r"|(?P<htn>hypertension|blood pressure)"
+    r"|(?P<kidney>kidney)"
+    r"|(?P<celiac>celiac)",
+    re.IGNORECASE
+)
+
+# Recommendation templates; read-only so the shared instances cannot drift
+_DIABETES_REC = MappingProxyType({
+    "category": "nutrition",
+    "priority": "high",
+    "title": "Focus on Low Glycemic Foods",
+    "description": "Choose foods with low glycemic index to manage blood sugar",
+    "action_items": (
+        "Replace white rice with quinoa or brown rice",
+        "Choose whole grain bread over white bread",
+        "Add more non-starchy vegetables to meals"
+    )
+})
+
+_CARDIO_REC = MappingProxyType({
+    "category": "nutrition",
+    "priority": "high",
+    "title": "Heart-Healthy Diet",
+    "description": "Adopt Mediterranean-style eating patterns",
+    "action_items": (
+        "Increase omega-3 rich fish (salmon, mackerel)",
+        "Use olive oil as primary cooking fat",
+        "Reduce sodium intake to <2300mg daily",
+        "Limit saturated fat to <10% of calories"
+    )
+})
+
+
 class HealthAssessmentService:
     """Service for health assessment and risk analysis"""
     
@@ -35,8 +74,9 @@ class HealthAssessmentService:
         """
         # Calculate BMI
         bmi = None
-        if assessment_data.weight_lbs and assessment_data.height_inches:
-            bmi = (assessment_data.weight_lbs * 703) / (assessment_data.height_inches ** 2)
+        height = assessment_data.height_inches
+        if assessment_data.weight_lbs and height:
+            bmi = (assessment_data.weight_lbs * 703.0) / (height * height)
         
         # Create assessment
         assessment = HealthAssessment(
@@ -60,27 +100,32 @@ class HealthAssessmentService:
             blood_pressure_diastolic=assessment_data.blood_pressure_diastolic
         )
         
+        # Classify conditions once; every helper below reads the same set
+        condition_groups = _classify_conditions(assessment_data.current_conditions)
+        
         # AI Risk Analysis (placeholder for GPT-4 integration)
-        assessment.risk_scores = await HealthAssessmentService._calculate_risk_scores(
-            assessment_data
+        assessment.risk_scores = HealthAssessmentService._calculate_risk_scores(
+            assessment_data,
+            condition_groups
         )
         
         # Generate personalized recommendations
-        assessment.personalized_recommendations = await HealthAssessmentService._generate_recommendations(
+        assessment.personalized_recommendations = HealthAssessmentService._generate_recommendations(
             assessment_data,
             assessment.risk_scores
         )
         
         # Set dietary restrictions based on conditions
-        assessment.dietary_restrictions = await HealthAssessmentService._determine_dietary_restrictions(
-            assessment_data.current_conditions,
+        assessment.dietary_restrictions = HealthAssessmentService._determine_dietary_restrictions(
+            condition_groups,
             assessment_data.allergies
         )
         
         # Calculate nutritional targets
-        targets = await HealthAssessmentService._calculate_nutrition_targets(
+        targets = HealthAssessmentService._calculate_nutrition_targets(
             assessment_data,
-            bmi
+            bmi,
+            condition_groups
         )
         assessment.target_calories_daily = targets["calories"]
         assessment.target_protein_g = targets["protein"]
@@ -91,12 +136,14 @@ class HealthAssessmentService:
         
         db.add(assessment)
         db.commit()
-        db.refresh(assessment)
         
         return assessment
     
     @staticmethod
-    async def _calculate_risk_scores(data: HealthAssessmentCreate) -> Dict:
+    def _calculate_risk_scores(
+        data: HealthAssessmentCreate,
+        condition_groups: FrozenSet[str]
+    ) -> Dict:
         """
         Calculate disease risk scores using medical algorithms
         
@@ -114,13 +161,11 @@ class HealthAssessmentService:
                 risk_scores["diabetes"] = "low"
         
         # Cardiovascular risk (simplified Framingham)
-        cv_risk = 0
-        if data.blood_pressure_systolic and data.blood_pressure_systolic >= 140:
-            cv_risk += 2
-        if data.total_cholesterol_mg_dl and data.total_cholesterol_mg_dl >= 240:
-            cv_risk += 2
-        if "diabetes" in (data.current_conditions or []):
-            cv_risk += 3
+        cv_risk = _cardiovascular_risk_points(
+            float(data.blood_pressure_systolic or 0),
+            float(data.total_cholesterol_mg_dl or 0),
+            "diabetes" in condition_groups
+        )
         
         if cv_risk >= 5:
             risk_scores["cardiovascular"] = "high"
@@ -132,7 +177,7 @@ class HealthAssessmentService:
         return risk_scores
     
     @staticmethod
-    async def _generate_recommendations(
+    def _generate_recommendations(
         data: HealthAssessmentCreate,
         risk_scores: Dict
     ) -> List[Dict]:
@@ -143,70 +188,30 @@ class HealthAssessmentService:
         """
         recommendations = []
         
+        # Shallow copies: the JSONB column serializer needs real dicts
         # Diabetes recommendations
-        if risk_scores.get("diabetes") in ["high", "medium"]:
-            recommendations.append({
-                "category": "nutrition",
-                "priority": "high",
-                "title": "Focus on Low Glycemic Foods",
-                "description": "Choose foods with low glycemic index to manage blood sugar",
-                "action_items": [
-                    "Replace white rice with quinoa or brown rice",
-                    "Choose whole grain bread over white bread",
-                    "Add more non-starchy vegetables to meals"
-                ]
-            })
+        if risk_scores.get("diabetes") in ("high", "medium"):
+            recommendations.append(dict(_DIABETES_REC))
         
         # Cardiovascular recommendations
-        if risk_scores.get("cardiovascular") in ["high", "medium"]:
-            recommendations.append({
-                "category": "nutrition",
-                "priority": "high",
-                "title": "Heart-Healthy Diet",
-                "description": "Adopt Mediterranean-style eating patterns",
-                "action_items": [
-                    "Increase omega-3 rich fish (salmon, mackerel)",
-                    "Use olive oil as primary cooking fat",
-                    "Reduce sodium intake to <2300mg daily",
-                    "Limit saturated fat to <10% of calories"
-                ]
-            })
+        if risk_scores.get("cardiovascular") in ("high", "medium"):
+            recommendations.append(dict(_CARDIO_REC))
         
         return recommendations
     
     @staticmethod
-    async def _determine_dietary_restrictions(
-        conditions: Optional[List[str]],
+    def _determine_dietary_restrictions(
+        condition_groups: FrozenSet[str],
         allergies: Optional[List[str]]
     ) -> List[str]:
-        """Determine dietary restrictions based on health conditions"""
-        restrictions = []
-        
-        if conditions:
-            conditions_lower = [c.lower() for c in conditions]
-            
-            if any("diabetes" in c for c in conditions_lower):
-                restrictions.extend(["low_sugar", "low_glycemic"])
-            
-            if any("hypertension" in c or "blood pressure" in c for c in conditions_lower):
-                restrictions.append("low_sodium")
-            
-            if any("kidney" in c for c in conditions_lower):
-                restrictions.extend(["low_sodium", "low_potassium"])
-            
-            if any("celiac" in c for c in conditions_lower):
-                restrictions.append("gluten_free")
-        
-        if allergies:
-            for allergy in allergies:
-                restrictions.append(f"no_{allergy.lower()}")
-        
-        return list(set(restrictions))
+        """Determine dietary restrictions based on classified health conditions"""
+        return list(_dietary_restrictions(condition_groups, tuple(allergies or ())))
     
     @staticmethod
-    async def _calculate_nutrition_targets(
+    def _calculate_nutrition_targets(
         data: HealthAssessmentCreate,
-        bmi: Optional[float]
+        bmi: Optional[float],
+        condition_groups: FrozenSet[str]
     ) -> Dict:
         """
         Calculate personalized nutrition targets
@@ -216,37 +221,15 @@ class HealthAssessmentService:
         - Health conditions
         - Activity level (default: moderate)
         """
-        # Base calorie calculation (Harris-Benedict equation simplified)
-        # TODO: Get gender and age from user profile
-        base_calories = 2000  # Default
-        
-        if data.weight_lbs:
-            # Simplified calculation: 12-15 cal/lb depending on goals
-            base_calories = int(data.weight_lbs * 13)
-        
-        # Adjust for health conditions
-        if data.current_conditions:
-            if any("diabetes" in c.lower() for c in data.current_conditions):
-                # Moderate calorie restriction for diabetes
-                base_calories = int(base_calories * 0.9)
-        
-        # Macronutrient distribution
-        # Default: 30% protein, 40% carbs, 30% fat
-        protein_pct = 0.30
-        carbs_pct = 0.40
-        fat_pct = 0.30
-        
-        # Adjust for diabetes (lower carbs)
-        if data.current_conditions and any("diabetes" in c.lower() for c in data.current_conditions):
-            protein_pct = 0.30
-            carbs_pct = 0.35
-            fat_pct = 0.35
+        targets = _nutrition_targets_kernel(
+            float(data.weight_lbs or 0), "diabetes" in condition_groups
+        )
         
         return {
-            "calories": base_calories,
-            "protein": int((base_calories * protein_pct) / 4),  # 4 cal/g
-            "carbs": int((base_calories * carbs_pct) / 4),
-            "fat": int((base_calories * fat_pct) / 9),  # 9 cal/g
+            "calories": targets.calories,
+            "protein": targets.protein_g,
+            "carbs": targets.carbs_g,
+            "fat": targets.fat_g,
             "sodium": 2300,  # mg (AHA recommendation)
             "sugar": 50  # g (AHA recommendation: < 10% of calories)
         }
@@ -281,6 +264,109 @@ class HealthAssessmentService:
         
         db.add(metric)
         db.commit()
-        db.refresh(metric)
         
         return metric
+
+
+def _classify_conditions(conditions: Optional[List[str]]) -> FrozenSet[str]:
+    """
+    Map free-text conditions to keyword groups (diabetes, htn, kidney, celiac)
+    
+    Matches are substring and case-insensitive, so "Type 2 Diabetes" and
+    "prediabetes" both land in the diabetes group.
+    """
+    groups: Set[str] = set()
+    for condition in conditions or ():
+        for match in CONDITION_RE.finditer(condition):
+            groups.add(match.lastgroup)
+    return frozenset(groups)
+
+
+@lru_cache(maxsize=256)
+def _dietary_restrictions(
+    condition_groups: FrozenSet[str],
+    allergies: Tuple[str, ...]
+) -> Tuple[str, ...]:
+    """
+    Ordered, de-duplicated restrictions for a condition/allergy combination
+    
+    Arguments are hashable so repeated profiles hit the cache.
+    """
+    restrictions = []
+    
+    if "diabetes" in condition_groups:
+        restrictions.extend(["low_sugar", "low_glycemic"])
+    
+    if "htn" in condition_groups:
+        restrictions.append("low_sodium")
+    
+    if "kidney" in condition_groups:
+        restrictions.extend(["low_sodium", "low_potassium"])
+    
+    if "celiac" in condition_groups:
+        restrictions.append("gluten_free")
+    
+    for allergy in allergies:
+        restrictions.append(f"no_{allergy.lower()}")
+    
+    return tuple(dict.fromkeys(restrictions))
+
+
+def _cardiovascular_risk_points(
+    systolic: float,
+    total_cholesterol: float,
+    has_diabetes: bool
+) -> int:
+    """Simplified Framingham points; takes plain scalars only"""
+    cv_risk = 0
+    if systolic >= 140.0:
+        cv_risk += 2
+    if total_cholesterol >= 240.0:
+        cv_risk += 2
+    if has_diabetes:
+        cv_risk += 3
+    return cv_risk
+
+
+class NutritionTargets(NamedTuple):
+    """Daily calorie and macronutrient targets"""
+    calories: int
+    protein_g: int
+    carbs_g: int
+    fat_g: int
+
+
+@lru_cache(maxsize=4096)
+def _nutrition_targets_kernel(weight_lbs: float, has_diabetes: bool) -> NutritionTargets:
+    """
+    Daily calorie and macro targets for a weight / diabetes combination
+    
+    weight_lbs of 0 means unknown and falls back to a 2000 kcal baseline.
+    Inputs are hashable scalars, so repeated previews hit the cache.
+    """
+    # Base calorie calculation (Harris-Benedict equation simplified)
+    # TODO: Get gender and age from user profile
+    base_calories = 2000  # Default
+    
+    if weight_lbs > 0.0:
+        # Simplified calculation: 12-15 cal/lb depending on goals
+        base_calories = int(weight_lbs * 13)
+    
+    # Macronutrient distribution
+    # Default: 30% protein, 40% carbs, 30% fat
+    protein_pct = 0.30
+    carbs_pct = 0.40
+    fat_pct = 0.30
+    
+    if has_diabetes:
+        # Moderate calorie restriction and lower carbs for diabetes
+        base_calories = int(base_calories * 0.9)
+        carbs_pct = 0.35
+        fat_pct = 0.35
+    
+    return NutritionTargets(
+        calories=base_calories,
+        protein_g=int((base_calories * protein_pct) / 4),  # 4 cal/g
+        carbs_g=int((base_calories * carbs_pct) / 4),
+        fat_g=int((base_calories * fat_pct) / 9)  # 9 cal/g
+    )
@@ -1,10 +1,12 @@
 """
 Meal Photo Analysis and Tracking Service
 """
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Sequence
 from uuid import UUID
-from datetime import datetime, date
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import datetime, date, time, timedelta
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import desc, and_, func
 
 from app.models.meal import (
@@ -54,7 +56,6 @@ class MealAnalysisService:
         
         db.add(meal_photo)
         db.commit()
-        db.refresh(meal_photo)
         
         # Queue for async processing
         # TODO: Send to Celery task for GPT-4 Vision analysis
@@ -138,30 +139,32 @@ class MealAnalysisService:
             meal_photo.ai_confidence = analysis_result["confidence"]
             meal_photo.detected_foods = [ing["name"] for ing in analysis_result["ingredients"]]
             
-            # Add ingredients
-            total_calories = 0
-            total_protein = 0
-            total_carbs = 0
-            total_fat = 0
+            # Add ingredients (bulk INSERT, no per-row ORM state)
+            ingredients = analysis_result["ingredients"]
+            db.bulk_insert_mappings(MealPhotoIngredient, [
+                {
+                    "meal_photo_id": meal_photo.id,
+                    "name": ing_data["name"],
+                    "quantity": ing_data["quantity"],
+                    "unit": ing_data["unit"],
+                    "confidence": ing_data["confidence"],
+                    "calories": ing_data["calories"],
+                    "protein_g": ing_data["protein_g"],
+                    "carbs_g": ing_data["carbs_g"],
+                    "fat_g": ing_data["fat_g"]
+                }
+                for ing_data in ingredients
+            ])
             
-            for ing_data in analysis_result["ingredients"]:
-                ingredient = MealPhotoIngredient(
-                    meal_photo_id=meal_photo.id,
-                    name=ing_data["name"],
-                    quantity=ing_data["quantity"],
-                    unit=ing_data["unit"],
-                    confidence=ing_data["confidence"],
-                    calories=ing_data["calories"],
-                    protein_g=ing_data["protein_g"],
-                    carbs_g=ing_data["carbs_g"],
-                    fat_g=ing_data["fat_g"]
-                )
-                db.add(ingredient)
-                
-                total_calories += ing_data["calories"]
-                total_protein += ing_data["protein_g"]
-                total_carbs += ing_data["carbs_g"]
-                total_fat += ing_data["fat_g"]
+            # Sum macros column-wise in one reduction
+            macros = np.array(
+                [
+                    [ing["calories"], ing["protein_g"], ing["carbs_g"], ing["fat_g"]]
+                    for ing in ingredients
+                ],
+                dtype=np.float64
+            ).reshape(-1, 4)
+            total_calories, total_protein, total_carbs, total_fat = macros.sum(axis=0).tolist()
             
             # Update totals
             meal_photo.total_calories = total_calories
@@ -170,7 +173,7 @@ class MealAnalysisService:
             meal_photo.total_fat_g = total_fat
             
             # Calculate health score
-            meal_photo.health_score = await MealAnalysisService._calculate_health_score(
+            meal_photo.health_score = MealAnalysisService._calculate_health_score(
                 total_calories, total_protein, total_carbs, total_fat
             )
             
@@ -190,7 +193,6 @@ class MealAnalysisService:
             
             meal_photo.processing_status = ProcessingStatus.COMPLETED
             db.commit()
-            db.refresh(meal_photo)
             
         except Exception as e:
             meal_photo.processing_status = ProcessingStatus.FAILED
@@ -208,7 +210,10 @@ class MealAnalysisService:
         limit: int = 50
     ) -> List[MealPhoto]:
         """Get user's meal photos with optional date range"""
-        query = db.query(MealPhoto).filter(MealPhoto.user_id == user_id)
+        query = db.query(MealPhoto).options(
+            selectinload(MealPhoto.ingredients),
+            selectinload(MealPhoto.nutrition)
+        ).filter(MealPhoto.user_id == user_id)
         
         if start_date:
             query = query.filter(MealPhoto.eaten_at >= start_date)
@@ -238,7 +243,6 @@ class MealAnalysisService:
             meal_photo.user_corrections = corrections
         
         db.commit()
-        db.refresh(meal_photo)
         
         return meal_photo
     
@@ -250,11 +254,13 @@ class MealAnalysisService:
     ) -> MealLog:
         """Create manual meal log entry"""
         
-        # Calculate totals
-        total_calories = sum(item.calories for item in log_data.items)
-        total_protein = sum(item.protein_g for item in log_data.items)
-        total_carbs = sum(item.carbs_g for item in log_data.items)
-        total_fat = sum(item.fat_g for item in log_data.items)
+        # Calculate totals in one pass over the items
+        total_calories = total_protein = total_carbs = total_fat = 0.0
+        for item in log_data.items:
+            total_calories += item.calories
+            total_protein += item.protein_g
+            total_carbs += item.carbs_g
+            total_fat += item.fat_g
         
         # Create meal log
         meal_log = MealLog(
@@ -274,24 +280,24 @@ class MealAnalysisService:
         )
         
         db.add(meal_log)
-        db.flush()
-        
-        # Add meal items
-        for item_data in log_data.items:
-            item = MealLogItem(
-                meal_log_id=meal_log.id,
-                food_name=item_data.food_name,
-                quantity=item_data.quantity,
-                unit=item_data.unit,
-                calories=item_data.calories,
-                protein_g=item_data.protein_g,
-                carbs_g=item_data.carbs_g,
-                fat_g=item_data.fat_g
-            )
-            db.add(item)
+        db.flush()  # Populate meal_log.id for the item rows
+        
+        # Add meal items (bulk INSERT, no per-row ORM state)
+        db.bulk_insert_mappings(MealLogItem, [
+            {
+                "meal_log_id": meal_log.id,
+                "food_name": item_data.food_name,
+                "quantity": item_data.quantity,
+                "unit": item_data.unit,
+                "calories": item_data.calories,
+                "protein_g": item_data.protein_g,
+                "carbs_g": item_data.carbs_g,
+                "fat_g": item_data.fat_g
+            }
+            for item_data in log_data.items
+        ])
         
         db.commit()
-        db.refresh(meal_log)
         
         return meal_log
     
@@ -299,80 +305,50 @@ class MealAnalysisService:
     async def get_daily_nutrition_summary(
         db: Session,
         user_id: UUID,
-        target_date: date
+        target_date: date,
+        include_rows: bool = False
     ) -> Dict:
         """Get nutritional summary for a specific day"""
-        
-        # Get all meal logs for the day
-        start_datetime = datetime.combine(target_date, datetime.min.time())
-        end_datetime = datetime.combine(target_date, datetime.max.time())
-        
-        meal_logs = db.query(MealLog).filter(
-            MealLog.user_id == user_id,
-            MealLog.log_date >= start_datetime,
-            MealLog.log_date <= end_datetime
-        ).all()
-        
-        # Calculate totals
-        total_calories = sum(log.total_calories for log in meal_logs)
-        total_protein = sum(log.total_protein_g for log in meal_logs)
-        total_carbs = sum(log.total_carbs_g for log in meal_logs)
-        total_fat = sum(log.total_fat_g for log in meal_logs)
-        
-        # Get meal photos for the day
-        meal_photos = db.query(MealPhoto).filter(
-            MealPhoto.user_id == user_id,
-            MealPhoto.eaten_at >= start_datetime,
-            MealPhoto.eaten_at <= end_datetime
-        ).all()
-        
-        # Add photo nutrition
-        for photo in meal_photos:
-            if photo.total_calories:
-                total_calories += photo.total_calories
-                total_protein += photo.total_protein_g or 0
-                total_carbs += photo.total_carbs_g or 0
-                total_fat += photo.total_fat_g or 0
-        
-        return {
-            "date": target_date,
-            "total_calories": total_calories,
-            "total_protein_g": total_protein,
-            "total_carbs_g": total_carbs,
-            "total_fat_g": total_fat,
-            "meal_count": len(meal_logs) + len(meal_photos),
-            "meals": meal_logs,
-            "photos": meal_photos
-        }
+        summaries = await MealAnalysisService._get_daily_summaries(
+            db, user_id, target_date, target_date, include_rows
+        )
+        return summaries[0]
     
     @staticmethod
     async def get_nutrition_trends(
         db: Session,
         user_id: UUID,
-        days: int = 7
+        days: int = 7,
+        include_rows: bool = False
     ) -> Dict:
         """Get nutrition trends over time"""
-        
-        from datetime import timedelta
-        
         end_date = date.today()
         start_date = end_date - timedelta(days=days)
         
-        daily_summaries = []
-        current_date = start_date
+        daily_summaries = await MealAnalysisService._get_daily_summaries(
+            db, user_id, start_date, end_date, include_rows
+        )
         
-        while current_date <= end_date:
-            summary = await MealAnalysisService.get_daily_nutrition_summary(
-                db, user_id, current_date
-            )
-            daily_summaries.append(summary)
-            current_date += timedelta(days=1)
+        # Calculate averages in one reduction over a (days, 4) array
+        totals = np.array(
+            [
+                [s["total_calories"], s["total_protein_g"], s["total_carbs_g"], s["total_fat_g"]]
+                for s in daily_summaries
+            ],
+            dtype=np.float64
+        )
+        avg_calories, avg_protein, avg_carbs, avg_fat = totals.mean(axis=0).tolist()
         
-        # Calculate averages
-        avg_calories = sum(s["total_calories"] for s in daily_summaries) / len(daily_summaries)
-        avg_protein = sum(s["total_protein_g"] for s in daily_summaries) / len(daily_summaries)
-        avg_carbs = sum(s["total_carbs_g"] for s in daily_summaries) / len(daily_summaries)
-        avg_fat = sum(s["total_fat_g"] for s in daily_summaries) / len(daily_summaries)
+        # Score each day's average meal in one vectorized pass; days without meals get None
+        meal_counts = np.array([s["meal_count"] for s in daily_summaries], dtype=np.float64)
+        has_meals = meal_counts > 0
+        per_meal = np.divide(
+            totals, meal_counts[:, None], out=np.zeros_like(totals), where=has_meals[:, None]
+        )
+        scores = MealAnalysisService._calculate_health_scores_batch(*per_meal.T)
+        for summary, score, logged in zip(daily_summaries, scores.tolist(), has_meals.tolist()):
+            summary["health_score"] = score if logged else None
+        avg_health_score = float(scores[has_meals].mean()) if has_meals.any() else None
         
         return {
             "period_days": days,
@@ -383,12 +359,118 @@ class MealAnalysisService:
                 "calories": avg_calories,
                 "protein_g": avg_protein,
                 "carbs_g": avg_carbs,
-                "fat_g": avg_fat
+                "fat_g": avg_fat,
+                "health_score": avg_health_score
             }
         }
     
     @staticmethod
-    async def _calculate_health_score(
+    async def _get_daily_summaries(
+        db: Session,
+        user_id: UUID,
+        start_date: date,
+        end_date: date,
+        include_rows: bool = False
+    ) -> List[Dict]:
+        """
+        Build one nutrition summary per day in [start_date, end_date]
+        
+        Totals are summed and grouped by day in the database, so only
+        four numbers per day cross the wire. Full MealLog / MealPhoto rows
+        are loaded only when include_rows is set.
+        """
+        # Half-open [start, end) range keeps the filter a plain b-tree range scan
+        start_datetime = datetime.combine(start_date, time.min)
+        end_datetime = datetime.combine(end_date, time.min) + timedelta(days=1)
+        
+        log_day = func.date(MealLog.log_date)
+        log_totals = db.query(
+            log_day,
+            func.count(MealLog.id),
+            func.sum(MealLog.total_calories),
+            func.sum(MealLog.total_protein_g),
+            func.sum(MealLog.total_carbs_g),
+            func.sum(MealLog.total_fat_g)
+        ).filter(
+            MealLog.user_id == user_id,
+            MealLog.log_date >= start_datetime,
+            MealLog.log_date < end_datetime
+        ).group_by(log_day).all()
+        
+        photo_day = func.date(MealPhoto.eaten_at)
+        photo_totals = db.query(
+            photo_day,
+            func.count(MealPhoto.id),
+            func.sum(MealPhoto.total_calories),
+            func.sum(MealPhoto.total_protein_g),
+            func.sum(MealPhoto.total_carbs_g),
+            func.sum(MealPhoto.total_fat_g)
+        ).filter(
+            MealPhoto.user_id == user_id,
+            MealPhoto.eaten_at >= start_datetime,
+            MealPhoto.eaten_at < end_datetime
+        ).group_by(photo_day).all()
+        
+        # Merge both result sets by day: [meal_count, calories, protein, carbs, fat]
+        totals_by_day = defaultdict(lambda: [0, 0.0, 0.0, 0.0, 0.0])
+        for day, count, calories, protein, carbs, fat in (*log_totals, *photo_totals):
+            totals = totals_by_day[day]
+            totals[0] += count
+            totals[1] += calories or 0
+            totals[2] += protein or 0
+            totals[3] += carbs or 0
+            totals[4] += fat or 0
+        
+        logs_by_day = defaultdict(list)
+        photos_by_day = defaultdict(list)
+        if include_rows:
+            meal_logs = db.query(MealLog).options(
+                selectinload(MealLog.items)
+            ).filter(
+                MealLog.user_id == user_id,
+                MealLog.log_date >= start_datetime,
+                MealLog.log_date < end_datetime
+            ).all()
+            for log in meal_logs:
+                logs_by_day[log.log_date.date()].append(log)
+            
+            meal_photos = db.query(MealPhoto).options(
+                selectinload(MealPhoto.ingredients),
+                selectinload(MealPhoto.nutrition)
+            ).filter(
+                MealPhoto.user_id == user_id,
+                MealPhoto.eaten_at >= start_datetime,
+                MealPhoto.eaten_at < end_datetime
+            ).all()
+            for photo in meal_photos:
+                photos_by_day[photo.eaten_at.date()].append(photo)
+        
+        daily_summaries = []
+        current_date = start_date
+        
+        while current_date <= end_date:
+            meal_count, calories, protein, carbs, fat = totals_by_day.get(
+                current_date, (0, 0.0, 0.0, 0.0, 0.0)
+            )
+            summary = {
+                "date": current_date,
+                "total_calories": calories,
+                "total_protein_g": protein,
+                "total_carbs_g": carbs,
+                "total_fat_g": fat,
+                "meal_count": meal_count
+            }
+            if include_rows:
+                summary["meals"] = logs_by_day.get(current_date, [])
+                summary["photos"] = photos_by_day.get(current_date, [])
+            
+            daily_summaries.append(summary)
+            current_date += timedelta(days=1)
+        
+        return daily_summaries
+    
+    @staticmethod
+    def _calculate_health_score(
         calories: float,
         protein: float,
         carbs: float,
@@ -403,31 +485,97 @@ class MealAnalysisService:
         - Protein content
         - Fiber content (if available)
         """
-        score = 50.0  # Base score
+        return _health_score_kernel(
+            float(calories), float(protein), float(carbs), float(fat)
+        )
+    
+    @staticmethod
+    def _calculate_health_scores_batch(
+        calories: Sequence[float],
+        protein: Sequence[float],
+        carbs: Sequence[float],
+        fat: Sequence[float]
+    ) -> np.ndarray:
+        """
+        Vectorized _calculate_health_score for many meals at once
+        
+        Applies the same rules as the scalar version with boolean masks
+        over float64 arrays; get_nutrition_trends scores every day with it.
+        """
+        calories = np.asarray(calories, dtype=np.float64)
+        protein = np.asarray(protein, dtype=np.float64)
+        fat = np.asarray(fat, dtype=np.float64)
+        
+        score = np.full(calories.shape, 50.0)
+        has_calories = calories > 0
         
         # Protein score (higher protein = better)
-        protein_pct = (protein * 4) / calories if calories > 0 else 0
-        if protein_pct >= 0.3:
-            score += 20
-        elif protein_pct >= 0.2:
-            score += 15
-        elif protein_pct >= 0.15:
-            score += 10
+        protein_pct = np.divide(
+            protein * 4, calories, out=np.zeros_like(calories), where=has_calories
+        )
+        score += np.select(
+            [protein_pct >= 0.3, protein_pct >= 0.2, protein_pct >= 0.15],
+            [20.0, 15.0, 10.0],
+            default=0.0
+        )
         
         # Calorie score (moderate calories = better)
-        if 300 <= calories <= 600:
-            score += 15
-        elif 200 <= calories <= 800:
-            score += 10
-        elif calories < 200 or calories > 1000:
-            score -= 10
+        score += np.select(
+            [
+                (calories >= 300) & (calories <= 600),
+                (calories >= 200) & (calories <= 800),
+                (calories < 200) | (calories > 1000)
+            ],
+            [15.0, 10.0, -10.0],
+            default=0.0
+        )
         
         # Fat score (moderate fat = better)
-        fat_pct = (fat * 9) / calories if calories > 0 else 0
-        if 0.2 <= fat_pct <= 0.35:
-            score += 15
-        elif fat_pct > 0.5:
-            score -= 10
+        fat_pct = np.divide(
+            fat * 9, calories, out=np.zeros_like(calories), where=has_calories
+        )
+        score += np.select(
+            [(fat_pct >= 0.2) & (fat_pct <= 0.35), fat_pct > 0.5],
+            [15.0, -10.0],
+            default=0.0
+        )
         
         # Cap at 0-100
-        return max(0, min(100, score))
+        return np.clip(score, 0.0, 100.0)
+
+
+def _health_score_kernel(
+    calories: float,
+    protein: float,
+    carbs: float,
+    fat: float
+) -> float:
+    """Scalar health score arithmetic; takes and returns plain floats only"""
+    score = 50.0  # Base score
+    
+    # Protein score (higher protein = better)
+    protein_pct = (protein * 4.0) / calories if calories > 0.0 else 0.0
+    if protein_pct >= 0.3:
+        score += 20.0
+    elif protein_pct >= 0.2:
+        score += 15.0
+    elif protein_pct >= 0.15:
+        score += 10.0
+    
+    # Calorie score (moderate calories = better)
+    if 300.0 <= calories <= 600.0:
+        score += 15.0
+    elif 200.0 <= calories <= 800.0:
+        score += 10.0
+    elif calories < 200.0 or calories > 1000.0:
+        score -= 10.0
+    
+    # Fat score (moderate fat = better)
+    fat_pct = (fat * 9.0) / calories if calories > 0.0 else 0.0
+    if 0.2 <= fat_pct <= 0.35:
+        score += 15.0
+    elif fat_pct > 0.5:
+        score -= 10.0
+    
+    # Cap at 0-100
+    return max(0.0, min(100.0, score))
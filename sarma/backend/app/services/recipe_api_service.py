@@ -2,9 +2,156 @@
 Recipe API Integration Service
 Integrates with Spoonacular API for recipe data
 """
+import asyncio
+import logging
+import time
 import httpx
+import orjson
 from typing import List, Dict, Optional
+from aiolimiter import AsyncLimiter
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 from app.core.config import settings
+from app.core.cache import cached, cache_get, cache_set
+
+logger = logging.getLogger(__name__)
+
+# Shared pool sizing; HTTP/2 multiplexes concurrent calls over few sockets
+_POOL_LIMITS = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+
+# Spoonacular requests per second, and the slower rate once daily quota runs low
+SPOONACULAR_RATE = 5
+SPOONACULAR_LOW_QUOTA_RATE = 1
+SPOONACULAR_LOW_QUOTA_POINTS = 50.0
+
+# Recipe details are served from cache for DETAILS_FRESH_TTL seconds, then
+# revalidated with If-None-Match / If-Modified-Since; the entry (body plus
+# validators) is kept for DETAILS_STALE_TTL so a 304 can reuse it
+DETAILS_FRESH_TTL = 3600
+DETAILS_STALE_TTL = 86400
+
+
+# Upstream statuses worth retrying: rate limiting and server-side failures
+TRANSIENT_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class RecipeAPIError(Exception):
+    """Non-retryable upstream client error (bad key, exhausted quota, bad request)"""
+    
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Retry predicate: connection failures, read timeouts, 429 and 5xx"""
+    if isinstance(exc, (httpx.ConnectError, httpx.ReadTimeout)):
+        return True
+    return (
+        isinstance(exc, httpx.HTTPStatusError)
+        and exc.response.status_code in TRANSIENT_STATUS_CODES
+    )
+
+
+def _raise_for_client_error(exc: httpx.HTTPError, provider: str) -> None:
+    """Surface 4xx responses (other than 404/429) instead of swallowing them"""
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return
+    status_code = exc.response.status_code
+    if 400 <= status_code < 500 and status_code not in (404, 429):
+        raise RecipeAPIError(status_code, f"{provider} rejected the request ({status_code})") from exc
+
+
+async def _get_with_backoff(
+    client: httpx.AsyncClient,
+    limiter: AsyncLimiter,
+    url: str,
+    params: Dict,
+    headers: Optional[Dict[str, str]] = None,
+) -> httpx.Response:
+    """GET through the rate limiter, retrying transient failures with jittered backoff"""
+    async for attempt in AsyncRetrying(
+        retry=retry_if_exception(_is_transient),
+        wait=wait_exponential_jitter(initial=0.5, max=10),
+        stop=stop_after_attempt(4),
+        reraise=True,
+    ):
+        with attempt:
+            async with limiter:
+                response = await client.get(url, params=params, headers=headers)
+            # raise_for_status also rejects 304, which callers handle themselves
+            if response.is_error:
+                response.raise_for_status()
+    return response
+
+
+# Spoonacular nutrient names mapped to our nutrition keys
+NUTRIENT_FIELDS = (
+    ("Calories", "calories"),
+    ("Protein", "protein"),
+    ("Carbohydrates", "carbs"),
+    ("Fat", "fat"),
+)
+
+
+def _nutrition_summary(recipe_data: Dict) -> Dict[str, Optional[float]]:
+    """Pick the macro amounts out of a Spoonacular nutrition block"""
+    nutrients = {}
+    for nutrient in recipe_data.get("nutrition", {}).get("nutrients", []):
+        # First entry wins on duplicate names
+        nutrients.setdefault(nutrient.get("name"), nutrient.get("amount"))
+    return {key: nutrients.get(name) for name, key in NUTRIENT_FIELDS}
+
+
+def _transform_search_result(recipe: Dict) -> Dict:
+    """Map a complexSearch result to our recipe summary format"""
+    get = recipe.get
+    return {
+        "id": recipe["id"],
+        "name": recipe["title"],
+        "image_url": get("image"),
+        "ready_in_minutes": get("readyInMinutes"),
+        "servings": get("servings"),
+        "source_url": get("sourceUrl"),
+        "summary": get("summary", ""),
+        "nutrition": _nutrition_summary(recipe),
+        "source": "spoonacular",
+    }
+
+
+def _transform_recipe_details(data: Dict) -> Dict:
+    """Map a recipe information payload to our detailed recipe format"""
+    get = data.get
+    steps = (get("analyzedInstructions") or [{}])[0].get("steps", [])
+    return {
+        "id": data["id"],
+        "name": data["title"],
+        "description": get("summary", ""),
+        "image_url": get("image"),
+        "ready_in_minutes": get("readyInMinutes"),
+        "servings": get("servings"),
+        "ingredients": [
+            {
+                "name": ing["name"],
+                "amount": ing.get("amount"),
+                "unit": ing.get("unit"),
+                "original": ing.get("original"),
+            }
+            for ing in get("extendedIngredients", [])
+        ],
+        "instructions": [
+            {"number": step["number"], "step": step["step"]}
+            for step in steps
+        ],
+        "nutrition": _nutrition_summary(data),
+        "diet_labels": get("diets", []),
+        "source_url": get("sourceUrl"),
+        "source": "spoonacular",
+    }
 
 
 class RecipeAPIService:
@@ -15,6 +162,57 @@ class RecipeAPIService:
         self.base_url = "https://api.spoonacular.com"
         self.timeout = 30.0
         
+        # One pooled keep-alive HTTP/2 client per service instance
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=_POOL_LIMITS,
+            http2=True,
+        )
+        
+        # Caps concurrent detail lookups to stay inside the per-key rate limit
+        self._detail_semaphore = asyncio.Semaphore(32)
+        self._limiter = AsyncLimiter(max_rate=SPOONACULAR_RATE, time_period=1)
+    
+    async def aclose(self):
+        """Close pooled connections"""
+        await self._client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    async def _get(
+        self,
+        path: str,
+        params: Dict,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """Rate-limited GET that also tracks the remaining daily quota"""
+        response = await _get_with_backoff(
+            self._client, self._limiter, path, params, headers
+        )
+        
+        # Spoonacular reports remaining daily points; slow down before hitting 402
+        # and speed back up once the quota resets
+        quota_left = response.headers.get("X-API-Quota-Left")
+        if quota_left is None:
+            return response
+        try:
+            low_quota = float(quota_left) < SPOONACULAR_LOW_QUOTA_POINTS
+        except ValueError:
+            logger.warning(f"Ignoring unparseable X-API-Quota-Left: {quota_left!r}")
+            return response
+        
+        rate = SPOONACULAR_LOW_QUOTA_RATE if low_quota else SPOONACULAR_RATE
+        if self._limiter.max_rate != rate:
+            self._limiter = AsyncLimiter(max_rate=rate, time_period=1)
+        
+        return response
+        
+    @cached("spoonacular:search", ttl=300)
     async def search_recipes(
         self,
         query: str,
@@ -36,120 +234,112 @@ class RecipeAPIService:
         Returns:
             List of recipe dictionaries
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            params = {
-                "apiKey": self.api_key,
-                "query": query,
-                "number": max_results,
-                "addRecipeInformation": True,
-                "fillIngredients": True,
-            }
+        params = {
+            "apiKey": self.api_key,
+            "query": query,
+            "number": max_results,
+            "addRecipeInformation": True,
+            "fillIngredients": True,
+        }
+        
+        if cuisine:
+            params["cuisine"] = cuisine
+        if diet:
+            params["diet"] = diet
+        if intolerances:
+            params["intolerances"] = ",".join(intolerances)
+        
+        try:
+            response = await self._get(
+                "/recipes/complexSearch",
+                params=params
+            )
+            data = orjson.loads(response.content)
             
-            if cuisine:
-                params["cuisine"] = cuisine
-            if diet:
-                params["diet"] = diet
-            if intolerances:
-                params["intolerances"] = ",".join(intolerances)
+            # Transform to our format
+            return [_transform_search_result(recipe) for recipe in data.get("results", [])]
             
-            try:
-                response = await client.get(
-                    f"{self.base_url}/recipes/complexSearch",
-                    params=params
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                # Transform to our format
-                recipes = []
-                for recipe in data.get("results", []):
-                    recipes.append({
-                        "id": recipe["id"],
-                        "name": recipe["title"],
-                        "image_url": recipe.get("image"),
-                        "ready_in_minutes": recipe.get("readyInMinutes"),
-                        "servings": recipe.get("servings"),
-                        "source_url": recipe.get("sourceUrl"),
-                        "summary": recipe.get("summary", ""),
-                        "nutrition": {
-                            "calories": self._extract_nutrient(recipe, "Calories"),
-                            "protein": self._extract_nutrient(recipe, "Protein"),
-                            "carbs": self._extract_nutrient(recipe, "Carbohydrates"),
-                            "fat": self._extract_nutrient(recipe, "Fat"),
-                        },
-                        "source": "spoonacular",
-                    })
-                
-                return recipes
-                
-            except httpx.HTTPError as e:
-                print(f"Error fetching recipes from Spoonacular: {e}")
-                return []
+        except httpx.HTTPError as e:
+            _raise_for_client_error(e, "Spoonacular")
+            logger.warning(f"Error fetching recipes from Spoonacular: {e}")
+            return []
     
     async def get_recipe_details(self, recipe_id: int) -> Optional[Dict]:
         """
         Get detailed information about a specific recipe
         
+        Cached entries older than DETAILS_FRESH_TTL are revalidated with a
+        conditional request; a 304 reuses the cached body.
+        
         Args:
             recipe_id: Spoonacular recipe ID
             
         Returns:
             Detailed recipe dictionary or None if not found
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/recipes/{recipe_id}/information",
+        cache_key = f"spoonacular:details:{recipe_id}"
+        entry = await cache_get(cache_key)
+        if entry and time.time() - entry["fetched_at"] < DETAILS_FRESH_TTL:
+            return entry["recipe"]
+        
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        
+        try:
+            async with self._detail_semaphore:
+                response = await self._get(
+                    f"/recipes/{recipe_id}/information",
                     params={
                         "apiKey": self.api_key,
                         "includeNutrition": True,
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                # Extract ingredients
-                ingredients = []
-                for ing in data.get("extendedIngredients", []):
-                    ingredients.append({
-                        "name": ing["name"],
-                        "amount": ing.get("amount"),
-                        "unit": ing.get("unit"),
-                        "original": ing.get("original"),
-                    })
-                
-                # Extract instructions
-                instructions = []
-                for step in data.get("analyzedInstructions", [{}])[0].get("steps", []):
-                    instructions.append({
-                        "number": step["number"],
-                        "step": step["step"],
-                    })
-                
-                return {
-                    "id": data["id"],
-                    "name": data["title"],
-                    "description": data.get("summary", ""),
-                    "image_url": data.get("image"),
-                    "ready_in_minutes": data.get("readyInMinutes"),
-                    "servings": data.get("servings"),
-                    "ingredients": ingredients,
-                    "instructions": instructions,
-                    "nutrition": {
-                        "calories": self._extract_nutrient(data, "Calories"),
-                        "protein": self._extract_nutrient(data, "Protein"),
-                        "carbs": self._extract_nutrient(data, "Carbohydrates"),
-                        "fat": self._extract_nutrient(data, "Fat"),
                     },
-                    "diet_labels": data.get("diets", []),
-                    "source_url": data.get("sourceUrl"),
-                    "source": "spoonacular",
-                }
-                
-            except httpx.HTTPError as e:
-                print(f"Error fetching recipe details: {e}")
-                return None
+                    headers=headers or None
+                )
+            
+            if response.status_code == 304 and entry:
+                recipe = entry["recipe"]
+            else:
+                recipe = _transform_recipe_details(orjson.loads(response.content))
+            
+            await cache_set(
+                cache_key,
+                {
+                    "recipe": recipe,
+                    "etag": response.headers.get("ETag") or (entry or {}).get("etag"),
+                    "last_modified": response.headers.get("Last-Modified")
+                    or (entry or {}).get("last_modified"),
+                    "fetched_at": time.time(),
+                },
+                DETAILS_STALE_TTL
+            )
+            return recipe
+            
+        except httpx.HTTPError as e:
+            _raise_for_client_error(e, "Spoonacular")
+            logger.warning(f"Error fetching recipe details: {e}")
+            # Serve the stale copy rather than nothing when upstream is down
+            return entry["recipe"] if entry else None
     
+    async def hydrate_many(self, recipe_ids: List[int]) -> List[Dict]:
+        """
+        Fetch details for several recipes concurrently
+        
+        Args:
+            recipe_ids: Spoonacular recipe IDs
+            
+        Returns:
+            Detailed recipe dictionaries in input order; lookups that failed are skipped
+        """
+        details = await asyncio.gather(
+            *(self.get_recipe_details(recipe_id) for recipe_id in recipe_ids)
+        )
+        return [recipe for recipe in details if recipe is not None]
+    
+    @cached("spoonacular:by_ingredients", ttl=600)
     async def get_recipes_by_ingredients(
         self,
         ingredients: List[str],
@@ -165,37 +355,36 @@ class RecipeAPIService:
         Returns:
             List of recipe dictionaries
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/recipes/findByIngredients",
-                    params={
-                        "apiKey": self.api_key,
-                        "ingredients": ",".join(ingredients),
-                        "number": max_results,
-                        "ranking": 2,  # Maximize used ingredients
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                recipes = []
-                for recipe in data:
-                    recipes.append({
-                        "id": recipe["id"],
-                        "name": recipe["title"],
-                        "image_url": recipe.get("image"),
-                        "used_ingredients": len(recipe.get("usedIngredients", [])),
-                        "missed_ingredients": len(recipe.get("missedIngredients", [])),
-                        "source": "spoonacular",
-                    })
-                
-                return recipes
-                
-            except httpx.HTTPError as e:
-                print(f"Error finding recipes by ingredients: {e}")
-                return []
+        try:
+            response = await self._get(
+                "/recipes/findByIngredients",
+                params={
+                    "apiKey": self.api_key,
+                    "ingredients": ",".join(ingredients),
+                    "number": max_results,
+                    "ranking": 2,  # Maximize used ingredients
+                }
+            )
+            data = orjson.loads(response.content)
+            
+            return [
+                {
+                    "id": recipe["id"],
+                    "name": recipe["title"],
+                    "image_url": recipe.get("image"),
+                    "used_ingredients": len(recipe.get("usedIngredients", [])),
+                    "missed_ingredients": len(recipe.get("missedIngredients", [])),
+                    "source": "spoonacular",
+                }
+                for recipe in data
+            ]
+            
+        except httpx.HTTPError as e:
+            _raise_for_client_error(e, "Spoonacular")
+            logger.warning(f"Error finding recipes by ingredients: {e}")
+            return []
     
+    @cached("spoonacular:similar", ttl=3600)
     async def get_similar_recipes(
         self,
         recipe_id: int,
@@ -211,43 +400,31 @@ class RecipeAPIService:
         Returns:
             List of similar recipe dictionaries
         """
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/recipes/{recipe_id}/similar",
-                    params={
-                        "apiKey": self.api_key,
-                        "number": max_results,
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                return [
-                    {
-                        "id": recipe["id"],
-                        "name": recipe["title"],
-                        "ready_in_minutes": recipe.get("readyInMinutes"),
-                        "servings": recipe.get("servings"),
-                        "source": "spoonacular",
-                    }
-                    for recipe in data
-                ]
-                
-            except httpx.HTTPError as e:
-                print(f"Error fetching similar recipes: {e}")
-                return []
-    
-    def _extract_nutrient(self, recipe_data: Dict, nutrient_name: str) -> Optional[float]:
-        """Extract nutrient value from recipe data"""
-        nutrition = recipe_data.get("nutrition", {})
-        nutrients = nutrition.get("nutrients", [])
-        
-        for nutrient in nutrients:
-            if nutrient.get("name") == nutrient_name:
-                return nutrient.get("amount")
-        
-        return None
+        try:
+            response = await self._get(
+                f"/recipes/{recipe_id}/similar",
+                params={
+                    "apiKey": self.api_key,
+                    "number": max_results,
+                }
+            )
+            data = orjson.loads(response.content)
+            
+            return [
+                {
+                    "id": recipe["id"],
+                    "name": recipe["title"],
+                    "ready_in_minutes": recipe.get("readyInMinutes"),
+                    "servings": recipe.get("servings"),
+                    "source": "spoonacular",
+                }
+                for recipe in data
+            ]
+            
+        except httpx.HTTPError as e:
+            _raise_for_client_error(e, "Spoonacular")
+            logger.warning(f"Error fetching similar recipes: {e}")
+            return []
 
 
 # Alternative: Edamam Recipe API
@@ -263,6 +440,25 @@ class EdamamRecipeService:
         self.app_key = app_key or settings.EDAMAM_APP_KEY
         self.base_url = "https://api.edamam.com/api/recipes/v2"
         self.timeout = 30.0
+        
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=_POOL_LIMITS,
+            http2=True,
+        )
+        
+        # Edamam developer plans allow 10 requests per minute
+        self._limiter = AsyncLimiter(max_rate=10, time_period=60)
+    
+    async def aclose(self):
+        """Close pooled connections"""
+        await self._client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
     
     async def search_recipes(
         self,
@@ -272,43 +468,49 @@ class EdamamRecipeService:
         max_results: int = 10,
     ) -> List[Dict]:
         """Search recipes using Edamam API"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            params = {
-                "type": "public",
-                "app_id": self.app_id,
-                "app_key": self.app_key,
-                "q": query,
-                "to": max_results,
-            }
+        params = {
+            "type": "public",
+            "app_id": self.app_id,
+            "app_key": self.app_key,
+            "q": query,
+            "to": max_results,
+        }
+        
+        if diet:
+            params["diet"] = diet
+        if health:
+            params["health"] = health
+        
+        try:
+            response = await _get_with_backoff(
+                self._client, self._limiter, self.base_url, params
+            )
+            data = orjson.loads(response.content)
             
-            if diet:
-                params["diet"] = diet
-            if health:
-                params["health"] = health
+            recipes = []
+            for hit in data.get("hits", []):
+                recipe = hit["recipe"]
+                recipes.append({
+                    "id": recipe["uri"].split("#")[-1],
+                    "name": recipe["label"],
+                    "image_url": recipe.get("image"),
+                    "source_url": recipe.get("url"),
+                    "calories": recipe.get("calories"),
+                    "servings": recipe.get("yield"),
+                    "ingredients": [ing["text"] for ing in recipe.get("ingredients", [])],
+                    "diet_labels": recipe.get("dietLabels", []),
+                    "health_labels": recipe.get("healthLabels", []),
+                    "source": "edamam",
+                })
             
-            try:
-                response = await client.get(self.base_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                recipes = []
-                for hit in data.get("hits", []):
-                    recipe = hit["recipe"]
-                    recipes.append({
-                        "id": recipe["uri"].split("#")[-1],
-                        "name": recipe["label"],
-                        "image_url": recipe.get("image"),
-                        "source_url": recipe.get("url"),
-                        "calories": recipe.get("calories"),
-                        "servings": recipe.get("yield"),
-                        "ingredients": [ing["text"] for ing in recipe.get("ingredients", [])],
-                        "diet_labels": recipe.get("dietLabels", []),
-                        "health_labels": recipe.get("healthLabels", []),
-                        "source": "edamam",
-                    })
-                
-                return recipes
-                
-            except httpx.HTTPError as e:
-                print(f"Error fetching recipes from Edamam: {e}")
-                return []
+            return recipes
+            
+        except httpx.HTTPError as e:
+            _raise_for_client_error(e, "Edamam")
+            logger.warning(f"Error fetching recipes from Edamam: {e}")
+            return []
+
+
+# Process-wide instances sharing one connection pool each; closed on app shutdown
+recipe_api_service = RecipeAPIService()
+edamam_recipe_service = EdamamRecipeService()
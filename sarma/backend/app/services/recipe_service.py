@@ -4,9 +4,17 @@ Recipe Search and Management Business Logic Service
 from typing import List, Optional, Dict
 from uuid import UUID
 from datetime import datetime
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, desc, func, text, select, update, tuple_
 
+from app.core.cache import (
+    incr_counter,
+    drain_counters,
+    cache_hget,
+    cache_hset,
+    cache_delete
+)
 from app.models.recipe import (
     Recipe,
     RecipeIngredient,
@@ -16,12 +24,73 @@ from app.models.recipe import (
     RecipeRating,
     RecipeFavorite
 )
+from app.services.vector_service import VectorSearchService, normalize_embedding
 from app.schemas.recipe import (
     RecipeCreate,
     RecipeUpdate,
-    RecipeSearchRequest
+    RecipeSearchRequest,
+    RecipeResponse
 )
 
+# Redis hashes of pending engagement deltas, keyed by recipe id
+RECIPE_VIEWS_KEY = "recipe:views"
+RECIPE_FAVORITES_KEY = "recipe:favorites"
+
+# Allergen name -> recipe flag that must be set to exclude it
+ALLERGEN_MAP = {
+    "gluten": Recipe.is_gluten_free,
+    "dairy": Recipe.is_dairy_free,
+    "nuts": Recipe.is_nut_free,
+}
+
+# Health condition keyword -> recipe flag; matched as a substring of the condition
+HEALTH_MAP = {
+    "diabetes": Recipe.is_diabetic_friendly,
+    "heart": Recipe.is_heart_healthy,
+    "cardiovascular": Recipe.is_heart_healthy,
+    "hypertension": Recipe.is_low_sodium,
+    "blood pressure": Recipe.is_low_sodium,
+}
+
+# Per-user list caches; one hash per user with a field per page size
+USER_LIST_CACHE_TTL = 3600
+
+
+def _recommendations_key(user_id: UUID) -> str:
+    return f"recommend:{user_id}"
+
+
+def _favorites_key(user_id: UUID) -> str:
+    return f"favorites:{user_id}"
+
+
+def _dietary_conditions(
+    exclude_allergens: Optional[List[str]],
+    health_conditions: Optional[List[str]]
+) -> List:
+    """Recipe flag predicates for allergens and conditions, one per distinct column"""
+    columns = {}
+    for allergen in exclude_allergens or ():
+        column = ALLERGEN_MAP.get(allergen.lower())
+        if column is not None:
+            columns[column.key] = column
+    
+    for condition in health_conditions or ():
+        condition = condition.lower()
+        for keyword, column in HEALTH_MAP.items():
+            if keyword in condition:
+                columns[column.key] = column
+    
+    return [column == True for column in columns.values()]
+
+
+def _serialize_recipes(recipes: List[Recipe]) -> List[Dict]:
+    """Dump recipes to JSON-safe dicts matching RecipeResponse"""
+    return [
+        RecipeResponse.model_validate(recipe).model_dump(mode="json")
+        for recipe in recipes
+    ]
+
 
 class RecipeService:
     """Service for recipe search and management"""
@@ -38,17 +107,15 @@ class RecipeService:
         Uses vector similarity search for semantic matching
         Filters by dietary requirements and health conditions
         """
-        query = db.query(Recipe).filter(Recipe.is_active == True)
+        query = db.query(Recipe).options(
+            selectinload(Recipe.ingredients)
+        ).filter(Recipe.is_active == True)
         
-        # Text search on title and description
+        # Full-text search on title and description (GIN-indexed tsvector)
+        ts_query = None
         if search_request.query:
-            search_term = f"%{search_request.query}%"
-            query = query.filter(
-                or_(
-                    Recipe.title.ilike(search_term),
-                    Recipe.description.ilike(search_term)
-                )
-            )
+            ts_query = func.plainto_tsquery("english", search_request.query)
+            query = query.filter(Recipe.search_tsv.op("@@")(ts_query))
         
         # Dietary type filter
         if search_request.dietary_type:
@@ -70,37 +137,40 @@ class RecipeService:
         if search_request.min_health_score:
             query = query.filter(Recipe.health_score >= search_request.min_health_score)
         
-        # Filter by allergens
-        if search_request.exclude_allergens:
-            for allergen in search_request.exclude_allergens:
-                if allergen.lower() == "gluten":
-                    query = query.filter(Recipe.is_gluten_free == True)
-                elif allergen.lower() == "dairy":
-                    query = query.filter(Recipe.is_dairy_free == True)
-                elif allergen.lower() == "nuts":
-                    query = query.filter(Recipe.is_nut_free == True)
-        
-        # Health condition filters
-        if search_request.health_conditions:
-            conditions_lower = [c.lower() for c in search_request.health_conditions]
-            
-            if any("diabetes" in c for c in conditions_lower):
-                query = query.filter(Recipe.is_diabetic_friendly == True)
-            
-            if any("heart" in c or "cardiovascular" in c for c in conditions_lower):
-                query = query.filter(Recipe.is_heart_healthy == True)
-            
-            if any("hypertension" in c or "blood pressure" in c for c in conditions_lower):
-                query = query.filter(Recipe.is_low_sodium == True)
-        
-        # Sort by relevance (default: rating)
-        query = query.order_by(desc(Recipe.rating_avg))
-        
-        # Pagination
-        offset = (search_request.page - 1) * search_request.page_size
-        query = query.offset(offset).limit(search_request.page_size)
-        
-        return query.all()
+        # Allergen and health-condition flags, combined into one predicate
+        dietary_conds = _dietary_conditions(
+            search_request.exclude_allergens,
+            search_request.health_conditions
+        )
+        if dietary_conds:
+            query = query.filter(and_(*dietary_conds))
+        
+        # Sort by relevance when searching text, then by rating; id breaks ties
+        if ts_query is not None:
+            query = query.order_by(
+                desc(func.ts_rank_cd(Recipe.search_tsv, ts_query)),
+                desc(Recipe.rating_avg),
+                desc(Recipe.id)
+            )
+        else:
+            query = query.order_by(desc(Recipe.rating_avg), desc(Recipe.id))
+        
+        # Pagination: keyset cursor on (rating_avg, id) for the rating order,
+        # offset pages for relevance-ranked text search
+        if (
+            ts_query is None
+            and search_request.after_rating is not None
+            and search_request.after_id is not None
+        ):
+            query = query.filter(
+                tuple_(Recipe.rating_avg, Recipe.id)
+                < tuple_(search_request.after_rating, search_request.after_id)
+            )
+        else:
+            offset = (search_request.page - 1) * search_request.page_size
+            query = query.offset(offset)
+        
+        return query.limit(search_request.page_size).all()
     
     @staticmethod
     async def search_recipes_semantic(
@@ -113,27 +183,32 @@ class RecipeService:
         """
         Semantic search using vector embeddings
         
-        TODO: Implement vector similarity search with pgvector
-        Uses cosine similarity on recipe embeddings
+        Nearest neighbours by inner product on unit vectors (cosine) via
+        the HNSW index on Recipe.embedding. Falls back to full-text search when no usable
+        embedding is available (the embedding client returns zeros on error).
         """
-        # Vector search using pgvector
-        # recipes = db.query(Recipe).order_by(
-        #     Recipe.embedding.cosine_distance(query_embedding)
-        # ).limit(limit).all()
-        
-        # Fallback to text search for now
-        search_term = f"%{query_text}%"
-        recipes = db.query(Recipe).filter(
-            and_(
+        if not query_embedding or not any(query_embedding):
+            ts_query = func.plainto_tsquery("english", query_text)
+            return db.query(Recipe).options(
+                selectinload(Recipe.ingredients)
+            ).filter(
                 Recipe.is_active == True,
-                or_(
-                    Recipe.title.ilike(search_term),
-                    Recipe.description.ilike(search_term)
-                )
-            )
-        ).limit(limit).all()
+                Recipe.search_tsv.op("@@")(ts_query)
+            ).order_by(
+                desc(func.ts_rank_cd(Recipe.search_tsv, ts_query))
+            ).limit(limit).all()
+        
+        # Wider candidate list for better recall; scoped to this transaction
+        db.execute(text("SET LOCAL hnsw.ef_search = 80"))
         
-        return recipes
+        return db.query(Recipe).options(
+            selectinload(Recipe.ingredients)
+        ).filter(
+            Recipe.is_active == True,
+            Recipe.embedding.isnot(None)
+        ).order_by(
+            Recipe.embedding.max_inner_product(normalize_embedding(query_embedding))
+        ).limit(limit).all()
     
     @staticmethod
     async def create_recipe(
@@ -167,39 +242,40 @@ class RecipeService:
         db.add(recipe)
         db.flush()  # Get recipe ID
         
-        # Add ingredients
-        for idx, ingredient_data in enumerate(recipe_data.ingredients):
-            ingredient = RecipeIngredient(
-                recipe_id=recipe.id,
-                name=ingredient_data["name"],
-                quantity=ingredient_data["quantity"],
-                unit=ingredient_data["unit"],
-                notes=ingredient_data.get("notes"),
-                order_index=idx,
-                is_optional=ingredient_data.get("is_optional", False),
-                ingredient_group=ingredient_data.get("group")
-            )
-            db.add(ingredient)
+        # Add ingredients, steps and tags as one executemany INSERT per table
+        db.bulk_insert_mappings(RecipeIngredient, [
+            {
+                "recipe_id": recipe.id,
+                "name": ingredient_data["name"],
+                "quantity": ingredient_data["quantity"],
+                "unit": ingredient_data["unit"],
+                "notes": ingredient_data.get("notes"),
+                "order_index": idx,
+                "is_optional": ingredient_data.get("is_optional", False),
+                "ingredient_group": ingredient_data.get("group")
+            }
+            for idx, ingredient_data in enumerate(recipe_data.ingredients)
+        ])
         
-        # Add cooking steps
         if recipe_data.instructions and "steps" in recipe_data.instructions:
-            for step_data in recipe_data.instructions["steps"]:
-                step = RecipeStep(
-                    recipe_id=recipe.id,
-                    step_number=step_data["step"],
-                    instruction=step_data["instruction"],
-                    duration_minutes=step_data.get("duration_minutes")
-                )
-                db.add(step)
-        
-        # Add tags
+            db.bulk_insert_mappings(RecipeStep, [
+                {
+                    "recipe_id": recipe.id,
+                    "step_number": step_data["step"],
+                    "instruction": step_data["instruction"],
+                    "duration_minutes": step_data.get("duration_minutes")
+                }
+                for step_data in recipe_data.instructions["steps"]
+            ])
+        
         if recipe_data.tags:
-            for tag_name in recipe_data.tags:
-                tag = RecipeTag(
-                    recipe_id=recipe.id,
-                    tag=tag_name.lower()
-                )
-                db.add(tag)
+            db.bulk_insert_mappings(RecipeTag, [
+                {"recipe_id": recipe.id, "tag": tag_name.lower()}
+                for tag_name in recipe_data.tags
+            ])
+        
+        # Bulk inserts skip the ORM listener that maintains embedding_text
+        VectorSearchService.refresh_embedding_text(db, [recipe.id])
         
         db.commit()
         db.refresh(recipe)
@@ -216,15 +292,25 @@ class RecipeService:
         recipe_id: UUID,
         user_id: Optional[UUID] = None
     ) -> Optional[Recipe]:
-        """Get recipe by ID and increment view count"""
+        """
+        Get recipe by ID and increment view count
+        
+        Views are counted in Redis and flushed to Postgres periodically,
+        so the returned view_count can lag by up to one flush interval.
+        """
         recipe = db.query(Recipe).filter(
             Recipe.id == recipe_id,
             Recipe.is_active == True
         ).first()
         
-        if recipe:
-            # Increment view count
-            recipe.view_count += 1
+        if recipe and not await incr_counter(RECIPE_VIEWS_KEY, str(recipe_id)):
+            # Redis unavailable: fall back to an atomic database increment
+            db.execute(
+                update(Recipe)
+                .where(Recipe.id == recipe_id)
+                .values(view_count=Recipe.view_count + 1)
+                .execution_options(synchronize_session=False)
+            )
             db.commit()
         
         return recipe
@@ -250,6 +336,10 @@ class RecipeService:
         for field, value in update_dict.items():
             setattr(recipe, field, value)
         
+        # Cached RAG answers near this recipe may no longer hold
+        if recipe.embedding is not None:
+            VectorSearchService.invalidate_rag_cache(db, recipe.embedding)
+        
         recipe.updated_at = datetime.utcnow()
         db.commit()
         db.refresh(recipe)
@@ -277,7 +367,6 @@ class RecipeService:
             existing_rating.rating = rating
             existing_rating.review = review
             existing_rating.updated_at = datetime.utcnow()
-            db.commit()
             rating_obj = existing_rating
         else:
             # Create new rating
@@ -288,10 +377,13 @@ class RecipeService:
                 review=review
             )
             db.add(rating_obj)
-            db.commit()
         
-        # Update recipe average rating
+        # Update recipe average rating in the same transaction
+        db.flush()
         await RecipeService._update_recipe_rating(db, recipe_id)
+        db.commit()
+        
+        await cache_delete(_recommendations_key(user_id), _favorites_key(user_id))
         
         return rating_obj
     
@@ -319,15 +411,13 @@ class RecipeService:
             notes=notes
         )
         db.add(favorite)
-        
-        # Update favorite count
-        recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
-        if recipe:
-            recipe.favorite_count += 1
-        
         db.commit()
         db.refresh(favorite)
         
+        # Update favorite count
+        await RecipeService._adjust_favorite_count(db, recipe_id, 1)
+        await cache_delete(_recommendations_key(user_id), _favorites_key(user_id))
+        
         return favorite
     
     @staticmethod
@@ -346,13 +436,12 @@ class RecipeService:
             return False
         
         db.delete(favorite)
+        db.commit()
         
         # Update favorite count
-        recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
-        if recipe and recipe.favorite_count > 0:
-            recipe.favorite_count -= 1
+        await RecipeService._adjust_favorite_count(db, recipe_id, -1)
+        await cache_delete(_recommendations_key(user_id), _favorites_key(user_id))
         
-        db.commit()
         return True
     
     @staticmethod
@@ -360,9 +449,16 @@ class RecipeService:
         db: Session,
         user_id: UUID,
         limit: int = 50
-    ) -> List[Recipe]:
-        """Get user's favorite recipes"""
-        favorites = db.query(Recipe).join(
+    ) -> List[Dict]:
+        """Get user's favorite recipes (cached per user until favorites change)"""
+        cache_key = _favorites_key(user_id)
+        cached_page = await cache_hget(cache_key, str(limit))
+        if cached_page is not None:
+            return cached_page
+        
+        favorites = db.query(Recipe).options(
+            selectinload(Recipe.ingredients)
+        ).join(
             RecipeFavorite,
             Recipe.id == RecipeFavorite.recipe_id
         ).filter(
@@ -370,47 +466,113 @@ class RecipeService:
             Recipe.is_active == True
         ).order_by(desc(RecipeFavorite.created_at)).limit(limit).all()
         
-        return favorites
+        page = _serialize_recipes(favorites)
+        await cache_hset(cache_key, str(limit), page, USER_LIST_CACHE_TTL)
+        return page
     
     @staticmethod
     async def get_recommended_recipes(
         db: Session,
         user_id: UUID,
         limit: int = 20
-    ) -> List[Recipe]:
+    ) -> List[Dict]:
         """
         Get personalized recipe recommendations
         
+        Cached per user for an hour; favoriting or rating invalidates it.
+        
         Based on:
         - User's health conditions
         - Dietary preferences
         - Past favorites and ratings
         - Nutritional goals
         """
+        cache_key = _recommendations_key(user_id)
+        cached_page = await cache_hget(cache_key, str(limit))
+        if cached_page is not None:
+            return cached_page
+        
         # TODO: Implement personalized recommendations
         # For now, return highly rated recipes
-        recipes = db.query(Recipe).filter(
+        recipes = db.query(Recipe).options(
+            selectinload(Recipe.ingredients)
+        ).filter(
             Recipe.is_active == True,
             Recipe.rating_avg >= 4.0
         ).order_by(desc(Recipe.rating_avg)).limit(limit).all()
         
-        return recipes
+        page = _serialize_recipes(recipes)
+        await cache_hset(cache_key, str(limit), page, USER_LIST_CACHE_TTL)
+        return page
     
     @staticmethod
     async def _update_recipe_rating(db: Session, recipe_id: UUID):
-        """Recalculate recipe average rating"""
-        from sqlalchemy import func
-        
-        result = db.query(
-            func.avg(RecipeRating.rating).label('avg_rating'),
-            func.count(RecipeRating.id).label('count')
-        ).filter(RecipeRating.recipe_id == recipe_id).first()
-        
-        recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
-        if recipe:
-            recipe.rating_avg = float(result.avg_rating) if result.avg_rating else 0.0
-            recipe.rating_count = result.count
-            db.commit()
+        """
+        Recalculate recipe average rating
+        
+        Single UPDATE with correlated aggregates; the caller commits.
+        """
+        ratings = RecipeRating.recipe_id == recipe_id
+        db.execute(
+            update(Recipe)
+            .where(Recipe.id == recipe_id)
+            .values(
+                rating_avg=select(
+                    func.coalesce(func.avg(RecipeRating.rating), 0.0)
+                ).where(ratings).scalar_subquery(),
+                rating_count=select(
+                    func.count(RecipeRating.id)
+                ).where(ratings).scalar_subquery()
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    @staticmethod
+    async def _adjust_favorite_count(db: Session, recipe_id: UUID, delta: int):
+        """Count a favorite change in Redis, or directly in Postgres if Redis is down"""
+        if await incr_counter(RECIPE_FAVORITES_KEY, str(recipe_id), delta):
+            return
+        
+        db.execute(
+            update(Recipe)
+            .where(Recipe.id == recipe_id)
+            .values(favorite_count=func.greatest(Recipe.favorite_count + delta, 0))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    
+    @staticmethod
+    async def flush_engagement_counters(db: AsyncSession) -> int:
+        """
+        Apply pending view/favorite deltas from Redis to the recipes table
+        
+        Run periodically; returns the number of recipe rows updated. Each
+        counter is committed on its own, and its Redis deltas are only
+        discarded once that commit succeeds.
+        """
+        updated = 0
+        for key, column in (
+            (RECIPE_VIEWS_KEY, Recipe.view_count),
+            (RECIPE_FAVORITES_KEY, Recipe.favorite_count),
+        ):
+            async with drain_counters(key) as deltas:
+                if not deltas:
+                    continue
+                try:
+                    for recipe_id, delta in deltas.items():
+                        await db.execute(
+                            update(Recipe)
+                            .where(Recipe.id == UUID(recipe_id))
+                            .values({column.key: func.greatest(column + delta, 0)})
+                            .execution_options(synchronize_session=False)
+                        )
+                    await db.commit()
+                except Exception:
+                    await db.rollback()
+                    raise
+                updated += len(deltas)
+        
+        return updated
     
     @staticmethod
     async def _calculate_nutrition(db: Session, recipe_id: UUID):
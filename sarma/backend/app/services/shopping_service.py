@@ -1,13 +1,18 @@
 """
 Shopping List and Multi-Store Integration Service
 """
-from typing import List, Optional, Dict
-from uuid import UUID
+import re
+from functools import lru_cache
+from typing import List, Optional, Dict, Sequence
+from uuid import UUID, uuid4
 from datetime import datetime, date
 from decimal import Decimal
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import String, desc, and_, func, insert, select, bindparam, column, true, values
+from sqlalchemy.engine import Row
 
+from app.core.cache import cache_get_many, cache_set_many, make_cache_key
 from app.models.shopping import (
     ShoppingList,
     ShoppingListItem,
@@ -19,6 +24,167 @@ from app.models.shopping import (
 )
 from app.models.recipe import Recipe, RecipeIngredient
 
+# Recipes per chunk when streaming recipes into a shopping list
+RECIPE_STREAM_CHUNK = 100
+
+# Built once; the expanding "ids" parameter keeps one cached statement for any list length
+RECIPES_WITH_INGREDIENTS = select(Recipe).options(
+    selectinload(Recipe.ingredients)
+).where(
+    Recipe.id.in_(bindparam("ids", expanding=True)),
+    Recipe.is_active.is_(True)
+)
+
+# Only the fields product matching needs; rows come back as tuples, not ORM objects
+PRODUCT_MATCH_COLUMNS = (
+    StoreProduct.id,
+    StoreProduct.product_name,
+    StoreProduct.price,
+    StoreProduct.brand,
+)
+
+# Seconds an ingredient -> store product match stays cached in Redis
+PRODUCT_MATCH_CACHE_TTL = 3600
+
+# Ingredient keywords per category, in priority order (first category wins)
+PRODUCE = frozenset({
+    "lettuce", "tomato", "onion", "carrot", "pepper", "spinach",
+    "kale", "broccoli", "cauliflower", "cucumber", "apple", "banana",
+    "orange", "berry", "avocado", "zucchini", "squash"
+})
+MEAT = frozenset({
+    "chicken", "beef", "pork", "turkey", "fish", "salmon",
+    "tuna", "shrimp", "lamb", "steak"
+})
+DAIRY = frozenset({"milk", "cheese", "yogurt", "butter", "cream", "egg"})
+PANTRY = frozenset({
+    "rice", "pasta", "flour", "sugar", "salt", "pepper",
+    "oil", "vinegar", "sauce", "spice"
+})
+BAKERY = frozenset({"bread", "bagel", "tortilla", "bun", "roll"})
+
+CATEGORY_KEYWORDS = (
+    ("produce", PRODUCE),
+    ("meat", MEAT),
+    ("dairy", DAIRY),
+    ("pantry", PANTRY),
+    ("bakery", BAKERY),
+)
+
+CATEGORY_PRIORITY = {category: rank for rank, (category, _) in enumerate(CATEGORY_KEYWORDS)}
+
+# One automaton for every keyword; the lookahead reports overlapping matches and
+# the alternation order picks the highest-priority category at each position
+CATEGORY_RE = re.compile(
+    "(?=" + "|".join(
+        f"(?P<{category}>{'|'.join(map(re.escape, sorted(keywords)))})"
+        for category, keywords in CATEGORY_KEYWORDS
+    ) + ")"
+)
+
+
+@lru_cache(maxsize=4096)
+def _categorize(name_lower: str) -> str:
+    """
+    Category for a lowercased ingredient name
+    
+    Keywords match as substrings so plurals and compounds ("tomatoes",
+    "buttermilk") still categorize. Names repeat heavily across lists,
+    so results are cached.
+    """
+    categories = {match.lastgroup for match in CATEGORY_RE.finditer(name_lower)}
+    if not categories:
+        return "other"
+    return min(categories, key=CATEGORY_PRIORITY.__getitem__)
+
+
+def _product_match_key(name_lower: str, store_ids: Optional[Sequence[UUID]]) -> str:
+    # Matches depend on which stores were searched, so the scope is part of the key
+    stores = sorted(map(str, store_ids)) if store_ids else None
+    return make_cache_key("match", {"name": name_lower, "stores": stores})
+
+
+def _best_product_per_name(db: Session, names: List[str], *criteria) -> Dict[str, Row]:
+    """
+    Best in-stock product containing each name, as one LATERAL lookup per name
+    
+    Each lookup is an ILIKE served by the trigram index, ordered by trigram
+    similarity (an exact name scores 1.0) then shortest product name, and
+    LIMIT 1, so a short name like "oil" never loads its whole candidate set.
+    """
+    wanted = values(column("name", String), name="wanted").data([(name,) for name in names])
+    best = select(*PRODUCT_MATCH_COLUMNS).where(
+        StoreProduct.in_stock == True,
+        StoreProduct.product_name.ilike("%" + wanted.c.name + "%"),
+        *criteria
+    ).order_by(
+        desc(func.similarity(StoreProduct.product_name, wanted.c.name)),
+        func.length(StoreProduct.product_name)
+    ).limit(1).lateral("best")
+    
+    rows = db.execute(
+        select(wanted.c.name, *best.c).select_from(wanted.join(best, true()))
+    ).all()
+    return {row.name: row for row in rows}
+
+
+def _scale_quantities(
+    quantities: List[float],
+    recipe_index: List[int],
+    multipliers: List[float]
+) -> np.ndarray:
+    """Scale each ingredient quantity by its recipe's servings multiplier"""
+    return (
+        np.asarray(quantities, dtype=np.float64)
+        * np.asarray(multipliers, dtype=np.float64)[np.asarray(recipe_index, dtype=np.intp)]
+    )
+
+
+def _consolidate_ingredients(
+    names: List[str],
+    units: List[str],
+    quantities: Sequence[float]
+) -> List[Dict]:
+    """
+    Sum quantities of the same ingredient (case-insensitive) in the same unit
+    
+    Groups keep first-seen order and the first-seen spelling of the name;
+    the same ingredient in different units stays as separate items.
+    """
+    if not names:
+        return []
+    
+    keys = np.array(
+        [f"{name.lower()}\x00{unit}" for name, unit in zip(names, units)],
+        dtype=object
+    )
+    _, first_index, group_ids = np.unique(keys, return_index=True, return_inverse=True)
+    totals = np.bincount(
+        group_ids,
+        weights=np.asarray(quantities, dtype=np.float64),
+        minlength=first_index.size
+    )
+    
+    order = np.argsort(first_index, kind="stable")
+    return [
+        {
+            "name": names[first_index[group]],
+            "quantity": float(totals[group]),
+            "unit": units[first_index[group]]
+        }
+        for group in order
+    ]
+
+
+def _to_cents(price) -> int:
+    """Price (Decimal or float dollars) as integer cents"""
+    return int(round(price * 100))
+
+
+def _from_cents(cents: int) -> Decimal:
+    """Integer cents as an exact two-place Decimal for Numeric columns"""
+    return Decimal(cents).scaleb(-2)
+
 
 class ShoppingService:
     """Service for shopping list generation and multi-store ordering"""
@@ -28,7 +194,8 @@ class ShoppingService:
         db: Session,
         user_id: UUID,
         recipe_ids: List[UUID],
-        servings_multiplier: Dict[UUID, float] = None
+        servings_multiplier: Dict[UUID, float] = None,
+        store_ids: Optional[List[UUID]] = None
     ) -> ShoppingList:
         """
         Generate shopping list from selected recipes
@@ -38,89 +205,93 @@ class ShoppingService:
         2. Consolidate duplicate ingredients
         3. Adjust quantities for servings
         4. Categorize items
-        5. Match to store products
+        5. Match to store products (store_ids, or every active store)
         """
         
-        # Get recipes
-        recipes = db.query(Recipe).filter(
-            Recipe.id.in_(recipe_ids),
-            Recipe.is_active == True
-        ).all()
+        # Collect ingredients as parallel columns, then consolidate in one pass
+        names: List[str] = []
+        units: List[str] = []
+        quantities: List[float] = []
+        recipe_index: List[int] = []  # position of each ingredient's recipe
+        multipliers: List[float] = []  # servings multiplier per recipe
+        
+        # Stream recipes in chunks; selectinload stays compatible with yield_per
+        recipes = db.execute(
+            RECIPES_WITH_INGREDIENTS,
+            {"ids": list(recipe_ids)},
+            execution_options={"stream_results": True, "yield_per": RECIPE_STREAM_CHUNK}
+        ).scalars()
         
-        if not recipes:
+        for recipe in recipes:
+            position = len(multipliers)
+            multipliers.append(
+                servings_multiplier.get(recipe.id, 1.0) if servings_multiplier else 1.0
+            )
+            
+            for ingredient in recipe.ingredients:
+                names.append(ingredient.name)
+                units.append(ingredient.unit)
+                quantities.append(ingredient.quantity)
+                recipe_index.append(position)
+        
+        if not multipliers:
             return None
         
-        # Create shopping list
-        shopping_list = ShoppingList(
-            user_id=user_id,
-            title=f"Shopping List - {datetime.utcnow().strftime('%Y-%m-%d')}",
-            recipe_ids=recipe_ids,
-            week_start_date=datetime.utcnow(),
-            is_active=True
+        consolidated = _consolidate_ingredients(
+            names,
+            units,
+            _scale_quantities(quantities, recipe_index, multipliers)
         )
         
-        db.add(shopping_list)
-        db.flush()
+        # Match every ingredient to a store product in one batch
+        matches = await ShoppingService._match_to_store_products(
+            db, [ing_data["name"] for ing_data in consolidated], store_ids
+        )
         
-        # Collect and consolidate ingredients
-        ingredient_map = {}  # {ingredient_name: {quantity, unit, recipe_ids}}
+        # Assign the list id up front so item rows can reference it without a flush
+        shopping_list_id = uuid4()
         
-        for recipe in recipes:
-            multiplier = servings_multiplier.get(recipe.id, 1.0) if servings_multiplier else 1.0
-            
-            for ingredient in recipe.ingredients:
-                key = ingredient.name.lower()
-                
-                if key in ingredient_map:
-                    # Consolidate quantities (if same unit)
-                    if ingredient_map[key]["unit"] == ingredient.unit:
-                        ingredient_map[key]["quantity"] += ingredient.quantity * multiplier
-                    else:
-                        # Different unit - create separate item
-                        key = f"{ingredient.name.lower()}_{ingredient.unit}"
-                        ingredient_map[key] = {
-                            "name": ingredient.name,
-                            "quantity": ingredient.quantity * multiplier,
-                            "unit": ingredient.unit,
-                            "recipe_ids": [recipe.id]
-                        }
-                else:
-                    ingredient_map[key] = {
-                        "name": ingredient.name,
-                        "quantity": ingredient.quantity * multiplier,
-                        "unit": ingredient.unit,
-                        "recipe_ids": [recipe.id]
-                    }
-        
-        # Create shopping list items
-        total_estimated_cost = Decimal(0)
-        
-        for ing_data in ingredient_map.values():
+        # Build shopping list item rows; totals accumulate in integer cents
+        total_estimated_cents = 0
+        item_rows = []
+        
+        for ing_data in consolidated:
             # Categorize ingredient
             category = ShoppingService._categorize_ingredient(ing_data["name"])
+            matched_product = matches.get(ing_data["name"].lower())
             
-            # Match to store product
-            matched_product = await ShoppingService._match_to_store_product(
-                db, ing_data["name"]
-            )
-            
-            item = ShoppingListItem(
-                shopping_list_id=shopping_list.id,
-                item_name=ing_data["name"],
-                quantity=ing_data["quantity"],
-                unit=ing_data["unit"],
-                category=category,
-                matched_product_id=matched_product["id"] if matched_product else None,
-                product_name=matched_product["name"] if matched_product else None,
-                estimated_price=matched_product["price"] if matched_product else None
-            )
-            
-            db.add(item)
+            item_rows.append({
+                "shopping_list_id": shopping_list_id,
+                "item_name": ing_data["name"],
+                "quantity": ing_data["quantity"],
+                "unit": ing_data["unit"],
+                "category": category,
+                "matched_product_id": matched_product["id"] if matched_product else None,
+                "product_name": matched_product["name"] if matched_product else None,
+                "estimated_price": matched_product["price"] if matched_product else None
+            })
             
             if matched_product and matched_product["price"]:
-                total_estimated_cost += Decimal(str(matched_product["price"]))
+                total_estimated_cents += _to_cents(matched_product["price"])
+        
+        # Create shopping list with its final total, so it is written by one INSERT
+        shopping_list = ShoppingList(
+            id=shopping_list_id,
+            user_id=user_id,
+            title=f"Shopping List - {datetime.utcnow().strftime('%Y-%m-%d')}",
+            recipe_ids=recipe_ids,
+            week_start_date=datetime.utcnow(),
+            estimated_total=_from_cents(total_estimated_cents),
+            is_active=True
+        )
+        db.add(shopping_list)
+        
+        # Sessions don't autoflush, so write the list before its items reference it
+        db.flush()
         
-        shopping_list.estimated_total = total_estimated_cost
+        # Add items with one multi-row INSERT
+        if item_rows:
+            db.execute(insert(ShoppingListItem), item_rows)
         
         db.commit()
         db.refresh(shopping_list)
@@ -146,7 +317,9 @@ class ShoppingService:
         - Kroger
         """
         
-        shopping_list = db.query(ShoppingList).filter(
+        shopping_list = db.query(ShoppingList).options(
+            selectinload(ShoppingList.items)
+        ).filter(
             ShoppingList.id == shopping_list_id,
             ShoppingList.user_id == user_id
         ).first()
@@ -182,33 +355,39 @@ class ShoppingService:
         db.add(order)
         db.flush()
         
-        # Add order items from shopping list
-        subtotal = Decimal(0)
-        
-        for list_item in shopping_list.items:
-            if not list_item.is_checked:
-                # Find best matching product at this store
-                product = await ShoppingService._find_store_product(
-                    db, store_id, list_item.item_name
-                )
-                
-                if product:
-                    order_item = ShoppingOrderItem(
-                        order_id=order.id,
-                        product_id=product.id,
-                        product_name=product.product_name,
-                        product_brand=product.brand,
-                        quantity=int(list_item.quantity) or 1,
-                        unit_price=product.price,
-                        total_price=product.price * (int(list_item.quantity) or 1)
-                    )
-                    
-                    db.add(order_item)
-                    subtotal += order_item.total_price
+        # Find best matching products at this store for all unchecked items
+        unchecked = [item for item in shopping_list.items if not item.is_checked]
+        products = await ShoppingService._find_store_products(
+            db, store_id, [item.item_name for item in unchecked]
+        )
+        
+        # Build order item rows from shopping list; subtotal in integer cents
+        subtotal_cents = 0
+        order_item_rows = []
+        
+        for list_item in unchecked:
+            product = products.get(list_item.item_name.lower())
+            
+            if product:
+                quantity = int(list_item.quantity) or 1
+                total_cents = _to_cents(product.price) * quantity
+                order_item_rows.append({
+                    "order_id": order.id,
+                    "product_id": product.id,
+                    "product_name": product.product_name,
+                    "product_brand": product.brand,
+                    "quantity": quantity,
+                    "unit_price": product.price,
+                    "total_price": _from_cents(total_cents)
+                })
+                subtotal_cents += total_cents
+        
+        # Add order items (bulk INSERT, no per-row ORM state)
+        db.bulk_insert_mappings(ShoppingOrderItem, order_item_rows)
         
         # Calculate totals
-        order.subtotal = subtotal
-        order.tax = subtotal * Decimal("0.08")  # 8% tax
+        order.subtotal = _from_cents(subtotal_cents)
+        order.tax = order.subtotal * Decimal("0.08")  # 8% tax
         order.total = order.subtotal + order.tax + order.delivery_fee
         
         db.commit()
@@ -312,72 +491,92 @@ class ShoppingService:
     @staticmethod
     def _categorize_ingredient(ingredient_name: str) -> str:
         """Categorize ingredient for organization"""
-        name_lower = ingredient_name.lower()
-        
-        # Produce
-        produce_keywords = ["lettuce", "tomato", "onion", "carrot", "pepper", "spinach", 
-                           "kale", "broccoli", "cauliflower", "cucumber", "apple", "banana",
-                           "orange", "berry", "avocado", "zucchini", "squash"]
-        if any(kw in name_lower for kw in produce_keywords):
-            return "produce"
-        
-        # Meat
-        meat_keywords = ["chicken", "beef", "pork", "turkey", "fish", "salmon", 
-                        "tuna", "shrimp", "lamb", "steak"]
-        if any(kw in name_lower for kw in meat_keywords):
-            return "meat"
-        
-        # Dairy
-        dairy_keywords = ["milk", "cheese", "yogurt", "butter", "cream", "egg"]
-        if any(kw in name_lower for kw in dairy_keywords):
-            return "dairy"
-        
-        # Pantry
-        pantry_keywords = ["rice", "pasta", "flour", "sugar", "salt", "pepper", 
-                          "oil", "vinegar", "sauce", "spice"]
-        if any(kw in name_lower for kw in pantry_keywords):
-            return "pantry"
-        
-        # Bakery
-        bakery_keywords = ["bread", "bagel", "tortilla", "bun", "roll"]
-        if any(kw in name_lower for kw in bakery_keywords):
-            return "bakery"
-        
-        return "other"
+        return _categorize(ingredient_name.lower())
     
     @staticmethod
-    async def _match_to_store_product(
+    async def _match_to_store_products(
         db: Session,
-        ingredient_name: str
-    ) -> Optional[Dict]:
-        """Match ingredient to store product"""
+        ingredient_names: List[str],
+        store_ids: Optional[List[UUID]] = None
+    ) -> Dict[str, Dict]:
+        """
+        Match ingredients to in-stock store products, keyed by lowercased name
+        
+        Only the given stores are searched, or every active store when none
+        are given. All names are resolved in one query that returns at most
+        one product per name (see _best_product_per_name). Matches and misses
+        are cached in Redis for PRODUCT_MATCH_CACHE_TTL.
+        """
         # Simple text matching for now
         # TODO: Implement smart matching with ML
-        
-        product = db.query(StoreProduct).filter(
-            StoreProduct.product_name.ilike(f"%{ingredient_name}%"),
-            StoreProduct.in_stock == True
-        ).first()
-        
-        if product:
-            return {
+        names = list(dict.fromkeys(name.lower() for name in ingredient_names))
+        if not names:
+            return {}
+        
+        # Names repeat heavily across lists; reuse cached matches (and misses)
+        cache_keys = [_product_match_key(name, store_ids) for name in names]
+        cached_matches = await cache_get_many(cache_keys)
+        
+        results = {}
+        remaining = []
+        for name, hit in zip(names, cached_matches):
+            if hit is None:
+                remaining.append(name)
+            elif hit:
+                results[name] = {
+                    **hit,
+                    "id": UUID(hit["id"]),
+                    "price": Decimal(hit["price"])
+                }
+        
+        if not remaining:
+            return results
+        
+        if store_ids:
+            store_scope = StoreProduct.store_id.in_(store_ids)
+        else:
+            store_scope = StoreProduct.store_id.in_(
+                select(Store.id).where(Store.is_active == True)
+            )
+        matches = _best_product_per_name(db, remaining, store_scope)
+        
+        to_cache = {}
+        for name in remaining:
+            product = matches.get(name)
+            if product is None:
+                # Empty dict marks a cached miss
+                to_cache[_product_match_key(name, store_ids)] = {}
+                continue
+            
+            results[name] = {
                 "id": product.id,
                 "name": product.product_name,
                 "price": product.price,
                 "brand": product.brand
             }
+            to_cache[_product_match_key(name, store_ids)] = {
+                **results[name],
+                "price": str(product.price)
+            }
+        
+        await cache_set_many(to_cache, PRODUCT_MATCH_CACHE_TTL)
         
-        return None
+        return results
     
     @staticmethod
-    async def _find_store_product(
+    async def _find_store_products(
         db: Session,
         store_id: UUID,
-        product_name: str
-    ) -> Optional[StoreProduct]:
-        """Find product at specific store"""
-        return db.query(StoreProduct).filter(
-            StoreProduct.store_id == store_id,
-            StoreProduct.product_name.ilike(f"%{product_name}%"),
-            StoreProduct.in_stock == True
-        ).first()
+        product_names: List[str]
+    ) -> Dict[str, Row]:
+        """
+        Find products at a specific store, keyed by lowercased search name
+        
+        One query covers every name and returns at most one product per
+        name, the closest trigram match (see _best_product_per_name).
+        """
+        names = list(dict.fromkeys(name.lower() for name in product_names))
+        if not names:
+            return {}
+        
+        return _best_product_per_name(db, names, StoreProduct.store_id == store_id)
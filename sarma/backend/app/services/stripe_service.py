@@ -3,13 +3,19 @@ Stripe Payment Service
 Handle subscriptions, checkouts, and webhooks
 """
 
+import asyncio
+import hashlib
+import hmac
 import os
+import time
+import orjson
 import stripe
 from typing import Optional, Dict, List
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from ..core.cache import cache_get, cache_set
 from ..models.user import User
 from ..models.subscription import Subscription, SubscriptionTier, SubscriptionStatus, Payment
 
@@ -17,6 +23,70 @@ from ..models.subscription import Subscription, SubscriptionTier, SubscriptionSt
 # Initialize Stripe
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 
+# Stripe subscription status -> local status
+STATUS_MAP = {
+    "active": SubscriptionStatus.ACTIVE,
+    "canceled": SubscriptionStatus.CANCELED,
+    "past_due": SubscriptionStatus.PAST_DUE,
+    "trialing": SubscriptionStatus.TRIALING,
+    "incomplete": SubscriptionStatus.INCOMPLETE,
+}
+
+# Maximum age in seconds of a signed webhook (Stripe's default tolerance)
+WEBHOOK_TOLERANCE = 300
+
+# Seconds a retrieved Stripe subscription's billing period is reused across webhooks
+STRIPE_SUBSCRIPTION_CACHE_TTL = 60
+
+# Seconds an invoice -> subscription id mapping is remembered for payment webhooks
+STRIPE_INVOICE_CACHE_TTL = 86400
+
+
+async def _retrieve_subscription_period(stripe_subscription_id: str) -> Dict:
+    """
+    Billing period of a Stripe subscription, as epoch seconds
+    
+    The SDK call is blocking, so it runs in a worker thread; results are
+    cached briefly so back-to-back webhooks for one subscription share it.
+    """
+    cache_key = f"stripe:subscription:{stripe_subscription_id}"
+    period = await cache_get(cache_key)
+    if period is not None:
+        return period
+    
+    stripe_subscription = await asyncio.to_thread(
+        stripe.Subscription.retrieve, stripe_subscription_id
+    )
+    period = {
+        "current_period_start": stripe_subscription.current_period_start,
+        "current_period_end": stripe_subscription.current_period_end,
+    }
+    await cache_set(cache_key, period, STRIPE_SUBSCRIPTION_CACHE_TTL)
+    return period
+
+
+def _invoice_subscription_key(invoice_id: str) -> str:
+    return f"stripe:invoice:{invoice_id}"
+
+
+async def _invoice_subscription_id(invoice_id: str) -> Optional[str]:
+    """
+    Stripe subscription id that an invoice belongs to
+    
+    Checkout completion records the mapping for the first invoice, so the
+    usual payment webhook skips the Stripe round trip; otherwise the invoice
+    is retrieved in a worker thread and the mapping cached.
+    """
+    cache_key = _invoice_subscription_key(invoice_id)
+    subscription_id = await cache_get(cache_key)
+    if subscription_id is not None:
+        return subscription_id
+    
+    invoice = await asyncio.to_thread(stripe.Invoice.retrieve, invoice_id)
+    if invoice.subscription:
+        await cache_set(cache_key, invoice.subscription, STRIPE_INVOICE_CACHE_TTL)
+    return invoice.subscription
+
 
 class StripeService:
     """Stripe payment service"""
@@ -198,13 +268,21 @@ class StripeService:
         subscription.stripe_subscription_id = session["subscription"]
         subscription.amount = StripeService.PRICES[tier]
         
+        # Remember the first invoice's subscription for the payment webhook
+        if session.get("invoice"):
+            await cache_set(
+                _invoice_subscription_key(session["invoice"]),
+                session["subscription"],
+                STRIPE_INVOICE_CACHE_TTL
+            )
+        
         # Get subscription details from Stripe
-        stripe_subscription = stripe.Subscription.retrieve(session["subscription"])
+        period = await _retrieve_subscription_period(session["subscription"])
         subscription.current_period_start = datetime.fromtimestamp(
-            stripe_subscription.current_period_start
+            period["current_period_start"]
         )
         subscription.current_period_end = datetime.fromtimestamp(
-            stripe_subscription.current_period_end
+            period["current_period_end"]
         )
         
         # Set limits
@@ -241,14 +319,7 @@ class StripeService:
             return
         
         # Update status
-        status_map = {
-            "active": SubscriptionStatus.ACTIVE,
-            "canceled": SubscriptionStatus.CANCELED,
-            "past_due": SubscriptionStatus.PAST_DUE,
-            "trialing": SubscriptionStatus.TRIALING,
-            "incomplete": SubscriptionStatus.INCOMPLETE,
-        }
-        subscription.status = status_map.get(
+        subscription.status = STATUS_MAP.get(
             subscription_data["status"],
             SubscriptionStatus.ACTIVE
         )
@@ -313,13 +384,15 @@ class StripeService:
         if not invoice_id:
             return
         
-        # Get invoice
-        invoice = stripe.Invoice.retrieve(invoice_id)
+        # Resolve the invoice's subscription (cached, or retrieved off the event loop)
+        stripe_subscription_id = await _invoice_subscription_id(invoice_id)
+        if not stripe_subscription_id:
+            return
         
         # Find subscription
         result = await db.execute(
             select(Subscription).where(
-                Subscription.stripe_subscription_id == invoice.subscription
+                Subscription.stripe_subscription_id == stripe_subscription_id
             )
         )
         subscription = result.scalar_one_or_none()
@@ -398,6 +471,9 @@ class StripeService:
         """
         Verify Stripe webhook signature
         
+        Checks the v1 HMAC-SHA256 and timestamp tolerance per Stripe's
+        scheme directly, without building an SDK Event object.
+        
         Args:
             payload: Request body
             sig_header: Stripe signature header
@@ -409,12 +485,32 @@ class StripeService:
         if not webhook_secret:
             raise ValueError("STRIPE_WEBHOOK_SECRET not configured")
         
+        # Stripe-Signature: t=<timestamp>,v1=<hex hmac>[,v1=...]
+        timestamp = None
+        signatures = []
+        for part in sig_header.split(","):
+            key, _, value = part.strip().partition("=")
+            if key == "t":
+                timestamp = value
+            elif key == "v1":
+                signatures.append(value)
+        
+        if not timestamp or not timestamp.isdigit() or not signatures:
+            raise ValueError("Invalid signature")
+        
+        mac = hmac.new(webhook_secret.encode(), digestmod=hashlib.sha256)
+        mac.update(timestamp.encode())
+        mac.update(b".")
+        mac.update(payload)
+        expected = mac.hexdigest()
+        
+        if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+            raise ValueError("Invalid signature")
+        
+        if abs(time.time() - int(timestamp)) > WEBHOOK_TOLERANCE:
+            raise ValueError("Invalid signature")
+        
         try:
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, webhook_secret
-            )
-            return event
-        except ValueError:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
             raise ValueError("Invalid payload")
-        except stripe.error.SignatureVerificationError:
-            raise ValueError("Invalid signature")
@@ -1,16 +1,272 @@
 """
 Vector Embedding and Semantic Search Service
 """
+import hashlib
+import io
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from typing import List, Optional, Dict
 from uuid import UUID
-from sqlalchemy.orm import Session
+import numpy as np
+import orjson
+from sqlalchemy.orm import Session, defer, selectinload
+from sqlalchemy import delete, event, func, inspect, or_, and_, desc, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.recipe import Recipe
+from app.core.cache import cache_get_many, cache_set_many
+from app.core.openai_client import openai_client
+from app.models.recipe import Recipe, RecipeIngredient, RecipeTag, RagQueryCache
+from app.models.system_setting import SystemSetting
+
+logger = logging.getLogger(__name__)
+
+# SystemSetting key holding the id of the in-flight Batch API embedding job
+EMBEDDING_BATCH_SETTING = "embedding_batch_job_id"
+
+# Batch API accepts at most 50,000 requests per input file
+EMBEDDING_BATCH_MAX_REQUESTS = 50000
+
+# Recipes embedded and committed per round in batch_generate_embeddings
+EMBEDDING_STREAM_CHUNK = 500
+
+# Embeddings keyed by content hash; unchanged text never hits the API twice
+EMBEDDING_CACHE_TTL = 30 * 24 * 3600
+
+# In-process LRU of recent search query embeddings (float16 bytes, ~3KB each)
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+
+# Semantic RAG cache: a query within this cosine similarity of a cached one
+# reuses its results; entries older than RAG_CACHE_TTL are ignored, then pruned
+RAG_CACHE_SIMILARITY = 0.97
+RAG_CACHE_TTL = 6 * 3600
+
+# Editing a recipe drops cached queries within this cosine distance of it
+RAG_CACHE_INVALIDATE_DISTANCE = 0.6
+
+# Recipe columns that feed _combine_recipe_text
+EMBEDDING_TEXT_FIELDS = (
+    "title",
+    "description",
+    "dietary_type",
+    "is_diabetic_friendly",
+    "is_heart_healthy",
+    "is_gluten_free",
+    "is_dairy_free",
+)
+
+# Session.info key collecting recipe ids whose embedding_text needs rebuilding
+_STALE_EMBEDDING_TEXT = "stale_embedding_text"
+
+# SHA-256 of embedding_text computed in Postgres; matches _text_hash
+EMBEDDING_TEXT_HASH = func.encode(
+    func.sha256(func.convert_to(Recipe.embedding_text, "UTF8")), "hex"
+)
+
+
+class EmptyEmbeddingError(Exception):
+    """Embedding came back as a zero vector (failed request or unconfigured client)"""
+
+
+# Health flags appended to the embedding text, highest bit of the key first
+RECIPE_TEXT_FLAGS = (
+    ("is_diabetic_friendly", "diabetic friendly"),
+    ("is_heart_healthy", "heart healthy"),
+    ("is_gluten_free", "gluten free"),
+    ("is_dairy_free", "dairy free"),
+)
+
+# Flag bitmap -> precomputed suffix, so formatting does a lookup instead of four branches
+_RECIPE_FLAG_SUFFIXES = tuple(
+    "".join(
+        f" {phrase}"
+        for bit, (_, phrase) in enumerate(RECIPE_TEXT_FLAGS)
+        if key >> (len(RECIPE_TEXT_FLAGS) - 1 - bit) & 1
+    )
+    for key in range(1 << len(RECIPE_TEXT_FLAGS))
+)
+
+
+def _combine_recipe_text(recipe: Recipe) -> str:
+    """Text embedded for a recipe: title, description, ingredients, tags, dietary info"""
+    text_parts = [
+        recipe.title,
+        recipe.description or "",
+    ]
+    
+    # Add ingredient names
+    if recipe.ingredients:
+        text_parts.append(" ".join([ing.name for ing in recipe.ingredients]))
+    
+    # Add tags
+    if recipe.tags:
+        text_parts.append(" ".join([tag.tag for tag in recipe.tags]))
+    
+    # Add dietary info
+    text_parts.append(f"dietary type: {recipe.dietary_type}")
+    
+    flags = (
+        bool(recipe.is_diabetic_friendly) << 3
+        | bool(recipe.is_heart_healthy) << 2
+        | bool(recipe.is_gluten_free) << 1
+        | bool(recipe.is_dairy_free)
+    )
+    return " ".join(text_parts) + _RECIPE_FLAG_SUFFIXES[flags]
+
+
+def normalize_embedding(embedding) -> np.ndarray:
+    """
+    L2-normalized float32 copy of an embedding; zero vectors stay zero
+    
+    Stored and query embeddings are unit length, so cosine similarity is
+    the plain inner product that pgvector's <#> operator computes.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _embedding_cache_key(text_hash: str) -> str:
+    # Model and size are part of the key so a model change cannot serve stale vectors
+    return f"embedding:{openai_client.embedding_model}:1536:{text_hash}"
+
+
+async def _embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embeddings for texts in order, reusing cached vectors for unchanged text
+    
+    Only cache misses go to the API (in one batched request); zero vectors
+    from failed requests are returned but never cached.
+    """
+    keys = [_embedding_cache_key(_text_hash(text)) for text in texts]
+    embeddings = await cache_get_many(keys)
+    
+    misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if misses:
+        fresh = await openai_client.generate_embeddings([texts[i] for i in misses])
+        to_cache = {}
+        for i, embedding in zip(misses, fresh):
+            embeddings[i] = embedding
+            if any(embedding):
+                to_cache[keys[i]] = embedding
+        await cache_set_many(to_cache, EMBEDDING_CACHE_TTL)
+    
+    return embeddings
+
+
+def _embedding_texts(db: Session, rows: List) -> Dict[UUID, str]:
+    """
+    embedding_text per recipe id for (id, embedding_text) rows
+    
+    Recipes stored before the column existed are built from their
+    relationships once and saved with the caller's commit.
+    """
+    texts = {row.id: row.embedding_text for row in rows}
+    missing = [recipe_id for recipe_id, recipe_text in texts.items() if recipe_text is None]
+    if missing:
+        for recipe in db.query(Recipe).options(
+            selectinload(Recipe.ingredients),
+            selectinload(Recipe.tags)
+        ).filter(Recipe.id.in_(missing)):
+            recipe.embedding_text = texts[recipe.id] = _combine_recipe_text(recipe)
+    return texts
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_stale_embedding_text(session, flush_context):
+    """Note recipes whose text inputs changed in this flush (pre-flush state is still visible)"""
+    stale = set()
+    for obj in session.new:
+        if isinstance(obj, Recipe):
+            stale.add(obj.id)
+        elif isinstance(obj, (RecipeIngredient, RecipeTag)):
+            stale.add(obj.recipe_id)
+    
+    for obj in session.dirty:
+        if isinstance(obj, Recipe):
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in EMBEDDING_TEXT_FIELDS):
+                stale.add(obj.id)
+        elif isinstance(obj, (RecipeIngredient, RecipeTag)):
+            stale.add(obj.recipe_id)
+    
+    for obj in session.deleted:
+        if isinstance(obj, (RecipeIngredient, RecipeTag)):
+            stale.add(obj.recipe_id)
+    
+    stale.discard(None)
+    if stale:
+        session.info.setdefault(_STALE_EMBEDDING_TEXT, set()).update(stale)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _refresh_stale_embedding_text(session, flush_context):
+    """Rebuild embedding_text for recipes noted by the flush; saved by the next flush"""
+    recipe_ids = session.info.pop(_STALE_EMBEDDING_TEXT, None)
+    if recipe_ids:
+        VectorSearchService.refresh_embedding_text(session, recipe_ids)
+
+
+def _user_context_hash(filters: Dict, limit: int) -> str:
+    """Stable hash of everything besides the query that shapes a RAG result"""
+    return hashlib.sha256(
+        orjson.dumps(
+            {"filters": filters, "limit": limit},
+            default=str,
+            option=orjson.OPT_SORT_KEYS
+        )
+    ).hexdigest()
 
 
 class VectorSearchService:
     """Service for vector embeddings and semantic search"""
     
+    # (model, dimensions, query text) -> float16 embedding bytes, most recent last
+    _query_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+    query_cache_hits = 0
+    query_cache_misses = 0
+    
+    # Whether the server's pgvector has hnsw.iterative_scan (0.8+); checked once
+    _iterative_scan: Optional[bool] = None
+    
+    @staticmethod
+    def _supports_iterative_scan(db: Session) -> bool:
+        """Check once whether the installed pgvector is 0.8 or newer"""
+        cls = VectorSearchService
+        if cls._iterative_scan is None:
+            version = db.execute(
+                text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            ).scalar()
+            try:
+                parsed = tuple(int(part) for part in (version or "").split(".")[:2])
+            except ValueError:
+                parsed = ()
+            cls._iterative_scan = parsed >= (0, 8)
+        return cls._iterative_scan
+    
+    @staticmethod
+    def refresh_embedding_text(db: Session, recipe_ids) -> None:
+        """
+        Recompute Recipe.embedding_text for the given recipes
+        
+        Runs automatically after ORM flushes; call it directly after
+        bulk_insert_mappings, which bypasses the session listener.
+        """
+        recipes = db.query(Recipe).options(
+            selectinload(Recipe.ingredients),
+            selectinload(Recipe.tags)
+        ).filter(Recipe.id.in_(list(recipe_ids))).populate_existing()
+        
+        for recipe in recipes:
+            combined_text = _combine_recipe_text(recipe)
+            if recipe.embedding_text != combined_text:
+                recipe.embedding_text = combined_text
+    
     @staticmethod
     async def generate_recipe_embedding(
         recipe_id: UUID,
@@ -19,75 +275,60 @@ class VectorSearchService:
         """
         Generate vector embedding for a recipe
         
-        Uses OpenAI text-embedding-3-small model
-        Combines: title, description, ingredients, tags
+        Uses OpenAI text-embedding-3-small model on the stored
+        embedding_text (title, description, ingredients, tags)
         """
-        recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+        row = db.query(Recipe.id, Recipe.embedding_text).filter(
+            Recipe.id == recipe_id
+        ).first()
         
-        if not recipe:
+        if not row:
             return None
         
-        # Combine recipe text for embedding
-        text_parts = [
-            recipe.title,
-            recipe.description or "",
-        ]
-        
-        # Add ingredient names
-        if recipe.ingredients:
-            ingredient_names = [ing.name for ing in recipe.ingredients]
-            text_parts.append(" ".join(ingredient_names))
-        
-        # Add tags
-        if recipe.tags:
-            tag_names = [tag.tag for tag in recipe.tags]
-            text_parts.append(" ".join(tag_names))
-        
-        # Add dietary info
-        text_parts.append(f"dietary type: {recipe.dietary_type}")
-        
-        if recipe.is_diabetic_friendly:
-            text_parts.append("diabetic friendly")
-        if recipe.is_heart_healthy:
-            text_parts.append("heart healthy")
-        if recipe.is_gluten_free:
-            text_parts.append("gluten free")
-        if recipe.is_dairy_free:
-            text_parts.append("dairy free")
-        
-        combined_text = " ".join(text_parts)
-        
-        # TODO: Generate embedding using OpenAI
-        # embedding = await openai_client.embeddings.create(
-        #     model="text-embedding-3-small",
-        #     input=combined_text,
-        #     dimensions=1536
-        # )
-        # return embedding.data[0].embedding
+        texts = _embedding_texts(db, [row])
+        embeddings = await _embed_texts([texts[row.id]])
         
-        # Mock embedding (1536 dimensions)
-        return [0.0] * 1536
+        # A zero vector has no direction; storing it would poison cosine ranking
+        if not any(embeddings[0]):
+            return None
+        return normalize_embedding(embeddings[0]).tolist()
     
     @staticmethod
     async def generate_query_embedding(
         query_text: str
     ) -> List[float]:
-        """Generate embedding for search query"""
-        
-        # TODO: Generate embedding using OpenAI
-        # embedding = await openai_client.embeddings.create(
-        #     model="text-embedding-3-small",
-        #     input=query_text,
-        #     dimensions=1536
-        # )
-        # return embedding.data[0].embedding
+        """
+        Generate embedding for search query
         
-        # Mock embedding
-        return [0.0] * 1536
+        Recent queries are answered from an in-process LRU. Raises
+        EmptyEmbeddingError when the API returns a zero vector (failed
+        request), which is never cached.
+        """
+        cls = VectorSearchService
+        key = (openai_client.embedding_model, 1536, query_text)
+        
+        cached = cls._query_cache.get(key)
+        if cached is not None:
+            cls._query_cache.move_to_end(key)
+            cls.query_cache_hits += 1
+            return np.frombuffer(cached, dtype=np.float16).astype(np.float32).tolist()
+        
+        cls.query_cache_misses += 1
+        embedding = await openai_client.generate_embedding(query_text)
+        if not any(embedding):
+            raise EmptyEmbeddingError(f"No embedding for query {query_text!r}")
+        
+        packed = normalize_embedding(embedding).astype(np.float16).tobytes()
+        cls._query_cache[key] = packed
+        if len(cls._query_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+            cls._query_cache.popitem(last=False)
+        
+        # Same FP16 rounding on hits and misses
+        return np.frombuffer(packed, dtype=np.float16).astype(np.float32).tolist()
     
     @staticmethod
     async def semantic_search(
-        query_embedding: List[float],
+        query_embedding: Optional[List[float]],
         db: Session,
         limit: int = 20,
         filters: Optional[Dict] = None
@@ -95,26 +336,36 @@ class VectorSearchService:
         """
         Perform semantic search using vector similarity
         
-        Uses pgvector cosine distance for similarity
+        Uses pgvector inner product on unit vectors (cosine). Without a
+        usable embedding (None or all zeros) the ANN query is skipped and
+        filtered recipes come back by rating instead.
         """
-        # TODO: Implement vector search with pgvector
-        # query = db.query(Recipe).filter(Recipe.is_active == True)
+        query = db.query(Recipe).filter(Recipe.is_active == True)
         
         # Apply filters if provided
-        # if filters:
-        #     if "dietary_type" in filters:
-        #         query = query.filter(Recipe.dietary_type == filters["dietary_type"])
-        #     if "max_calories" in filters:
-        #         query = query.filter(Recipe.calories <= filters["max_calories"])
-        
-        # Order by vector similarity
-        # recipes = query.order_by(
-        #     Recipe.embedding.cosine_distance(query_embedding)
-        # ).limit(limit).all()
-        
-        # Fallback to simple query
-        recipes = db.query(Recipe).filter(
-            Recipe.is_active == True
+        if filters:
+            if "dietary_type" in filters:
+                query = query.filter(Recipe.dietary_type == filters["dietary_type"])
+            if "max_calories" in filters:
+                query = query.filter(Recipe.calories <= filters["max_calories"])
+        
+        if query_embedding is None or not np.any(query_embedding):
+            return query.order_by(desc(Recipe.rating_avg), desc(Recipe.id)).limit(limit).all()
+        
+        query = query.filter(Recipe.embedding.isnot(None))
+        
+        # HNSW candidate list must cover the requested page; scoped to this
+        # transaction (set_config, since SET cannot take bind parameters)
+        db.execute(
+            text("SELECT set_config('hnsw.ef_search', :ef, true)"),
+            {"ef": str(max(limit * 2, 40))}
+        )
+        
+        # Order by vector similarity; <#> (negative inner product) matches the
+        # index's halfvec_ip_ops and equals cosine on unit vectors
+        # defer(Recipe.embedding): callers only need the ORM rows, not their vectors
+        recipes = query.options(defer(Recipe.embedding)).order_by(
+            Recipe.embedding.max_inner_product(normalize_embedding(query_embedding))
         ).limit(limit).all()
         
         return recipes
@@ -125,27 +376,39 @@ class VectorSearchService:
         db: Session,
         limit: int = 10
     ) -> List[Recipe]:
-        """Find similar recipes based on vector similarity"""
+        """
+        Find similar recipes based on vector similarity
         
+        Nearest neighbours of the recipe's embedding with the same dietary
+        type; recipes without an embedding fall back to a calorie band.
+        """
         recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
         
-        if not recipe or not recipe.embedding:
+        if not recipe:
             return []
         
-        # TODO: Find similar using vector distance
-        # similar = db.query(Recipe).filter(
-        #     Recipe.id != recipe_id,
-        #     Recipe.is_active == True
-        # ).order_by(
-        #     Recipe.embedding.cosine_distance(recipe.embedding)
-        # ).limit(limit).all()
+        if recipe.embedding is None:
+            # Fallback: similar dietary type and calories
+            return db.query(Recipe).filter(
+                Recipe.id != recipe_id,
+                Recipe.is_active == True,
+                Recipe.dietary_type == recipe.dietary_type,
+                Recipe.calories.between(recipe.calories * 0.8, recipe.calories * 1.2)
+            ).limit(limit).all()
+        
+        # Keep walking the HNSW graph until enough rows pass the dietary
+        # filter; the setting only exists from pgvector 0.8, and setting an
+        # unknown hnsw.* parameter errors on older versions
+        if VectorSearchService._supports_iterative_scan(db):
+            db.execute(text("SELECT set_config('hnsw.iterative_scan', 'strict_order', true)"))
         
-        # Fallback: similar dietary type and calories
         similar = db.query(Recipe).filter(
             Recipe.id != recipe_id,
             Recipe.is_active == True,
-            Recipe.dietary_type == recipe.dietary_type,
-            Recipe.calories.between(recipe.calories * 0.8, recipe.calories * 1.2)
+            Recipe.embedding.isnot(None),
+            Recipe.dietary_type == recipe.dietary_type
+        ).order_by(
+            Recipe.embedding.max_inner_product(recipe.embedding)
         ).limit(limit).all()
         
         return similar
@@ -156,26 +419,206 @@ class VectorSearchService:
         batch_size: int = 100
     ):
         """
-        Generate embeddings for recipes that don't have them
+        Generate embeddings for up to batch_size recipes that lack one or
+        whose text changed
         
-        Run as background job
+        Run as background job. Reads only (id, embedding_text); a recipe is
+        stale when its embedding_hash no longer matches its text. Works in
+        keyset-paged chunks of EMBEDDING_STREAM_CHUNK rows, committing and
+        expiring the session after each so memory stays flat.
         """
-        recipes_without_embeddings = db.query(Recipe).filter(
+        stale = db.query(Recipe.id, Recipe.embedding_text).filter(
             Recipe.is_active == True,
-            Recipe.embedding == None
-        ).limit(batch_size).all()
-        
-        for recipe in recipes_without_embeddings:
-            embedding = await VectorSearchService.generate_recipe_embedding(
-                recipe.id, db
+            or_(
+                Recipe.embedding == None,
+                and_(
+                    Recipe.embedding_hash.isnot(None),
+                    Recipe.embedding_hash != EMBEDDING_TEXT_HASH
+                )
             )
+        ).order_by(Recipe.id)
+        
+        processed = 0
+        last_id = None
+        while processed < batch_size:
+            chunk_query = stale if last_id is None else stale.filter(Recipe.id > last_id)
+            rows = chunk_query.limit(min(EMBEDDING_STREAM_CHUNK, batch_size - processed)).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            
+            texts = _embedding_texts(db, rows)
+            recipe_ids = list(texts)
+            
+            # Cached by content hash; misses go out as concurrent embeddings requests
+            embeddings = await _embed_texts([texts[recipe_id] for recipe_id in recipe_ids])
             
-            if embedding:
-                recipe.embedding = embedding
+            db.bulk_update_mappings(Recipe, [
+                {
+                    "id": recipe_id,
+                    # FP32 only at ingestion; stored and compared as halfvec
+                    "embedding": normalize_embedding(embedding).astype(np.float16),
+                    "embedding_hash": _text_hash(texts[recipe_id]),
+                }
+                for recipe_id, embedding in zip(recipe_ids, embeddings)
+                # Zero vectors mean the request failed; leave those for the next run
+                if any(embedding)
+            ])
+            db.commit()
+            db.expire_all()
+            
+            processed += len(rows)
         
+        return processed
+    
+    @staticmethod
+    async def submit_batch_embedding_job(db: Session) -> Optional[str]:
+        """
+        Queue all missing recipe embeddings on the Batch API
+        
+        For the nightly backfill: half the price of interactive calls and
+        not bound by per-minute limits. Returns the batch id, or None if a
+        job is already pending or nothing needs embedding.
+        """
+        pending = db.query(SystemSetting).filter(
+            SystemSetting.key == EMBEDDING_BATCH_SETTING
+        ).first()
+        if pending:
+            return None
+        
+        rows = db.query(Recipe.id, Recipe.embedding_text).filter(
+            Recipe.is_active == True,
+            Recipe.embedding == None
+        ).limit(EMBEDDING_BATCH_MAX_REQUESTS).all()
+        
+        if not rows:
+            return None
+        
+        texts = _embedding_texts(db, rows)
+        batch_id = await openai_client.submit_embedding_batch({
+            str(recipe_id): recipe_text for recipe_id, recipe_text in texts.items()
+        })
+        
+        db.add(SystemSetting(key=EMBEDDING_BATCH_SETTING, value=batch_id))
         db.commit()
         
-        return len(recipes_without_embeddings)
+        return batch_id
+    
+    @staticmethod
+    def _copy_embeddings(db: Session, embeddings: Dict[str, List[float]]) -> int:
+        """
+        Write {recipe_id: vector} back with COPY into a staging table and one UPDATE
+        
+        Sized for Batch API results (up to 50,000 rows), where per-row
+        UPDATEs dominate. The hash recorded is that of the text as it is
+        now; edits since submission are rare. The caller commits.
+        """
+        if not embeddings:
+            return 0
+        
+        rows = io.StringIO()
+        for recipe_id, embedding in embeddings.items():
+            # FP32 only at ingestion; stored and compared as halfvec
+            vector = normalize_embedding(embedding).astype(np.float16).tolist()
+            rows.write(f"{recipe_id}\t[{','.join(map(str, vector))}]\n")
+        rows.seek(0)
+        
+        db.execute(text(
+            "CREATE TEMP TABLE embed_stage (id uuid PRIMARY KEY, emb halfvec(1536)) "
+            "ON COMMIT DROP"
+        ))
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert("COPY embed_stage (id, emb) FROM STDIN", rows)
+        finally:
+            cursor.close()
+        
+        return db.execute(text(
+            "UPDATE recipes SET embedding = s.emb, "
+            "embedding_hash = encode(sha256(convert_to(recipes.embedding_text, 'UTF8')), 'hex') "
+            "FROM embed_stage s WHERE recipes.id = s.id"
+        )).rowcount
+    
+    @staticmethod
+    async def poll_batch_embedding_job(db: Session) -> Optional[str]:
+        """
+        Apply results of the pending Batch API job once it completes
+        
+        Returns the batch status, or None if no job is pending. Completed,
+        failed, expired and cancelled jobs are cleared so the next run can
+        submit again.
+        """
+        pending = db.query(SystemSetting).filter(
+            SystemSetting.key == EMBEDDING_BATCH_SETTING
+        ).first()
+        if not pending:
+            return None
+        
+        result = await openai_client.get_embedding_batch(pending.value)
+        status = result["status"]
+        
+        if status == "completed":
+            stored = VectorSearchService._copy_embeddings(db, result["embeddings"])
+            logger.info(f"Embedding batch {pending.value}: stored {stored} embeddings")
+        elif status in ("failed", "expired", "cancelled"):
+            logger.warning(f"Embedding batch {pending.value} ended with status {status}")
+        else:
+            return status
+        
+        db.delete(pending)
+        db.commit()
+        
+        return status
+    
+    @staticmethod
+    def _cached_rag_response(
+        db: Session,
+        query_embedding: List[float],
+        context_hash: str
+    ) -> Optional[Dict]:
+        """Cached response for the nearest past query in this context, if close enough"""
+        # <#> is the negated inner product, i.e. -cosine similarity on unit vectors
+        distance = RagQueryCache.embedding.max_inner_product(normalize_embedding(query_embedding))
+        nearest = db.query(
+            RagQueryCache.response,
+            distance.label("distance")
+        ).filter(
+            RagQueryCache.user_context_hash == context_hash,
+            RagQueryCache.created_at >= datetime.utcnow() - timedelta(seconds=RAG_CACHE_TTL)
+        ).order_by(distance).first()
+        
+        if nearest and -nearest.distance >= RAG_CACHE_SIMILARITY:
+            return nearest.response
+        return None
+    
+    @staticmethod
+    def invalidate_rag_cache(db: Session, embedding) -> int:
+        """
+        Drop cached RAG queries near a recipe embedding
+        
+        Called when a recipe changes; the caller commits. Returns the
+        number of entries removed.
+        """
+        return db.query(RagQueryCache).filter(
+            # Cosine distance on unit vectors is 1 + (<#>)
+            RagQueryCache.embedding.max_inner_product(normalize_embedding(embedding))
+            < RAG_CACHE_INVALIDATE_DISTANCE - 1
+        ).delete(synchronize_session=False)
+    
+    @staticmethod
+    async def prune_rag_cache(db: AsyncSession) -> int:
+        """
+        Delete cached RAG queries older than RAG_CACHE_TTL
+        
+        Run periodically; returns the number of entries removed.
+        """
+        result = await db.execute(
+            delete(RagQueryCache).where(
+                RagQueryCache.created_at < datetime.utcnow() - timedelta(seconds=RAG_CACHE_TTL)
+            )
+        )
+        await db.commit()
+        return result.rowcount
     
     @staticmethod
     async def rag_search(
@@ -193,8 +636,12 @@ class VectorSearchService:
         3. GPT-4 for personalized recommendations
         """
         
-        # Generate query embedding
-        query_embedding = await VectorSearchService.generate_query_embedding(query)
+        # Generate query embedding; without one, search falls back to filters only
+        try:
+            query_embedding = await VectorSearchService.generate_query_embedding(query)
+        except EmptyEmbeddingError as e:
+            logger.warning(f"RAG search without embedding: {e}")
+            query_embedding = None
         
         # Build filters from user context
         filters = {}
@@ -206,6 +653,29 @@ class VectorSearchService:
             if "health_conditions" in user_context:
                 filters["health_conditions"] = user_context["health_conditions"]
         
+        # Near-duplicate queries reuse a cached result
+        context_hash = _user_context_hash(filters, limit)
+        cacheable = query_embedding is not None
+        cached = (
+            VectorSearchService._cached_rag_response(db, query_embedding, context_hash)
+            if cacheable else None
+        )
+        if cached is not None:
+            recipe_ids = [UUID(recipe_id) for recipe_id in cached["recipe_ids"]]
+            by_id = {
+                recipe.id: recipe
+                for recipe in db.query(Recipe).filter(
+                    Recipe.id.in_(recipe_ids),
+                    Recipe.is_active == True
+                ).all()
+            } if recipe_ids else {}
+            return {
+                "query": query,
+                "results": [by_id[recipe_id] for recipe_id in recipe_ids if recipe_id in by_id],
+                "total_found": cached["total_found"],
+                "filters_applied": filters,
+            }
+        
         # Perform semantic search
         recipes = await VectorSearchService.semantic_search(
             query_embedding,
@@ -214,8 +684,33 @@ class VectorSearchService:
             filters=filters
         )
         
-        # TODO: Use GPT-4 to rerank and explain recommendations
-        # context = [recipe.to_dict() for recipe in recipes[:20]]
+        # semantic_search already orders by exact <#> distance
+        top_recipes = recipes[:limit]
+        
+        if cacheable:
+            # One row per (context, query text); a repeat miss refreshes it in place
+            entry = pg_insert(RagQueryCache).values(
+                embedding=normalize_embedding(query_embedding).astype(np.float16),
+                user_context_hash=context_hash,
+                query_hash=_text_hash(query),
+                response={
+                    "recipe_ids": [str(recipe.id) for recipe in top_recipes],
+                    "total_found": len(recipes),
+                },
+                created_at=datetime.utcnow()
+            )
+            db.execute(entry.on_conflict_do_update(
+                index_elements=["user_context_hash", "query_hash"],
+                set_={
+                    "embedding": entry.excluded.embedding,
+                    "response": entry.excluded.response,
+                    "created_at": entry.excluded.created_at,
+                }
+            ))
+            db.commit()
+        
+        # TODO: Use GPT-4 to explain recommendations (only the top results)
+        # context = [recipe.to_dict() for recipe in top_recipes]
         # gpt4_response = await openai_client.chat.completions.create(
         #     model="gpt-4-turbo-preview",
         #     messages=[
@@ -226,7 +721,7 @@ class VectorSearchService:
         
         return {
             "query": query,
-            "results": recipes[:limit],
+            "results": top_recipes,
             "total_found": len(recipes),
             "filters_applied": filters,
             # "ai_explanation": gpt4_response.choices[0].message.content
@@ -10,7 +10,8 @@ from datetime import date, datetime, timedelta
 from uuid import uuid4
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.core.database import AsyncSessionLocal, init_db
 from app.core.security import get_password_hash
@@ -20,29 +21,33 @@ from app.models.system_setting import SystemSetting
 
 
 async def upsert_user(db: AsyncSession, email: str, password: str, is_admin: bool = False) -> User:
-    existing = await db.execute(select(User).where(User.email == email))
-    user = existing.scalar_one_or_none()
-    if user:
-        return user
-
-    user = User(
-        email=email,
-        password_hash=get_password_hash(password),
-        first_name="Admin" if is_admin else "Demo",
-        last_name="User",
-        subscription_tier=SubscriptionTier.PREMIUM if is_admin else SubscriptionTier.FREE,
-        subscription_status=SubscriptionStatus.ACTIVE,
-        onboarding_completed=True,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),
-        email_verified=True,
-        stripe_customer_id=None,
-    )
     # Mark admin by email for current require_admin logic
     if is_admin:
-        user.email = "admin@sarma.app"
-    db.add(user)
-    await db.flush()
+        email = "admin@sarma.app"
+
+    # One INSERT whether or not the user exists; RETURNING is empty on conflict
+    inserted = await db.scalars(
+        pg_insert(User)
+        .values(
+            email=email,
+            password_hash=get_password_hash(password),
+            first_name="Admin" if is_admin else "Demo",
+            last_name="User",
+            subscription_tier=SubscriptionTier.PREMIUM if is_admin else SubscriptionTier.FREE,
+            subscription_status=SubscriptionStatus.ACTIVE,
+            onboarding_completed=True,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+            email_verified=True,
+            stripe_customer_id=None,
+        )
+        .on_conflict_do_nothing(index_elements=["email"])
+        .returning(User)
+    )
+    user = inserted.one_or_none()
+    if user is None:
+        existing = await db.execute(select(User).where(User.email == email))
+        return existing.scalar_one()
 
     db.add(
         UserHealthProfile(
@@ -97,18 +102,22 @@ async def seed_shopping(db: AsyncSession, user: User) -> None:
         ("Broccoli", 2, "bunch", "produce", 5.00),
         ("Olive oil", 1, "bottle", "pantry", 9.99),
     ]
-    for name, qty, unit, category, price in items:
-        db.add(
-            ShoppingListItem(
-                shopping_list_id=shopping_list.id,
-                item_name=name,
-                quantity=qty,
-                unit=unit,
-                category=category,
-                estimated_price=price,
-                created_at=datetime.utcnow(),
-            )
-        )
+    # One executemany INSERT for all items
+    await db.execute(
+        insert(ShoppingListItem),
+        [
+            {
+                "shopping_list_id": shopping_list.id,
+                "item_name": name,
+                "quantity": qty,
+                "unit": unit,
+                "category": category,
+                "estimated_price": price,
+                "created_at": datetime.utcnow(),
+            }
+            for name, qty, unit, category, price in items
+        ],
+    )
 
 
 async def seed_settings(db: AsyncSession) -> None:
@@ -119,11 +128,12 @@ async def seed_settings(db: AsyncSession) -> None:
         "SPOONACULAR_API_KEY": "demo-spoonacular",
         "STRIPE_SECRET_KEY": "sk_test_demo",
     }
-    existing = await db.execute(select(SystemSetting))
-    present = {row.key for row in existing.scalars().all()}
-    for key, value in defaults.items():
-        if key not in present:
-            db.add(SystemSetting(key=key, value=value))
+    # Postgres skips keys that already exist; existing values are kept
+    await db.execute(
+        pg_insert(SystemSetting)
+        .values([{"key": key, "value": value} for key, value in defaults.items()])
+        .on_conflict_do_nothing(index_elements=["key"])
+    )
 
 
 async def main():
@@ -4,6 +4,7 @@ Tests both Gemini and OpenAI connections
 """
 
 import asyncio
+import io
 import os
 from dotenv import load_dotenv
 
@@ -24,73 +25,88 @@ async def test_ai_services():
     print(f"🔑 OpenAI API Key: {openai_key[:20]}..." if openai_key else "❌ No OpenAI key")
     print()
     
-    # Test 1: Gemini Text Generation
-    print("=" * 60)
-    print("TEST 1: Gemini Text Generation (Fast & Cheap)")
-    print("=" * 60)
-    try:
-        gemini = GeminiService(gemini_key)
-        result = await gemini.generate_text(
-            "What are 3 key nutrients in chicken breast? Be brief."
-        )
-        
-        print(f"✅ Status: Success")
-        print(f"📊 Response time: {result.response_time_ms}ms")
-        print(f"💰 Cost: ${result.cost_usd:.6f}")
-        print(f"🎯 Confidence: {result.confidence:.2f}")
-        print(f"📝 Response:\n{result.content[:200]}...")
-        print()
-        
-    except Exception as e:
-        print(f"❌ Error: {str(e)}\n")
+    async def probe_gemini() -> str:
+        # Output is buffered so concurrent probes don't interleave
+        out = io.StringIO()
+        print("=" * 60, file=out)
+        print("TEST 1: Gemini Text Generation (Fast & Cheap)", file=out)
+        print("=" * 60, file=out)
+        try:
+            gemini = GeminiService(gemini_key)
+            result = await gemini.generate_text(
+                "What are 3 key nutrients in chicken breast? Be brief."
+            )
+            
+            print(f"✅ Status: Success", file=out)
+            print(f"📊 Response time: {result.response_time_ms}ms", file=out)
+            print(f"💰 Cost: ${result.cost_usd:.6f}", file=out)
+            print(f"🎯 Confidence: {result.confidence:.2f}", file=out)
+            print(f"📝 Response:\n{result.content[:200]}...", file=out)
+            print(file=out)
+            
+        except Exception as e:
+            print(f"❌ Error: {str(e)}\n", file=out)
+        return out.getvalue()
     
-    # Test 2: GPT-4 Text Generation
-    print("=" * 60)
-    print("TEST 2: GPT-4 Text Generation (High Quality)")
-    print("=" * 60)
-    try:
-        gpt4 = OpenAIVisionService(openai_key)
-        result = await gpt4.generate_text(
-            "What are 3 key nutrients in salmon? Be brief."
-        )
-        
-        print(f"✅ Status: Success")
-        print(f"📊 Response time: {result.response_time_ms}ms")
-        print(f"💰 Cost: ${result.cost_usd:.6f}")
-        print(f"🎯 Confidence: {result.confidence:.2f}")
-        print(f"📝 Response:\n{result.content[:200]}...")
-        print()
-        
-    except Exception as e:
-        print(f"❌ Error: {str(e)}\n")
+    async def probe_gpt4() -> str:
+        out = io.StringIO()
+        print("=" * 60, file=out)
+        print("TEST 2: GPT-4 Text Generation (High Quality)", file=out)
+        print("=" * 60, file=out)
+        try:
+            gpt4 = OpenAIVisionService(openai_key)
+            result = await gpt4.generate_text(
+                "What are 3 key nutrients in salmon? Be brief."
+            )
+            
+            print(f"✅ Status: Success", file=out)
+            print(f"📊 Response time: {result.response_time_ms}ms", file=out)
+            print(f"💰 Cost: ${result.cost_usd:.6f}", file=out)
+            print(f"🎯 Confidence: {result.confidence:.2f}", file=out)
+            print(f"📝 Response:\n{result.content[:200]}...", file=out)
+            print(file=out)
+            
+        except Exception as e:
+            print(f"❌ Error: {str(e)}\n", file=out)
+        return out.getvalue()
     
-    # Test 3: Meal Analyzer (Multi-Model)
-    print("=" * 60)
-    print("TEST 3: Meal Analyzer (Multi-Model Smart Routing)")
-    print("=" * 60)
-    try:
-        from app.services.ai.meal_analyzer import MealAnalyzer
-        
-        analyzer = MealAnalyzer(gemini_key, openai_key)
-        
-        # We'll test with quick calorie estimate (no image needed)
-        print("Note: Full meal analysis requires image URL")
-        print("Testing quick estimate logic instead...")
-        print()
-        
-        # Test provider selection logic
-        from app.services.ai.base import AIProvider
-        
-        provider_free = analyzer._select_provider("free", None)
-        provider_premium = analyzer._select_provider("premium", None)
-        
-        print(f"✅ Free tier uses: {provider_free}")
-        print(f"✅ Premium tier uses: {provider_premium}")
-        print(f"✅ Confidence threshold: {analyzer.CONFIDENCE_THRESHOLD}")
-        print()
-        
-    except Exception as e:
-        print(f"❌ Error: {str(e)}\n")
+    async def probe_meal_analyzer() -> str:
+        out = io.StringIO()
+        print("=" * 60, file=out)
+        print("TEST 3: Meal Analyzer (Multi-Model Smart Routing)", file=out)
+        print("=" * 60, file=out)
+        try:
+            from app.services.ai.meal_analyzer import MealAnalyzer
+            
+            analyzer = MealAnalyzer(gemini_key, openai_key)
+            
+            # We'll test with quick calorie estimate (no image needed)
+            print("Note: Full meal analysis requires image URL", file=out)
+            print("Testing quick estimate logic instead...", file=out)
+            print(file=out)
+            
+            # Test provider selection logic
+            from app.services.ai.base import AIProvider
+            
+            provider_free = analyzer._select_provider("free", None)
+            provider_premium = analyzer._select_provider("premium", None)
+            
+            print(f"✅ Free tier uses: {provider_free}", file=out)
+            print(f"✅ Premium tier uses: {provider_premium}", file=out)
+            print(f"✅ Confidence threshold: {analyzer.CONFIDENCE_THRESHOLD}", file=out)
+            print(file=out)
+            
+        except Exception as e:
+            print(f"❌ Error: {str(e)}\n", file=out)
+        return out.getvalue()
+    
+    # GPT-4 is scheduled first: GeminiService calls the blocking SDK, so the
+    # OpenAI request must already be in flight for the two to overlap
+    gpt4_report, gemini_report, meal_report = await asyncio.gather(
+        probe_gpt4(), probe_gemini(), probe_meal_analyzer()
+    )
+    for report in (gemini_report, gpt4_report, meal_report):
+        print(report, end="")
     
     # Summary
     print("=" * 60)
@@ -0,0 +1,121 @@
+"""
+Shared pytest configuration
+"""
+import os
+import sys
+import types
+
+# bcrypt cost grows 2^rounds; every registered test user pays it on register
+# and login. Set before app.core.config is imported so the setting picks it up.
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+# Test data is disposable; don't wait for the WAL flush on every commit
+os.environ.setdefault("DATABASE_SYNCHRONOUS_COMMIT", "off")
+
+# Under pytest-xdist each worker creates and uses its own schema, so workers
+# can run database tests in parallel without seeing each other's rows
+if "PYTEST_XDIST_WORKER" in os.environ:
+    os.environ.setdefault("DATABASE_SCHEMA", f"test_{os.environ['PYTEST_XDIST_WORKER']}")
+
+import httpx
+import pytest
+import pytest_asyncio
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-integration",
+        action="store_true",
+        default=False,
+        help="Run integration tests that require API keys"
+    )
+
+
+class _StubAIClient:
+    """Stand-in for SDK clients and config objects; accepts any constructor arguments"""
+    
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+def _install_ai_sdk_stubs() -> None:
+    """
+    Register lightweight google.generativeai and openai modules
+    
+    The real SDKs load large protobuf descriptors and client stacks at import,
+    but outside integration runs every provider call is mocked. Only the names
+    the app imports are provided. Must run before any app module is imported.
+    """
+    genai_types = types.ModuleType("google.generativeai.types")
+    genai_types.GenerationConfig = _StubAIClient
+    
+    genai = types.ModuleType("google.generativeai")
+    genai.configure = lambda **kwargs: None
+    genai.GenerativeModel = _StubAIClient
+    genai.types = genai_types
+    
+    openai = types.ModuleType("openai")
+    openai.AsyncOpenAI = _StubAIClient
+    openai.OpenAI = _StubAIClient
+    
+    sys.modules.setdefault("google.generativeai", genai)
+    sys.modules.setdefault("google.generativeai.types", genai_types)
+    sys.modules.setdefault("openai", openai)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "integration: calls real external APIs; needs --run-integration")
+    config.addinivalue_line("markers", "db: reads or writes the shared test database")
+    
+    # Integration tests talk to the real providers and need the real SDKs
+    if not config.getoption("--run-integration"):
+        _install_ai_sdk_stubs()
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests marked integration unless --run-integration was given"""
+    if config.getoption("--run-integration"):
+        return
+    skip = pytest.mark.skip(reason="Integration tests require --run-integration flag")
+    for item in items:
+        if "integration" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="module")
+def vcr_config():
+    """Record real AI API calls on first run and replay them from tests/cassettes after"""
+    return {
+        "record_mode": "once",
+        "match_on": ["method", "uri", "body"],
+        "filter_headers": ["authorization", "x-goog-api-key"],
+        "filter_query_parameters": ["key"],
+    }
+
+
+@pytest_asyncio.fixture(scope="session")
+async def ai_http_client():
+    """Keep-alive HTTP/2 pool shared by the integration tests' provider clients"""
+    async with httpx.AsyncClient(
+        http2=True,
+        timeout=60,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+    ) as c:
+        yield c
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client():
+    """
+    One in-process client for the session, calling the app through httpx.ASGITransport
+    
+    The app lifespan runs once on the session event loop, which every test
+    using this client shares, so pooled DB connections stay on one loop.
+    """
+    from app.main import app
+    
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as c:
+            yield c
@@ -1,20 +1,96 @@
 """
 Tests for API Endpoints
 """
+import asyncio
+from uuid import uuid4
+
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+import pytest_asyncio
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.database import AsyncSessionLocal
+from app.core.security import get_password_hash
+from app.models.user import User
+
+# Tests share the session-scoped client, so they run on the session's event loop
+pytestmark = [
+    pytest.mark.asyncio(loop_scope="session"),
+    # Every test here goes through the app and the shared test database
+    pytest.mark.db,
+]
+
+
+# One user per session for the tests that only need to be authenticated
+API_TEST_EMAIL = f"api_test_{uuid4().hex}@example.com"
+
+# Already-registered user for the duplicate-email check, hashed once per session
+DUPLICATE_EMAIL = "duplicate@example.com"
+PREBAKED_HASH = get_password_hash("SecurePass123!")
 
-client = TestClient(app)
+# Pre-encoded body for the rate-limit burst; sent as-is on every request
+CHAT_BODY = orjson.dumps({"message": "Test message"})
+
+
+@pytest.fixture(scope="session")
+def token_factory(client):
+    """Return auth headers for an email, registering and logging in only on first use"""
+    cache = {}
+    
+    async def get(email: str = API_TEST_EMAIL) -> dict:
+        if email in cache:
+            return cache[email]
+        
+        await client.post("/api/v1/auth/register", json={
+            "email": email,
+            "password": "SecurePass123!",
+            "full_name": "API Test User"
+        })
+        
+        login_response = await client.post("/api/v1/auth/login", json={
+            "email": email,
+            "password": "SecurePass123!"
+        })
+        
+        cache[email] = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+        return cache[email]
+    
+    return get
+
+
+@pytest_asyncio.fixture(scope="session")
+async def existing_user(client):
+    """Insert DUPLICATE_EMAIL straight into the DB instead of through /auth/register"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            pg_insert(User)
+            .values(
+                email=DUPLICATE_EMAIL,
+                password_hash=PREBAKED_HASH,
+                first_name="Existing",
+                last_name="User"
+            )
+            .on_conflict_do_nothing(index_elements=["email"])
+        )
+        await db.commit()
+    return DUPLICATE_EMAIL
 
 
+@pytest_asyncio.fixture(scope="session")
+async def auth_headers(token_factory):
+    """Get authentication headers"""
+    return await token_factory()
+
+
+@pytest.mark.xdist_group(name="auth_db")
 class TestAuthEndpoints:
     """Test authentication endpoints"""
     
-    def test_register_success(self):
+    async def test_register_success(self, client):
         """Test successful user registration"""
-        response = client.post("/api/v1/auth/register", json={
-            "email": "test@example.com",
+        email = f"test_{uuid4().hex}@example.com"
+        response = await client.post("/api/v1/auth/register", json={
+            "email": email,
             "password": "SecurePass123!",
             "full_name": "Test User"
         })
@@ -22,20 +98,12 @@ class TestAuthEndpoints:
         assert response.status_code == 201
         data = response.json()
         assert "id" in data
-        assert data["email"] == "test@example.com"
+        assert data["email"] == email
     
-    def test_register_duplicate_email(self):
+    async def test_register_duplicate_email(self, client, existing_user):
         """Test registration with duplicate email"""
-        # First registration
-        client.post("/api/v1/auth/register", json={
-            "email": "duplicate@example.com",
-            "password": "SecurePass123!",
-            "full_name": "User One"
-        })
-        
-        # Second registration with same email
-        response = client.post("/api/v1/auth/register", json={
-            "email": "duplicate@example.com",
+        response = await client.post("/api/v1/auth/register", json={
+            "email": existing_user,
             "password": "Different123!",
             "full_name": "User Two"
         })
@@ -43,17 +111,17 @@ class TestAuthEndpoints:
         assert response.status_code == 400
         assert "already registered" in response.json()["detail"].lower()
     
-    def test_login_success(self):
+    async def test_login_success(self, client):
         """Test successful login"""
         # Register user first
-        client.post("/api/v1/auth/register", json={
+        await client.post("/api/v1/auth/register", json={
             "email": "login@example.com",
             "password": "SecurePass123!",
             "full_name": "Login User"
         })
         
         # Login
-        response = client.post("/api/v1/auth/login", json={
+        response = await client.post("/api/v1/auth/login", json={
             "email": "login@example.com",
             "password": "SecurePass123!"
         })
@@ -63,9 +131,9 @@ class TestAuthEndpoints:
         assert "access_token" in data
         assert data["token_type"] == "bearer"
     
-    def test_login_wrong_password(self):
+    async def test_login_wrong_password(self, client):
         """Test login with wrong password"""
-        response = client.post("/api/v1/auth/login", json={
+        response = await client.post("/api/v1/auth/login", json={
             "email": "login@example.com",
             "password": "WrongPassword!"
         })
@@ -73,103 +141,57 @@ class TestAuthEndpoints:
         assert response.status_code == 401
 
 
+@pytest.mark.xdist_group(name="auth_db")
 class TestAIEndpoints:
     """Test AI service endpoints"""
     
-    @pytest.fixture
-    def auth_headers(self):
-        """Get authentication headers"""
-        # Register and login
-        client.post("/api/v1/auth/register", json={
-            "email": "ai_test@example.com",
-            "password": "SecurePass123!",
-            "full_name": "AI Test User"
-        })
-        
-        login_response = client.post("/api/v1/auth/login", json={
-            "email": "ai_test@example.com",
-            "password": "SecurePass123!"
-        })
-        
-        token = login_response.json()["access_token"]
-        return {"Authorization": f"Bearer {token}"}
-    
-    def test_meal_analysis_unauthorized(self):
+    async def test_meal_analysis_unauthorized(self, client):
         """Test meal analysis without authentication"""
-        response = client.post("/api/v1/ai/analyze/meal", json={
+        response = await client.post("/api/v1/ai/analyze/meal", json={
             "image_url": "https://example.com/meal.jpg"
         })
         
         assert response.status_code == 401
     
-    def test_meal_analysis_success(self, auth_headers):
-        """Test successful meal analysis"""
-        response = client.post(
-            "/api/v1/ai/analyze/meal",
-            json={"image_url": "https://example.com/meal.jpg"},
+    async def test_ai_batch(self, client, auth_headers):
+        """Test meal analysis, recipe generation and chat in one batched call"""
+        response = await client.post(
+            "/api/v1/ai/batch",
+            json={"operations": [
+                {"op": "analyze_meal", "image_url": "https://example.com/meal.jpg"},
+                {
+                    "op": "generate_recipe",
+                    "ingredients": ["chicken", "broccoli", "rice"],
+                    "dietary_restrictions": ["gluten-free"]
+                },
+                {"op": "chat", "message": "What should I eat for breakfast?"}
+            ]},
             headers=auth_headers
         )
         
         assert response.status_code == 200
-        data = response.json()
-        assert "calories" in data
-        assert "protein" in data
-        assert "ingredients" in data
-    
-    def test_recipe_generation(self, auth_headers):
-        """Test AI recipe generation"""
-        response = client.post(
-            "/api/v1/ai/generate/recipe",
-            json={
-                "ingredients": ["chicken", "broccoli", "rice"],
-                "dietary_restrictions": ["gluten-free"]
-            },
-            headers=auth_headers
-        )
+        meal, recipe, chat = response.json()["results"]
         
-        assert response.status_code == 200
-        data = response.json()
-        assert "name" in data
-        assert "instructions" in data
-        assert "nutrition" in data
-    
-    def test_chat_assistant(self, auth_headers):
-        """Test health chat assistant"""
-        response = client.post(
-            "/api/v1/ai/chat",
-            json={"message": "What should I eat for breakfast?"},
-            headers=auth_headers
-        )
+        assert meal["op"] == "analyze_meal"
+        assert meal["status_code"] == 200
+        assert "nutrition" in meal["result"]
         
-        assert response.status_code == 200
-        data = response.json()
-        assert "response" in data
-        assert len(data["response"]) > 0
+        assert recipe["op"] == "generate_recipe"
+        assert recipe["status_code"] == 200
+        assert "recipe" in recipe["result"]
+        
+        assert chat["op"] == "chat"
+        assert chat["status_code"] == 200
+        assert len(chat["result"]["response"]) > 0
 
 
+@pytest.mark.xdist_group(name="auth_db")
 class TestSubscriptionEndpoints:
     """Test subscription and payment endpoints"""
     
-    @pytest.fixture
-    def auth_headers(self):
-        """Get authentication headers"""
-        client.post("/api/v1/auth/register", json={
-            "email": "sub_test@example.com",
-            "password": "SecurePass123!",
-            "full_name": "Sub Test User"
-        })
-        
-        login_response = client.post("/api/v1/auth/login", json={
-            "email": "sub_test@example.com",
-            "password": "SecurePass123!"
-        })
-        
-        token = login_response.json()["access_token"]
-        return {"Authorization": f"Bearer {token}"}
-    
-    def test_get_current_subscription(self, auth_headers):
+    async def test_get_current_subscription(self, client, auth_headers):
         """Test getting current subscription"""
-        response = client.get(
+        response = await client.get(
             "/api/v1/subscriptions/current",
             headers=auth_headers
         )
@@ -179,9 +201,9 @@ class TestSubscriptionEndpoints:
         assert "tier" in data
         assert data["tier"] in ["free", "premium", "pro"]
     
-    def test_get_usage_limits(self, auth_headers):
+    async def test_get_usage_limits(self, client, auth_headers):
         """Test getting usage limits"""
-        response = client.get(
+        response = await client.get(
             "/api/v1/subscriptions/usage",
             headers=auth_headers
         )
@@ -191,9 +213,9 @@ class TestSubscriptionEndpoints:
         assert "requests_this_month" in data
         assert "limit" in data
     
-    def test_create_checkout_session(self, auth_headers):
+    async def test_create_checkout_session(self, client, auth_headers):
         """Test creating Stripe checkout session"""
-        response = client.post(
+        response = await client.post(
             "/api/v1/subscriptions/checkout",
             json={
                 "price_id": "price_premium_monthly",
@@ -208,29 +230,13 @@ class TestSubscriptionEndpoints:
         assert "checkout_url" in data
 
 
+@pytest.mark.xdist_group(name="auth_db")
 class TestAnalyticsEndpoints:
     """Test analytics endpoints"""
     
-    @pytest.fixture
-    def auth_headers(self):
-        """Get authentication headers"""
-        client.post("/api/v1/auth/register", json={
-            "email": "analytics_test@example.com",
-            "password": "SecurePass123!",
-            "full_name": "Analytics Test User"
-        })
-        
-        login_response = client.post("/api/v1/auth/login", json={
-            "email": "analytics_test@example.com",
-            "password": "SecurePass123!"
-        })
-        
-        token = login_response.json()["access_token"]
-        return {"Authorization": f"Bearer {token}"}
-    
-    def test_get_user_analytics(self, auth_headers):
+    async def test_get_user_analytics(self, client, auth_headers):
         """Test getting user analytics"""
-        response = client.get(
+        response = await client.get(
             "/api/v1/analytics?range=week",
             headers=auth_headers
         )
@@ -242,42 +248,26 @@ class TestAnalyticsEndpoints:
         assert "goals" in data
         assert "recipes" in data
     
-    def test_analytics_time_ranges(self, auth_headers):
+    async def test_analytics_time_ranges(self, client, auth_headers):
         """Test different time ranges"""
-        for range_param in ["week", "month", "all"]:
-            response = client.get(
-                f"/api/v1/analytics?range={range_param}",
-                headers=auth_headers
-            )
-            
+        responses = await asyncio.gather(*(
+            client.get(f"/api/v1/analytics?range={range_param}", headers=auth_headers)
+            for range_param in ("week", "month", "all")
+        ))
+        
+        for response in responses:
             assert response.status_code == 200
             data = response.json()
             assert "ai_usage" in data
 
 
+@pytest.mark.xdist_group(name="auth_db")
 class TestSettingsEndpoints:
     """Test user settings endpoints"""
     
-    @pytest.fixture
-    def auth_headers(self):
-        """Get authentication headers"""
-        client.post("/api/v1/auth/register", json={
-            "email": "settings_test@example.com",
-            "password": "SecurePass123!",
-            "full_name": "Settings Test User"
-        })
-        
-        login_response = client.post("/api/v1/auth/login", json={
-            "email": "settings_test@example.com",
-            "password": "SecurePass123!"
-        })
-        
-        token = login_response.json()["access_token"]
-        return {"Authorization": f"Bearer {token}"}
-    
-    def test_get_settings(self, auth_headers):
+    async def test_get_settings(self, client, auth_headers):
         """Test getting user settings"""
-        response = client.get(
+        response = await client.get(
             "/api/v1/settings",
             headers=auth_headers
         )
@@ -287,9 +277,9 @@ class TestSettingsEndpoints:
         assert "default_ai_provider" in data
         assert "dietary_restrictions" in data
     
-    def test_update_settings(self, auth_headers):
+    async def test_update_settings(self, client, auth_headers):
         """Test updating user settings"""
-        response = client.put(
+        response = await client.put(
             "/api/v1/settings",
             json={
                 "default_ai_provider": "gemini",
@@ -307,9 +297,9 @@ class TestSettingsEndpoints:
         assert data["default_ai_provider"] == "gemini"
         assert "vegetarian" in data["dietary_restrictions"]
     
-    def test_api_key_encryption(self, auth_headers):
+    async def test_api_key_encryption(self, client, auth_headers):
         """Test API key encryption"""
-        response = client.put(
+        response = await client.put(
             "/api/v1/settings",
             json={
                 "gemini_api_key": "test_api_key_123",
@@ -321,7 +311,7 @@ class TestSettingsEndpoints:
         assert response.status_code == 200
         
         # Get settings and verify keys are not exposed
-        get_response = client.get(
+        get_response = await client.get(
             "/api/v1/settings",
             headers=auth_headers
         )
@@ -332,39 +322,28 @@ class TestSettingsEndpoints:
             assert data["gemini_api_key"] != "test_api_key_123"
 
 
+@pytest.mark.xdist_group(name="auth_db")
 class TestRateLimiting:
     """Test API rate limiting"""
     
-    @pytest.fixture
-    def auth_headers(self):
-        """Get authentication headers"""
-        client.post("/api/v1/auth/register", json={
-            "email": "rate_test@example.com",
-            "password": "SecurePass123!",
-            "full_name": "Rate Test User"
-        })
+    async def test_rate_limit_exceeded(self, client, token_factory):
+        """Test rate limiting on free tier"""
+        # Fresh user, so the quota is not shared with other tests
+        auth_headers = await token_factory(f"rate_test_{uuid4().hex}@example.com")
         
-        login_response = client.post("/api/v1/auth/login", json={
-            "email": "rate_test@example.com",
-            "password": "SecurePass123!"
-        })
+        headers = {**auth_headers, "Content-Type": "application/json"}
         
-        token = login_response.json()["access_token"]
-        return {"Authorization": f"Bearer {token}"}
-    
-    def test_rate_limit_exceeded(self, auth_headers):
-        """Test rate limiting on free tier"""
-        # Make 51 requests (free tier limit is 50/month)
-        for i in range(51):
-            response = client.post(
-                "/api/v1/ai/chat",
-                json={"message": f"Test message {i}"},
-                headers=auth_headers
-            )
-            
-            if i < 50:
-                assert response.status_code == 200
-            else:
-                # 51st request should be rate limited
-                assert response.status_code == 429
-                assert "limit exceeded" in response.json()["detail"].lower()
+        # Free tier limit is 50/month; spend the quota concurrently, 10 in flight
+        semaphore = asyncio.Semaphore(10)
+        
+        async def send():
+            async with semaphore:
+                return await client.post("/api/v1/ai/chat", content=CHAT_BODY, headers=headers)
+        
+        responses = await asyncio.gather(*(send() for _ in range(50)))
+        assert all(r.status_code == 200 for r in responses)
+        
+        # 51st request should be rate limited
+        response = await send()
+        assert response.status_code == 429
+        assert "limit exceeded" in response.json()["detail"].lower()
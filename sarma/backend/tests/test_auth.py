@@ -4,121 +4,119 @@ Test user registration and login
 """
 
 import pytest
-from httpx import AsyncClient
-from app.main import app
 
+# Tests share the session-scoped client, so they run on the session's event loop
+pytestmark = [
+    pytest.mark.asyncio(loop_scope="session"),
+    # Writes users to the shared test DB; keep on the same xdist worker as the API tests
+    pytest.mark.xdist_group(name="auth_db"),
+    pytest.mark.db,
+]
 
-@pytest.mark.asyncio
-async def test_register_user():
+
+async def test_register_user(client):
     """Test user registration"""
-    async with AsyncClient(app=app, base_url="http://test") as client:
-        response = await client.post(
-            "/v1/auth/register",
-            json={
-                "email": "test@example.com",
-                "password": "TestPass123!",
-                "first_name": "Test",
-                "last_name": "User"
-            }
-        )
-        
-        assert response.status_code == 201
-        data = response.json()
-        
-        # Check user data
-        assert data["user"]["email"] == "test@example.com"
-        assert data["user"]["first_name"] == "Test"
-        assert data["user"]["last_name"] == "User"
-        
-        # Check tokens
-        assert "tokens" in data
-        assert "access_token" in data["tokens"]
-        assert "refresh_token" in data["tokens"]
+    response = await client.post(
+        "/v1/auth/register",
+        json={
+            "email": "test@example.com",
+            "password": "TestPass123!",
+            "first_name": "Test",
+            "last_name": "User"
+        }
+    )
+    
+    assert response.status_code == 201
+    data = response.json()
+    
+    # Check user data
+    assert data["user"]["email"] == "test@example.com"
+    assert data["user"]["first_name"] == "Test"
+    assert data["user"]["last_name"] == "User"
+    
+    # Check tokens
+    assert "tokens" in data
+    assert "access_token" in data["tokens"]
+    assert "refresh_token" in data["tokens"]
 
 
-@pytest.mark.asyncio
-async def test_register_duplicate_email():
+async def test_register_duplicate_email(client):
     """Test registration with existing email fails"""
-    async with AsyncClient(app=app, base_url="http://test") as client:
-        # First registration
-        await client.post(
-            "/v1/auth/register",
-            json={
-                "email": "duplicate@example.com",
-                "password": "TestPass123!",
-                "first_name": "First",
-                "last_name": "User"
-            }
-        )
-        
-        # Second registration with same email
-        response = await client.post(
-            "/v1/auth/register",
-            json={
-                "email": "duplicate@example.com",
-                "password": "TestPass123!",
-                "first_name": "Second",
-                "last_name": "User"
-            }
-        )
-        
-        assert response.status_code == 409
-        assert "already registered" in response.json()["detail"].lower()
+    # First registration
+    await client.post(
+        "/v1/auth/register",
+        json={
+            "email": "duplicate@example.com",
+            "password": "TestPass123!",
+            "first_name": "First",
+            "last_name": "User"
+        }
+    )
+    
+    # Second registration with same email
+    response = await client.post(
+        "/v1/auth/register",
+        json={
+            "email": "duplicate@example.com",
+            "password": "TestPass123!",
+            "first_name": "Second",
+            "last_name": "User"
+        }
+    )
+    
+    assert response.status_code == 409
+    assert "already registered" in response.json()["detail"].lower()
 
 
-@pytest.mark.asyncio
-async def test_login():
+async def test_login(client):
     """Test user login"""
-    async with AsyncClient(app=app, base_url="http://test") as client:
-        # Register user
-        await client.post(
-            "/v1/auth/register",
-            json={
-                "email": "login@example.com",
-                "password": "TestPass123!",
-                "first_name": "Login",
-                "last_name": "Test"
-            }
-        )
-        
-        # Login
-        response = await client.post(
-            "/v1/auth/login",
-            json={
-                "email": "login@example.com",
-                "password": "TestPass123!"
-            }
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        
-        assert data["user"]["email"] == "login@example.com"
-        assert "tokens" in data
+    # Register user
+    await client.post(
+        "/v1/auth/register",
+        json={
+            "email": "login@example.com",
+            "password": "TestPass123!",
+            "first_name": "Login",
+            "last_name": "Test"
+        }
+    )
+    
+    # Login
+    response = await client.post(
+        "/v1/auth/login",
+        json={
+            "email": "login@example.com",
+            "password": "TestPass123!"
+        }
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    
+    assert data["user"]["email"] == "login@example.com"
+    assert "tokens" in data
 
 
-@pytest.mark.asyncio
-async def test_login_wrong_password():
+async def test_login_wrong_password(client):
     """Test login with wrong password fails"""
-    async with AsyncClient(app=app, base_url="http://test") as client:
-        # Register user
-        await client.post(
-            "/v1/auth/register",
-            json={
-                "email": "wrongpass@example.com",
-                "password": "TestPass123!",
-                "first_name": "Wrong",
-                "last_name": "Pass"
-            }
-        )
-        
-        # Login with wrong password
-        response = await client.post(
-            "/v1/auth/login",
-            json={
-                "email": "wrongpass@example.com",
-                "password": "WrongPassword123!"
-            }
-        )
-        
-        assert response.status_code == 401
+    # Register user
+    await client.post(
+        "/v1/auth/register",
+        json={
+            "email": "wrongpass@example.com",
+            "password": "TestPass123!",
+            "first_name": "Wrong",
+            "last_name": "Pass"
+        }
+    )
+    
+    # Login with wrong password
+    response = await client.post(
+        "/v1/auth/login",
+        json={
+            "email": "wrongpass@example.com",
+            "password": "WrongPassword123!"
+        }
+    )
+    
+    assert response.status_code == 401
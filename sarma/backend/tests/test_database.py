@@ -0,0 +1,48 @@
+"""
+Tests for database setup
+"""
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.system_setting import SystemSetting
+
+# Runs on the session loop so the shared engine's pooled connections stay on one loop
+pytestmark = [
+    pytest.mark.asyncio(loop_scope="session"),
+    pytest.mark.db,
+]
+
+
+@pytest.mark.skipif(
+    not settings.DATABASE_SCHEMA,
+    reason="Only meaningful under a per-worker schema (pytest -n)"
+)
+async def test_worker_rows_stay_out_of_public(client):
+    """Test ORM writes land in the worker schema even when public has the same tables"""
+    key = f"schema_isolation_{uuid4().hex}"
+
+    async with AsyncSessionLocal() as db:
+        # client ran init_db, so the worker's tables exist; make public's exist too
+        await db.execute(text(
+            "CREATE TABLE IF NOT EXISTS public.system_settings "
+            f'(LIKE "{settings.DATABASE_SCHEMA}".system_settings INCLUDING ALL)'
+        ))
+
+        db.add(SystemSetting(key=key, value="worker"))
+        await db.flush()
+
+        in_worker = await db.scalar(
+            select(func.count()).select_from(SystemSetting).where(SystemSetting.key == key)
+        )
+        in_public = await db.scalar(
+            text("SELECT count(*) FROM public.system_settings WHERE key = :key"),
+            {"key": key}
+        )
+        await db.rollback()
+
+    assert in_worker == 1
+    assert in_public == 0
@@ -0,0 +1,58 @@
+"""
+Tests for Health Assessment Service helpers
+"""
+from app.services.health_service import (
+    NutritionTargets,
+    _classify_conditions,
+    _dietary_restrictions,
+    _nutrition_targets_kernel
+)
+
+
+class TestConditionClassification:
+    """Test free-text condition classification"""
+
+    def test_groups_are_case_insensitive_substrings(self):
+        """Test mixed-case conditions map to their keyword groups"""
+        groups = _classify_conditions([
+            "Type 2 Diabetes",
+            "High Blood Pressure",
+            "Chronic Kidney Disease",
+            "celiac"
+        ])
+        assert groups == {"diabetes", "htn", "kidney", "celiac"}
+
+    def test_empty_conditions(self):
+        """Test missing conditions classify to an empty set"""
+        assert _classify_conditions(None) == frozenset()
+        assert _classify_conditions(["asthma"]) == frozenset()
+
+
+class TestDietaryRestrictions:
+    """Test dietary restriction derivation"""
+
+    def test_restrictions_are_ordered_and_unique(self):
+        """Test overlapping conditions keep first-seen order without duplicates"""
+        restrictions = _dietary_restrictions(
+            frozenset({"htn", "kidney"}),
+            ("Peanuts",)
+        )
+        assert restrictions == ("low_sodium", "low_potassium", "no_peanuts")
+
+
+class TestNutritionTargets:
+    """Test daily nutrition target calculation"""
+
+    def test_default_targets(self):
+        """Test unknown weight falls back to the 2000 kcal baseline"""
+        targets = _nutrition_targets_kernel(0.0, False)
+        assert targets == NutritionTargets(
+            calories=2000, protein_g=150, carbs_g=200, fat_g=66
+        )
+
+    def test_diabetes_targets(self):
+        """Test diabetes lowers calories and carb share"""
+        targets = _nutrition_targets_kernel(180.0, True)
+        assert targets.calories == 2106
+        assert targets.carbs_g == 184
+        assert targets.fat_g == 81
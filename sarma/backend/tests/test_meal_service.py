@@ -0,0 +1,65 @@
+"""
+Tests for Meal Analysis Service helpers
+"""
+from uuid import uuid4
+
+import pytest
+import numpy as np
+
+from app.services.meal_service import MealAnalysisService
+
+
+class TestHealthScore:
+    """Test meal health scoring"""
+
+    MEALS = [
+        # calories, protein_g, carbs_g, fat_g
+        (441, 59, 30, 8),
+        (0, 0, 0, 0),
+        (150, 2, 30, 1),
+        (1200, 20, 150, 60),
+        (750, 40, 60, 25),
+        (300, 30, 10, 10),
+    ]
+
+    def test_scalar_score_in_range(self):
+        """Test scalar score is capped at 0-100"""
+        for calories, protein, carbs, fat in self.MEALS:
+            score = MealAnalysisService._calculate_health_score(
+                calories, protein, carbs, fat
+            )
+            assert 0 <= score <= 100
+
+    def test_batch_matches_scalar(self):
+        """Test vectorized scores match the scalar implementation"""
+        calories, protein, carbs, fat = zip(*self.MEALS)
+
+        batch = MealAnalysisService._calculate_health_scores_batch(
+            calories, protein, carbs, fat
+        )
+
+        expected = [
+            MealAnalysisService._calculate_health_score(*meal)
+            for meal in self.MEALS
+        ]
+        assert isinstance(batch, np.ndarray)
+        assert batch.tolist() == pytest.approx(expected)
+
+    async def test_trends_score_average_meal_per_day(self, monkeypatch):
+        """Test trend days are scored on their average meal, and empty days get no score"""
+        summaries = [
+            {"meal_count": 2, "total_calories": 882, "total_protein_g": 118, "total_carbs_g": 60, "total_fat_g": 16},
+            {"meal_count": 0, "total_calories": 0.0, "total_protein_g": 0.0, "total_carbs_g": 0.0, "total_fat_g": 0.0},
+        ]
+
+        async def fake_summaries(db, user_id, start_date, end_date, include_rows=False):
+            return summaries
+
+        monkeypatch.setattr(MealAnalysisService, "_get_daily_summaries", staticmethod(fake_summaries))
+
+        trends = await MealAnalysisService.get_nutrition_trends(None, uuid4(), days=1)
+
+        expected = MealAnalysisService._calculate_health_score(441, 59, 30, 8)
+        assert summaries[0]["health_score"] == pytest.approx(expected)
+        assert summaries[1]["health_score"] is None
+        assert trends["averages"]["health_score"] == pytest.approx(expected)
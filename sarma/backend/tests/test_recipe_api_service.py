@@ -0,0 +1,160 @@
+"""
+Tests for the Spoonacular client and its payload transforms
+"""
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+import pytest_asyncio
+import respx
+
+from app.core import cache as app_cache
+from app.services import recipe_api_service
+from app.services.recipe_api_service import (
+    RecipeAPIError,
+    RecipeAPIService,
+    _transform_recipe_details,
+    _transform_search_result
+)
+
+
+SPOONACULAR_RECIPE = {
+    "id": 715538,
+    "title": "Bruschetta Style Pork & Pasta",
+    "image": "https://img.spoonacular.com/recipes/715538-312x231.jpg",
+    "readyInMinutes": 35,
+    "servings": 5,
+    "nutrition": {
+        "nutrients": [
+            {"name": "Calories", "amount": 521.0},
+            {"name": "Fat", "amount": 12.4},
+            {"name": "Protein", "amount": 34.2},
+            {"name": "Carbohydrates", "amount": 63.5},
+            {"name": "Calories", "amount": 1.0}
+        ]
+    },
+    "extendedIngredients": [
+        {"name": "pasta", "amount": 1.0, "unit": "lb", "original": "1 lb pasta"}
+    ],
+    "analyzedInstructions": [
+        {"steps": [{"number": 1, "step": "Boil the pasta."}]}
+    ]
+}
+
+
+class TestSpoonacularTransforms:
+    """Test mapping of Spoonacular responses to our recipe format"""
+
+    def test_search_result_nutrition(self):
+        """Test macros are picked by name, first entry winning"""
+        result = _transform_search_result(SPOONACULAR_RECIPE)
+        assert result["name"] == "Bruschetta Style Pork & Pasta"
+        assert result["nutrition"] == {
+            "calories": 521.0,
+            "protein": 34.2,
+            "carbs": 63.5,
+            "fat": 12.4
+        }
+
+    def test_details_without_instructions(self):
+        """Test a recipe with no analyzed instructions still transforms"""
+        details = _transform_recipe_details({
+            **SPOONACULAR_RECIPE,
+            "analyzedInstructions": []
+        })
+        assert details["instructions"] == []
+        assert details["ingredients"][0]["original"] == "1 lb pasta"
+
+
+@pytest.fixture
+def respx_mock():
+    """Intercept the service's httpx calls at the transport layer"""
+    with respx.mock(base_url="https://api.spoonacular.com", assert_all_called=False) as m:
+        yield m
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Run without Redis: every lookup misses unless a test seeds entry, writes are recorded"""
+    store = {"entry": None, "set": AsyncMock()}
+
+    async def fake_get(key):
+        return store["entry"]
+
+    for module in (app_cache, recipe_api_service):
+        monkeypatch.setattr(module, "cache_get", fake_get)
+        monkeypatch.setattr(module, "cache_set", store["set"])
+    return store
+
+
+@pytest_asyncio.fixture
+async def service():
+    async with RecipeAPIService(api_key="test_key") as s:
+        yield s
+
+
+class TestSpoonacularRequests:
+    """Test request building and response handling against a mocked transport"""
+
+    async def test_search_sends_filters(self, service, respx_mock, cache):
+        """Test search params are built from the filters and results transformed"""
+        route = respx_mock.get("/recipes/complexSearch").mock(
+            return_value=httpx.Response(200, json={"results": [SPOONACULAR_RECIPE]})
+        )
+
+        results = await service.search_recipes("pasta", intolerances=["gluten", "dairy"])
+
+        params = route.calls.last.request.url.params
+        assert params["query"] == "pasta"
+        assert params["intolerances"] == "gluten,dairy"
+        assert "cuisine" not in params
+        assert results[0]["name"] == "Bruschetta Style Pork & Pasta"
+
+    async def test_client_error_is_raised(self, service, respx_mock, cache):
+        """Test an exhausted quota surfaces instead of returning no results"""
+        respx_mock.get("/recipes/complexSearch").mock(return_value=httpx.Response(402))
+
+        with pytest.raises(RecipeAPIError) as exc_info:
+            await service.search_recipes("pasta")
+        assert exc_info.value.status_code == 402
+
+    async def test_details_not_modified_reuses_cache(self, service, respx_mock, cache):
+        """Test a stale entry is revalidated and a 304 keeps and re-arms the cached body"""
+        cached_recipe = {"name": "Cached Pasta"}
+        cache["entry"] = {
+            "recipe": cached_recipe,
+            "etag": '"abc"',
+            "last_modified": None,
+            "fetched_at": 0
+        }
+        route = respx_mock.get("/recipes/715538/information").mock(
+            return_value=httpx.Response(304)
+        )
+
+        recipe = await service.get_recipe_details(715538)
+
+        assert route.calls.last.request.headers["If-None-Match"] == '"abc"'
+        assert recipe == cached_recipe
+        cache["set"].assert_awaited_once()
+
+    async def test_low_quota_rate_is_restored(self, service, respx_mock, cache):
+        """Test the limiter slows on low quota and recovers once the quota resets"""
+        route = respx_mock.get("/recipes/complexSearch")
+
+        route.mock(return_value=httpx.Response(
+            200, json={"results": []}, headers={"X-API-Quota-Left": "10.5"}
+        ))
+        await service.search_recipes("pasta")
+        assert service._limiter.max_rate == recipe_api_service.SPOONACULAR_LOW_QUOTA_RATE
+
+        route.mock(return_value=httpx.Response(
+            200, json={"results": []}, headers={"X-API-Quota-Left": "not-a-number"}
+        ))
+        await service.search_recipes("soup")
+        assert service._limiter.max_rate == recipe_api_service.SPOONACULAR_LOW_QUOTA_RATE
+
+        route.mock(return_value=httpx.Response(
+            200, json={"results": []}, headers={"X-API-Quota-Left": "150"}
+        ))
+        await service.search_recipes("salad")
+        assert service._limiter.max_rate == recipe_api_service.SPOONACULAR_RATE
@@ -1,67 +1,113 @@
 """
 Recipe API Tests
 """
+from pathlib import Path
+from typing import AsyncGenerator, List, Tuple
+from urllib.parse import urlencode
+from uuid import uuid4
+
+import asyncio
+
+import httpx
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
+import pytest_asyncio
+from sqlalchemy import delete, event, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal, engine, get_db
+from app.core.security import create_access_token, get_password_hash
+from app.models.recipe import DietaryType, DifficultyLevel, Recipe, RecipeIngredient
+from app.models.user import User
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
 
-from app.main import app
-from app.core.database import get_db
+# Unique per session, so teardown only ever deletes this run's user
+TEST_EMAIL = f"recipes_test_{uuid4().hex}@example.com"
+SEED_RECIPE_COUNT = 50
+CHICKEN_RECIPE_COUNT = 5
+CHICKEN_INGREDIENT_COUNT = 3
 
-client = TestClient(app)
+# Search shared by the functional test and the benchmark
+SEARCH_PARAMS = {
+    "query": "chicken",
+    "max_calories": 500,
+    "dietary_type": "omnivore",
+    "page": 1,
+    "page_size": 20
+}
+SEARCH_BODY = orjson.dumps(SEARCH_PARAMS)
+SEARCH_ROUNDS = 1000
+
+# Current user, the recipe page, and one selectinload for its ingredients
+MAX_SEARCH_QUERIES = 3
+
+# Rating query string, encoded once rather than from a params dict on every request
+_RATE_QS = "?" + urlencode({"rating": 5, "review": "Excellent!"})
+
+# Tests share the session-scoped client, so they run on the session's event loop
+pytestmark = [
+    pytest.mark.asyncio(loop_scope="session"),
+    pytest.mark.db,
+]
 
 
 class TestRecipeAPI:
     """Test recipe endpoints"""
     
-    def test_search_recipes(self, test_db: Session, auth_headers: dict):
-        """Test recipe search"""
-        response = client.post(
-            "/api/v1/recipes/search",
-            headers=auth_headers,
-            json={
-                "query": "chicken",
-                "max_calories": 500,
-                "dietary_type": "omnivore",
-                "page": 1,
-                "page_size": 20
-            }
+    async def test_search_recipes(
+        self,
+        client: httpx.AsyncClient,
+        auth_headers: dict,
+        chicken_recipe_ids: List[str]
+    ):
+        """Test recipe search, and that it doesn't lazy-load per result (N+1)"""
+        one, one_selects = await _search_counting_selects(client, auth_headers, page_size=1)
+        many, many_selects = await _search_counting_selects(
+            client, auth_headers, page_size=CHICKEN_RECIPE_COUNT
+        )
+        
+        assert len(one) == 1
+        assert len(many) == CHICKEN_RECIPE_COUNT
+        seeded = [recipe for recipe in many if recipe["id"] in chicken_recipe_ids]
+        assert all(len(recipe["ingredients"]) == CHICKEN_INGREDIENT_COUNT for recipe in seeded)
+        
+        # The query count must not grow with the number of results
+        assert len(many_selects) == len(one_selects), many_selects
+        assert len(many_selects) <= MAX_SEARCH_QUERIES, many_selects
+    
+    @pytest.mark.benchmark(group="recipes")
+    async def test_search_recipes_bench(
+        self,
+        benchmark,
+        client: httpx.AsyncClient,
+        auth_headers: dict,
+        seeded_recipe_ids: List[str]
+    ):
+        """Time recipe search against the seeded pool; opt-in with -m benchmark"""
+        loop = asyncio.get_running_loop()
+        headers = {**auth_headers, "Content-Type": "application/json"}
+        
+        def search():
+            # pytest-benchmark calls synchronously, so hand each request to the session loop
+            return asyncio.run_coroutine_threadsafe(
+                client.post("/api/v1/recipes/search", headers=headers, content=SEARCH_BODY),
+                loop
+            ).result()
+        
+        # Run the timing loop off the event loop thread so the loop stays free to serve it
+        response = await asyncio.to_thread(
+            benchmark.pedantic, search, rounds=SEARCH_ROUNDS, iterations=1
         )
         
         assert response.status_code == 200
-        data = response.json()
-        assert isinstance(data, list)
     
-    def test_create_recipe(self, test_db: Session, auth_headers: dict):
+    async def test_create_recipe(self, client: httpx.AsyncClient, auth_headers: dict, recipe_payload: bytes):
         """Test recipe creation"""
-        response = client.post(
+        response = await client.post(
             "/api/v1/recipes/",
-            headers=auth_headers,
-            json={
-                "title": "Grilled Salmon",
-                "description": "Healthy omega-3 rich meal",
-                "prep_time_minutes": 15,
-                "cook_time_minutes": 20,
-                "servings": 4,
-                "difficulty": "medium",
-                "dietary_type": "pescatarian",
-                "ingredients": [
-                    {
-                        "name": "Salmon fillet",
-                        "quantity": 1.5,
-                        "unit": "lbs"
-                    }
-                ],
-                "instructions": {
-                    "steps": [
-                        {
-                            "step": 1,
-                            "instruction": "Preheat grill"
-                        }
-                    ]
-                },
-                "tags": ["heart-healthy"]
-            }
+            headers={**auth_headers, "Content-Type": "application/json"},
+            content=recipe_payload
         )
         
         assert response.status_code == 201
@@ -69,86 +115,214 @@ class TestRecipeAPI:
         assert data["title"] == "Grilled Salmon"
         assert "id" in data
     
-    def test_get_recipe(self, test_db: Session, auth_headers: dict, sample_recipe_id: str):
-        """Test get recipe by ID"""
-        response = client.get(
-            f"/api/v1/recipes/{sample_recipe_id}",
-            headers=auth_headers
-        )
-        
-        assert response.status_code in [200, 404]
-    
-    def test_rate_recipe(self, test_db: Session, auth_headers: dict, sample_recipe_id: str):
-        """Test recipe rating"""
-        response = client.post(
-            f"/api/v1/recipes/{sample_recipe_id}/rate",
+    @pytest.mark.parametrize("method,path,kwargs,expected_statuses,returns_list", [
+        ("GET", "/api/v1/recipes/{rid}", {}, {200, 404}, False),
+        ("POST", "/api/v1/recipes/{rid}/rate" + _RATE_QS, {}, {200, 404}, False),
+        ("POST", "/api/v1/recipes/{rid}/favorite", {}, {200, 404}, False),
+        ("GET", "/api/v1/recipes/favorites/me", {}, {200}, True),
+        ("GET", "/api/v1/recipes/recommendations/me", {"params": {"limit": 10}}, {200}, True),
+    ], ids=["get", "rate", "favorite", "favorites", "recommendations"])
+    async def test_recipe_endpoint_smoke(
+        self,
+        client: httpx.AsyncClient,
+        auth_headers: dict,
+        sample_recipe_id: str,
+        method: str,
+        path: str,
+        kwargs: dict,
+        expected_statuses: set,
+        returns_list: bool
+    ):
+        """Test recipe lookup, rating, favorites and recommendation endpoints respond"""
+        response = await client.request(
+            method,
+            path.format(rid=sample_recipe_id),
             headers=auth_headers,
-            params={"rating": 5, "review": "Excellent!"}
+            **kwargs
         )
         
-        assert response.status_code in [200, 404]
+        assert response.status_code in expected_statuses
+        if returns_list:
+            assert isinstance(response.json(), list)
+
+
+async def _search_counting_selects(
+    client: httpx.AsyncClient,
+    auth_headers: dict,
+    page_size: int
+) -> Tuple[list, List[str]]:
+    """Run the shared search with the given page size; return results and SELECTs issued"""
+    selects = []
     
-    def test_favorite_recipe(self, test_db: Session, auth_headers: dict, sample_recipe_id: str):
-        """Test add to favorites"""
-        response = client.post(
-            f"/api/v1/recipes/{sample_recipe_id}/favorite",
-            headers=auth_headers
-        )
-        
-        assert response.status_code in [200, 404]
+    def count_select(conn, cursor, statement, parameters, context, executemany):
+        # Savepoint statements from the rollback override don't count
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append(statement)
     
-    def test_get_favorites(self, test_db: Session, auth_headers: dict):
-        """Test get user favorites"""
-        response = client.get(
-            "/api/v1/recipes/favorites/me",
-            headers=auth_headers
+    event.listen(engine.sync_engine, "before_cursor_execute", count_select)
+    try:
+        response = await client.post(
+            "/api/v1/recipes/search",
+            headers={**auth_headers, "Content-Type": "application/json"},
+            content=orjson.dumps({**SEARCH_PARAMS, "page_size": page_size})
         )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert isinstance(data, list)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_select)
     
-    def test_get_recommendations(self, test_db: Session, auth_headers: dict):
-        """Test personalized recommendations"""
-        response = client.get(
-            "/api/v1/recipes/recommendations/me",
-            headers=auth_headers,
-            params={"limit": 10}
-        )
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert isinstance(data, list)
+    assert response.status_code == 200
+    return response.json(), selects
 
 
 # Fixtures
-@pytest.fixture
-def auth_headers(test_db: Session) -> dict:
-    """Get authentication headers for testing"""
-    # Create test user and login
-    response = client.post(
-        "/api/v1/auth/signup",
-        json={
-            "email": "test@example.com",
-            "password": "TestPassword123!",
-            "first_name": "Test",
-            "last_name": "User"
-        }
-    )
+async def _rollback_get_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    get_db override whose writes are rolled back when the request finishes
     
-    login_response = client.post(
-        "/api/v1/auth/login",
-        json={
-            "email": "test@example.com",
-            "password": "TestPassword123!"
-        }
-    )
+    The session joins a connection-level transaction in create_savepoint
+    mode, so a commit in a handler only releases a savepoint; the outer
+    transaction is then rolled back instead of deleting rows table by table.
+    """
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+        try:
+            yield session
+            await session.commit()
+        finally:
+            await session.close()
+            await trans.rollback()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _override_db():
+    """Install the rollback override once for every test in this module"""
+    from app.main import app
     
-    token = login_response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
+    app.dependency_overrides[get_db] = _rollback_get_db
+    yield
+    app.dependency_overrides.pop(get_db, None)
+
+
+async def _insert_test_user() -> str:
+    """Write the test user row directly and return its id"""
+    async with AsyncSessionLocal() as db:
+        user_id = await db.scalar(
+            insert(User)
+            .values(
+                email=TEST_EMAIL,
+                password_hash=get_password_hash("TestPassword123!"),
+                first_name="Test",
+                last_name="User"
+            )
+            .returning(User.id)
+        )
+        await db.commit()
+    return str(user_id)
+
+
+async def _delete_rows(model, ids: List[str]) -> None:
+    """Remove rows the session fixtures committed outside the per-request rollback"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(model).where(model.id.in_(ids)))
+        await db.commit()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def auth_headers(client: httpx.AsyncClient) -> AsyncGenerator[dict, None]:
+    """Get authentication headers for testing; the token is minted, not logged in for"""
+    user_id = await _insert_test_user()
+    yield {"Authorization": f"Bearer {create_access_token(user_id)}"}
+    await _delete_rows(User, [user_id])
+
+
+async def _seed_recipes() -> List[str]:
+    """Insert the seed recipe pool in one executemany INSERT and return the ids"""
+    async with AsyncSessionLocal() as db:
+        ids = await db.scalars(
+            insert(Recipe).returning(Recipe.id),
+            [
+                {
+                    "title": f"Seed Recipe {i}",
+                    "prep_time_minutes": 10,
+                    "cook_time_minutes": 20,
+                    "total_time_minutes": 30,
+                    "servings": 2,
+                    "difficulty": DifficultyLevel.EASY,
+                    "dietary_type": DietaryType.OMNIVORE,
+                    "calories": 400 + i,
+                    "protein_g": 30,
+                    "carbs_g": 40,
+                    "fat_g": 12
+                }
+                for i in range(SEED_RECIPE_COUNT)
+            ]
+        )
+        recipe_ids = [str(recipe_id) for recipe_id in ids]
+        await db.commit()
+    return recipe_ids
+
+
+@pytest_asyncio.fixture(scope="session")
+async def seeded_recipe_ids(client: httpx.AsyncClient) -> AsyncGenerator[List[str], None]:
+    """Ids of a recipe pool seeded once per session, straight into the DB and removed after"""
+    recipe_ids = await _seed_recipes()
+    yield recipe_ids
+    await _delete_rows(Recipe, recipe_ids)
+
+
+async def _seed_chicken_recipes() -> List[str]:
+    """Insert recipes the shared search matches, each with ingredients, and return the ids"""
+    async with AsyncSessionLocal() as db:
+        ids = await db.scalars(
+            insert(Recipe).returning(Recipe.id),
+            [
+                {
+                    "title": f"Chicken Seed Recipe {i}",
+                    "prep_time_minutes": 10,
+                    "cook_time_minutes": 25,
+                    "total_time_minutes": 35,
+                    "servings": 2,
+                    "difficulty": DifficultyLevel.EASY,
+                    "dietary_type": DietaryType.OMNIVORE,
+                    "calories": 350 + i,
+                    "protein_g": 35,
+                    "carbs_g": 20,
+                    "fat_g": 10
+                }
+                for i in range(CHICKEN_RECIPE_COUNT)
+            ]
+        )
+        recipe_ids = list(ids)
+        await db.execute(insert(RecipeIngredient), [
+            {
+                "recipe_id": recipe_id,
+                "name": f"ingredient {n}",
+                "quantity": 1.0,
+                "unit": "cup",
+                "order_index": n
+            }
+            for recipe_id in recipe_ids
+            for n in range(CHICKEN_INGREDIENT_COUNT)
+        ])
+        await db.commit()
+    return [str(recipe_id) for recipe_id in recipe_ids]
+
+
+@pytest_asyncio.fixture(scope="session")
+async def chicken_recipe_ids(client: httpx.AsyncClient) -> AsyncGenerator[List[str], None]:
+    """Ids of recipes matching the shared search; ingredients go with them on delete (CASCADE)"""
+    recipe_ids = await _seed_chicken_recipes()
+    yield recipe_ids
+    await _delete_rows(Recipe, recipe_ids)
+
+
+@pytest.fixture(scope="session")
+def recipe_payload() -> bytes:
+    """Create-recipe body from tests/fixtures, read once and sent as the raw JSON bytes"""
+    return (FIXTURES_DIR / "recipe.json").read_bytes()
 
 
 @pytest.fixture
-def sample_recipe_id() -> str:
+def sample_recipe_id(seeded_recipe_ids: List[str]) -> str:
     """Return a sample recipe ID for testing"""
-    return "00000000-0000-0000-0000-000000000001"
+    return seeded_recipe_ids[0]
@@ -0,0 +1,160 @@
+"""
+Tests for Shopping Service helpers
+"""
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import _execution_options, _server_settings
+from app.models.recipe import DietaryType, DifficultyLevel, Recipe, RecipeIngredient
+from app.models.shopping import ShoppingListItem
+from app.models.user import User
+from app.services.shopping_service import (
+    ShoppingService,
+    _consolidate_ingredients,
+    _scale_quantities,
+    _to_cents,
+    _from_cents
+)
+
+
+class TestCategorizeIngredient:
+    """Test ingredient categorization"""
+
+    @pytest.mark.parametrize("name,category", [
+        ("Roma Tomatoes", "produce"),
+        ("Chicken Breast", "meat"),
+        ("Greek Yogurt", "dairy"),
+        ("Brown Rice", "pantry"),
+        ("Whole Wheat Bread", "bakery"),
+        ("Tofu", "other"),
+    ])
+    def test_keyword_categories(self, name, category):
+        """Test names are categorized by case-insensitive keyword"""
+        assert ShoppingService._categorize_ingredient(name) == category
+
+    def test_priority_order(self):
+        """Test the earlier category wins when keywords overlap"""
+        # "pepper" is listed under produce and pantry
+        assert ShoppingService._categorize_ingredient("black pepper") == "produce"
+        # "cream" (dairy) outranks "roll" (bakery) regardless of position
+        assert ShoppingService._categorize_ingredient("rolled cream") == "dairy"
+
+
+class TestScaleQuantities:
+    """Test servings-multiplier scaling"""
+
+    def test_scales_by_recipe_multiplier(self):
+        """Test each quantity uses its own recipe's multiplier"""
+        scaled = _scale_quantities([1.0, 2.0, 3.0], [0, 1, 1], [2.0, 0.5])
+        assert scaled.tolist() == [2.0, 1.0, 1.5]
+
+
+class TestConsolidateIngredients:
+    """Test ingredient consolidation"""
+
+    def test_sums_same_name_and_unit(self):
+        """Test quantities merge case-insensitively per unit in first-seen order"""
+        items = _consolidate_ingredients(
+            ["Onion", "Garlic", "onion", "Onion"],
+            ["each", "clove", "each", "cup"],
+            [1.0, 2.0, 2.0, 0.5]
+        )
+        assert items == [
+            {"name": "Onion", "quantity": 3.0, "unit": "each"},
+            {"name": "Garlic", "quantity": 2.0, "unit": "clove"},
+            {"name": "Onion", "quantity": 0.5, "unit": "cup"},
+        ]
+
+    def test_empty(self):
+        """Test no ingredients consolidate to no items"""
+        assert _consolidate_ingredients([], [], []) == []
+
+
+class TestCents:
+    """Test integer-cent price conversion"""
+
+    def test_round_trip(self):
+        """Test Decimal prices survive conversion to cents and back"""
+        assert _to_cents(Decimal("3.99")) == 399
+        assert _from_cents(399 * 3) == Decimal("11.97")
+
+    def test_float_prices_round(self):
+        """Test float prices round to the nearest cent"""
+        assert _to_cents(19.99) == 1999
+
+
+@pytest.fixture
+def sync_db(client):
+    """
+    Real session on the test database, rolled back after the test
+
+    The shopping service drives a synchronous Session. Like AsyncSessionLocal,
+    this one has autoflush off, so it catches missing explicit flushes.
+    Requesting client runs the app lifespan, which creates the tables.
+    """
+    options = " ".join(f"-c {name}={value}" for name, value in _server_settings.items())
+    engine = create_engine(
+        make_url(settings.DATABASE_URL).set(drivername="postgresql+psycopg2"),
+        connect_args={"options": options} if options else {},
+        execution_options=_execution_options
+    )
+    with engine.connect() as conn:
+        trans = conn.begin()
+        session = Session(
+            bind=conn,
+            autoflush=False,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint"
+        )
+        try:
+            yield session
+        finally:
+            session.close()
+            trans.rollback()
+    engine.dispose()
+
+
+@pytest.mark.db
+@pytest.mark.asyncio(loop_scope="session")
+class TestGenerateShoppingList:
+    """Test shopping list generation against a real session"""
+
+    async def test_items_written_with_list(self, sync_db):
+        """Test the list row is flushed before its items are bulk-inserted"""
+        user = User(
+            email=f"shopper_{uuid4().hex}@example.com",
+            password_hash="not-a-real-hash",
+            first_name="Shop",
+            last_name="Per"
+        )
+        recipe = Recipe(
+            title="Shopping Test Recipe",
+            prep_time_minutes=10,
+            cook_time_minutes=20,
+            total_time_minutes=30,
+            servings=2,
+            difficulty=DifficultyLevel.EASY,
+            dietary_type=DietaryType.OMNIVORE
+        )
+        sync_db.add_all([user, recipe])
+        sync_db.flush()
+        sync_db.add_all([
+            RecipeIngredient(recipe_id=recipe.id, name="Chicken breast", quantity=1, unit="kg", order_index=0),
+            RecipeIngredient(recipe_id=recipe.id, name="Olive oil", quantity=2, unit="tbsp", order_index=1),
+        ])
+        sync_db.flush()
+
+        shopping_list = await ShoppingService.generate_shopping_list_from_recipes(
+            sync_db, user.id, [recipe.id]
+        )
+
+        items = sync_db.scalars(
+            select(ShoppingListItem).where(ShoppingListItem.shopping_list_id == shopping_list.id)
+        ).all()
+        assert sorted(item.item_name for item in items) == ["Chicken breast", "Olive oil"]
@@ -0,0 +1,64 @@
+"""
+Tests for Stripe webhook signature verification
+"""
+import hashlib
+import hmac
+import time
+
+import pytest
+
+from app.services.stripe_service import StripeService
+
+SECRET = "whsec_test"
+PAYLOAD = b'{"id": "evt_1", "type": "checkout.session.completed"}'
+
+
+def sign(payload: bytes, timestamp: int, secret: str = SECRET) -> str:
+    signed = f"{timestamp}.".encode() + payload
+    digest = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(monkeypatch):
+    monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", SECRET)
+
+
+class TestVerifyWebhookSignature:
+    """Test webhook signature verification"""
+
+    def test_valid_signature(self):
+        """Test a correctly signed payload is parsed"""
+        header = sign(PAYLOAD, int(time.time()))
+        event = StripeService.verify_webhook_signature(PAYLOAD, header)
+        assert event["type"] == "checkout.session.completed"
+
+    def test_any_v1_signature_matches(self):
+        """Test rotated secrets: one matching v1 among several is enough"""
+        timestamp = int(time.time())
+        header = sign(PAYLOAD, timestamp)
+        header = f"t={timestamp},v1={'0' * 64},{header.split(',')[1]}"
+        assert StripeService.verify_webhook_signature(PAYLOAD, header)["id"] == "evt_1"
+
+    def test_wrong_secret(self):
+        """Test a payload signed with another secret is rejected"""
+        header = sign(PAYLOAD, int(time.time()), secret="whsec_other")
+        with pytest.raises(ValueError, match="Invalid signature"):
+            StripeService.verify_webhook_signature(PAYLOAD, header)
+
+    def test_tampered_payload(self):
+        """Test a modified body is rejected"""
+        header = sign(PAYLOAD, int(time.time()))
+        with pytest.raises(ValueError, match="Invalid signature"):
+            StripeService.verify_webhook_signature(PAYLOAD + b" ", header)
+
+    def test_stale_timestamp(self):
+        """Test signatures older than the tolerance are rejected"""
+        header = sign(PAYLOAD, int(time.time()) - 3600)
+        with pytest.raises(ValueError, match="Invalid signature"):
+            StripeService.verify_webhook_signature(PAYLOAD, header)
+
+    def test_malformed_header(self):
+        """Test headers without a timestamp or v1 signature are rejected"""
+        with pytest.raises(ValueError, match="Invalid signature"):
+            StripeService.verify_webhook_signature(PAYLOAD, "garbage")
@@ -0,0 +1,83 @@
+"""
+Tests for Vector Search Service helpers
+"""
+from collections import OrderedDict
+from itertools import product
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.openai_client import openai_client
+from app.services.vector_service import (
+    EmptyEmbeddingError,
+    VectorSearchService,
+    _combine_recipe_text,
+)
+
+
+def _recipe(flags, ingredients=("oats", "milk"), tags=("breakfast",)):
+    diabetic, heart, gluten, dairy = flags
+    return SimpleNamespace(
+        title="Porridge",
+        description=None,
+        ingredients=[SimpleNamespace(name=name) for name in ingredients],
+        tags=[SimpleNamespace(tag=tag) for tag in tags],
+        dietary_type="vegetarian",
+        is_diabetic_friendly=diabetic,
+        is_heart_healthy=heart,
+        is_gluten_free=gluten,
+        is_dairy_free=dairy,
+    )
+
+
+class TestCombineRecipeText:
+    """Test the text recipes are embedded from"""
+
+    def test_every_flag_combination(self):
+        """Test each flag bitmap appends its phrases in a fixed order"""
+        phrases = ("diabetic friendly", "heart healthy", "gluten free", "dairy free")
+        for flags in product((False, True), repeat=4):
+            expected = " ".join(
+                ["Porridge", "", "oats milk", "breakfast", "dietary type: vegetarian"]
+                + [phrase for phrase, flag in zip(phrases, flags) if flag]
+            )
+            assert _combine_recipe_text(_recipe(flags)) == expected
+
+    def test_empty_relationships_are_skipped(self):
+        """Test recipes without ingredients or tags add no blank parts"""
+        recipe = _recipe((None, True, False, None), ingredients=(), tags=())
+        assert _combine_recipe_text(recipe) == "Porridge  dietary type: vegetarian heart healthy"
+
+
+class TestQueryEmbeddingCache:
+    """Test the in-process LRU on generate_query_embedding"""
+
+    @pytest.fixture(autouse=True)
+    def fake_embedding(self, monkeypatch):
+        calls = []
+
+        async def generate_embedding(text, dimensions=1536):
+            calls.append(text)
+            return [0.0] * dimensions if text == "fail" else [0.5] * dimensions
+
+        monkeypatch.setattr(openai_client, "generate_embedding", generate_embedding)
+        monkeypatch.setattr(VectorSearchService, "_query_cache", OrderedDict())
+        monkeypatch.setattr(VectorSearchService, "query_cache_hits", 0)
+        monkeypatch.setattr(VectorSearchService, "query_cache_misses", 0)
+        return calls
+
+    async def test_repeat_query_skips_api(self, fake_embedding):
+        """Test a repeated query is served from the cache"""
+        first = await VectorSearchService.generate_query_embedding("keto dinner")
+        second = await VectorSearchService.generate_query_embedding("keto dinner")
+        assert first == second
+        assert fake_embedding == ["keto dinner"]
+        assert VectorSearchService.query_cache_hits == 1
+        assert VectorSearchService.query_cache_misses == 1
+
+    async def test_failed_embedding_raises_and_is_not_cached(self, fake_embedding):
+        """Test zero vectors from failed calls raise and are retried"""
+        for _ in range(2):
+            with pytest.raises(EmptyEmbeddingError):
+                await VectorSearchService.generate_query_embedding("fail")
+        assert fake_embedding == ["fail", "fail"]